@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
 
-from distutils.core import setup
+from setuptools import setup
 
 setup(name = 'ipyparse',
       version = '0.1',
@@ -31,9 +31,13 @@ setup(name = 'ipyparse',
                      'Development Status :: 3 - Alpha',
                      'Intended Audience :: Developers',
                      'Programming Language :: Python',
-                     'Programming Language :: Python :: 2.7',
+                     'Programming Language :: Python :: 3',
+                     'Programming Language :: Python :: 3 :: Only',
+                     'Programming Language :: Python :: 3.11',
                      'Topic :: Software Development :: Libraries :: Python Modules'],
 
-      packages = ['ipyparse', 'ipyparse.test'],
+      packages = ['ipyparse', 'ipyparse.benchmark', 'ipyparse.test'],
       package_dir = {'': 'src'},
-      requires = ['pyparsing'] )
+      python_requires = '>=3.11',
+      install_requires = ['pyparsing'],
+      extras_require = {'numpy': ['numpy']} )
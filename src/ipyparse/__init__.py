@@ -16,3 +16,64 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import importlib
+
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import format_ipv4
+from ipyparse.ipv4 import is_valid_ipv4
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv4 import parse_ipv4_prefix
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import format_ipv6
+from ipyparse.ipv6 import is_valid_ipv6
+from ipyparse.ipv6 import parse_ipv6
+from ipyparse.ipv6 import parse_ipv6_prefix
+from ipyparse.ranges import AddressRange
+from ipyparse.ranges import WildcardRange
+from ipyparse.ranges import parse_ipv4_range
+from ipyparse.ranges import parse_ipv6_range
+
+_lazy = {'AddressArray': 'ipyparse.array',
+         'Aggregator': 'ipyparse.aggregate',
+         'parse_many': 'ipyparse.batch',
+         'format_many': 'ipyparse.batch',
+         'ColumnFile': 'ipyparse.column',
+         'write_column': 'ipyparse.column',
+         'IPSet': 'ipyparse.ipset',
+         'from_key': 'ipyparse.dualstack',
+         'parse_key': 'ipyparse.dualstack',
+         'parse_keys': 'ipyparse.dualstack',
+         'to_key': 'ipyparse.dualstack',
+         'compile_grammar': 'ipyparse.compiler',
+         'compiled_grammar': 'ipyparse.compiler',
+         'Instrumentation': 'ipyparse.instrument',
+         'ParseCache': 'ipyparse.cache',
+         'Parser': 'ipyparse.parser',
+         'PrefixIndex': 'ipyparse.prefix',
+         'scan': 'ipyparse.extract',
+         'parse_file_parallel': 'ipyparse.parallel',
+         'parse_stream': 'ipyparse.aio'}
+"""
+Names that are imported from their modules the first time they are
+used, so that importing this package does not import numpy,
+pyparsing, asyncio or the multiprocessing machinery.
+"""
+
+__all__ = ['AddressRange', 'IPv4Address', 'IPv6Address', 'WildcardRange',
+           'format_ipv4', 'format_ipv6',
+           'is_valid_ipv4', 'is_valid_ipv6',
+           'parse_ipv4', 'parse_ipv4_prefix', 'parse_ipv4_range',
+           'parse_ipv6', 'parse_ipv6_prefix', 'parse_ipv6_range'] + sorted(_lazy)
+
+def __getattr__(name):
+    try:
+        module = _lazy[name]
+    except KeyError:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
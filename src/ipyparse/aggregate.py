@@ -0,0 +1,344 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import array
+import collections
+import heapq
+import random
+
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv6 import IPv6Address
+
+_new = int.__new__
+
+_prime = (1 << 61) - 1
+
+class _Table(object):
+    """
+    The counts of the addresses, or of the prefixes of one length.
+
+    Counts are kept exactly in a dictionary until it holds more than
+    C{max_exact} keys.  After that they go into a count-min sketch,
+    and the keys with the largest estimates are kept as candidate
+    heavy hitters.
+
+    The candidates are also kept in a heap of C{(estimate, key)}
+    entries so that the smallest is found without a scan.  An entry
+    whose estimate is no longer the key's is stale and is dropped when
+    it reaches the top, and the heap is rebuilt once stale entries
+    outnumber the live ones.
+    """
+
+    def __init__(self, max_exact, width, depth, heavy, seed):
+        self.max_exact = max_exact
+        self.width = width
+        self.depth = depth
+        self.heavy = heavy
+        self.seed = seed
+        self.exact = collections.Counter()
+        self.sketch = None
+        self.candidates = None
+        self.heap = None
+
+    def _hashes(self, key):
+        """
+        The column of C{key} in each row of the sketch.
+        """
+        key %= _prime
+        width = self.width
+        return [((a * key + b) % _prime) % width for a, b in self.coefficients]
+
+    def _start_sketch(self):
+        generator = random.Random(self.seed)
+        self.coefficients = [(generator.randrange(1, _prime), generator.randrange(_prime))
+                             for row in range(self.depth)]
+        self.sketch = [array.array('Q', bytes(8 * self.width)) for row in range(self.depth)]
+        self.candidates = {}
+        self.heap = []
+        exact = self.exact
+        self.exact = None
+        for key, count in exact.items():
+            self._add_sketch(key, count)
+
+    def _add_sketch(self, key, count):
+        estimate = None
+        for row, column in zip(self.sketch, self._hashes(key)):
+            row[column] += count
+            if estimate is None or row[column] < estimate:
+                estimate = row[column]
+        self._offer(key, estimate)
+
+    def _offer(self, key, estimate):
+        """
+        Keep C{key} as a heavy hitter if its estimate is among the
+        largest seen.
+        """
+        candidates = self.candidates
+        heap = self.heap
+        if key not in candidates and len(candidates) >= self.heavy:
+            # drop stale entries until the top is the smallest candidate
+            while candidates.get(heap[0][1]) != heap[0][0]:
+                heapq.heappop(heap)
+            if estimate <= heap[0][0]:
+                return
+            del candidates[heapq.heappop(heap)[1]]
+        candidates[key] = estimate
+        heapq.heappush(heap, (estimate, key))
+        if len(heap) > 2 * len(candidates) + 16:
+            heap[:] = [(value, candidate) for candidate, value in candidates.items()]
+            heapq.heapify(heap)
+
+    def add(self, key, count):
+        if self.sketch is None:
+            self.exact[key] += count
+            if len(self.exact) > self.max_exact:
+                self._start_sketch()
+        else:
+            self._add_sketch(key, count)
+
+    def estimate(self, key):
+        if self.sketch is None:
+            return self.exact.get(key, 0)
+        return min(row[column] for row, column in zip(self.sketch, self._hashes(key)))
+
+    def top(self, n):
+        counts = self.exact if self.sketch is None else self.candidates
+        return heapq.nsmallest(n, counts.items(), key = lambda item: (-item[1], item[0]))
+
+    def merge(self, other):
+        if self.sketch is None and other.sketch is None:
+            self.exact.update(other.exact)
+            if len(self.exact) > self.max_exact:
+                self._start_sketch()
+            return
+        if self.sketch is None:
+            self._start_sketch()
+        if other.sketch is None:
+            for key, count in other.exact.items():
+                self._add_sketch(key, count)
+            return
+        for row, other_row in zip(self.sketch, other.sketch):
+            for column, count in enumerate(other_row):
+                if count:
+                    row[column] += count
+        # re-estimate the candidates of both sides against the merged sketch
+        keys = set(self.candidates) | set(other.candidates)
+        self.candidates = {}
+        self.heap = []
+        for key in keys:
+            self._offer(key, self.estimate(key))
+
+class Aggregator(object):
+    """
+    Streaming counts of addresses and of the prefixes containing them.
+
+    Every address added is counted, along with its network at each of
+    the prefix lengths (found by masking the integer, so an address
+    from L{ipyparse.ipv4.parse_ipv4} or L{ipyparse.ipv6.parse_ipv6}
+    can be added as it is).  The addresses and each prefix length are
+    counted separately: exactly while there are at most C{max_exact}
+    distinct keys, then in a count-min sketch of C{depth} rows of
+    C{width} counters.  A sketch never underestimates, and overcounts
+    by at most C{2 / width} of the total with probability
+    C{1 - 2 ** -depth}.  Once a table is sketched only its C{heavy}
+    largest keys are kept for L{top}.
+
+    Aggregators built with the same arguments can be merged, for
+    example after counting parts of a stream in separate processes
+    (an aggregator can be pickled).
+
+    >>> aggregator = Aggregator(family = 4)
+    >>> aggregator.update(parse_ipv4(line) for line in lines)
+    >>> aggregator.top(10, length = 24)
+    [(IPv4Address('10.1.2.0'), 1523), ...]
+
+    @ivar family: The address family, 4 or 6.
+    @ivar bits: The width of an address in bits.
+    @ivar lengths: The prefix lengths counted, including C{bits} for
+    the addresses themselves.
+    @ivar total: The number of addresses added.
+    """
+
+    def __init__(self, family = 4, lengths = None, max_exact = 100000,
+                 width = 1 << 14, depth = 4, heavy = 100, seed = 0):
+        """
+        @param family: The address family, 4 or 6.
+        @type family: int
+
+        @param lengths: The prefix lengths to count; by default 24 for
+        IPv4 and 64 for IPv6.
+        @type lengths: iterable of int
+
+        @param max_exact: The number of distinct keys each length is
+        counted exactly for, which bounds the memory used by the exact
+        counts.
+        @type max_exact: int
+
+        @param width: The number of counters in each row of a sketch.
+        @type width: int
+
+        @param depth: The number of rows of a sketch.
+        @type depth: int
+
+        @param heavy: The number of heavy hitters kept for each length
+        once it is sketched, at least 1.
+        @type heavy: int
+
+        @param seed: The seed of the sketch's hash functions, which
+        must be the same for aggregators that are merged.
+        @type seed: int
+        """
+        if family not in (4, 6):
+            raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+        if heavy < 1:
+            raise ValueError('heavy must be at least 1, not {!r}'.format(heavy))
+        self.family = family
+        self.bits = 32 if family == 4 else 128
+        if lengths is None:
+            lengths = [24 if family == 4 else 64]
+        lengths = sorted(set(lengths) | set([self.bits]))
+        for length in lengths:
+            if not 0 <= length <= self.bits:
+                raise ValueError('invalid prefix length {!r}'.format(length))
+        self.lengths = lengths
+        self.total = 0
+        self._settings = (max_exact, width, depth, heavy, seed)
+        self._masks = [(length, ((1 << length) - 1) << (self.bits - length)) for length in lengths]
+        self._tables = dict((length, _Table(max_exact, width, depth, heavy, seed + length)) for length in lengths)
+
+    def add(self, address, count = 1):
+        """
+        Count an address.
+
+        @param address: The address
+        @type address: int
+
+        @param count: How many times to count it.
+        @type count: int
+
+        @raise ValueError: If C{count} is negative.
+        """
+        if count < 0:
+            raise ValueError('count must not be negative, not {!r}'.format(count))
+        address = int(address)
+        if not 0 <= address < (1 << self.bits):
+            raise ValueError('{!r} is not a valid IPv{} address'.format(address, self.family))
+        tables = self._tables
+        for length, mask in self._masks:
+            tables[length].add(address & mask, count)
+        self.total += count
+
+    def update(self, addresses):
+        """
+        Count many addresses.
+
+        @param addresses: The addresses, or the values from
+        L{ipyparse.batch.parse_many}; IPv4 arrays are masked and
+        counted with whole-array operations before being added.
+        @type addresses: iterable of int
+        """
+        if self.family == 4 and getattr(addresses, 'dtype', None) is not None:
+            import numpy
+
+            if len(addresses) and (addresses.min() < 0 or addresses.max() >= 1 << 32):
+                raise ValueError('IPv4 addresses must be between 0 and 2**32 - 1')
+            addresses = addresses.astype(numpy.uint32)
+            for length, mask in self._masks:
+                keys, counts = numpy.unique(addresses & numpy.uint32(mask), return_counts = True)
+                table = self._tables[length]
+                for key, count in zip(keys.tolist(), counts.tolist()):
+                    table.add(key, count)
+            self.total += len(addresses)
+            return
+        if getattr(addresses, 'dtype', None) is not None and addresses.dtype.names == ('hi', 'lo'):
+            addresses = [(hi << 64) | lo for hi, lo in addresses.tolist()]
+        elif hasattr(addresses, 'tolist'):
+            addresses = addresses.tolist()
+        for address in addresses:
+            self.add(address)
+
+    def _table(self, length):
+        if length is None:
+            length = self.bits
+        try:
+            return self._tables[length]
+        except KeyError:
+            raise ValueError('prefix length {!r} is not counted'.format(length))
+
+    def _key(self, address):
+        return _new(IPv4Address if self.family == 4 else IPv6Address, address)
+
+    def count(self, address, length = None):
+        """
+        @param address: An address, or any address in the prefix.
+        @type address: int
+
+        @param length: The prefix length, or C{None} for the address
+        itself.
+        @type length: int
+
+        @return: The number of times the address, or an address in its
+        prefix, was counted: exactly, or an estimate that is never too
+        low if the counts have been sketched.
+        @rtype: int
+        """
+        length = self.bits if length is None else length
+        mask = ((1 << length) - 1) << (self.bits - length)
+        return self._table(length).estimate(int(address) & mask)
+
+    def is_exact(self, length = None):
+        """
+        @return: Whether the counts for a prefix length (by default,
+        for the addresses themselves) are still exact.
+        @rtype: bool
+        """
+        return self._table(length).sketch is None
+
+    def top(self, n = 10, length = None):
+        """
+        @param n: How many to return.
+        @type n: int
+
+        @param length: The prefix length, or C{None} for the addresses
+        themselves.
+        @type length: int
+
+        @return: The most counted addresses, or networks, and their
+        counts, largest first.
+        @rtype: list of tuple of (L{ipyparse.ipv4.IPv4Address} or
+        L{ipyparse.ipv6.IPv6Address}, int)
+        """
+        return [(self._key(key), count) for key, count in self._table(length).top(n)]
+
+    def merge(self, other):
+        """
+        Add the counts of another aggregator to this one.
+
+        @param other: An aggregator created with the same arguments.
+        @type other: L{Aggregator}
+        """
+        if (other.family, other.lengths, other._settings) != (self.family, self.lengths, self._settings):
+            raise ValueError('can only merge aggregators with the same settings')
+        for length in self.lengths:
+            self._tables[length].merge(other._tables[length])
+        self.total += other.total
+
+    def __repr__(self):
+        return '{}(family = {}, lengths = {!r}, total = {})'.format(self.__class__.__name__, self.family,
+                                                                    self.lengths, self.total)
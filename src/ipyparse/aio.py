@@ -0,0 +1,193 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import collections
+
+from ipyparse.extract import _spans
+from ipyparse.extract import scan_span
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import _ipv4_value
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import _ipv6_value
+
+_new = int.__new__
+
+def parse_lines(lines, family = None, extract = False):
+    """
+    Parse a batch of lines.
+
+    This is the unit of work that L{parse_stream} runs either inline
+    or in an executor, so it is a plain module level function that
+    can also be sent to a process pool.
+
+    @param lines: The lines, without their line endings.
+    @type lines: list of bytes
+
+    @param family: The address family, 4 or 6, or C{None} to accept
+    either.
+    @type family: int
+
+    @param extract: Find every address embedded in each line, as
+    L{ipyparse.extract.scan} does, instead of treating each line as
+    one address.
+    @type extract: bool
+
+    @return: The addresses found; lines that are not addresses are
+    skipped.
+    @rtype: list of L{ipyparse.ipv4.IPv4Address} or
+    L{ipyparse.ipv6.IPv6Address}
+    """
+    result = []
+    if extract:
+        for line in lines:
+            for offset, span in _spans(line):
+                for start, found, value in scan_span(span):
+                    if family is None or found == family:
+                        result.append(_new(IPv4Address if found == 4 else IPv6Address, value))
+        return result
+
+    for line in lines:
+        # latin-1 never fails to decode; anything outside ASCII is invalid anyway
+        text = line.strip().decode('latin-1')
+        if not text:
+            continue
+        if family == 4 or (family is None and ':' not in text):
+            value = _ipv4_value(text)
+            cls = IPv4Address
+        else:
+            value = _ipv6_value(text)
+            cls = IPv6Address
+        if value is not None:
+            result.append(_new(cls, value))
+    return result
+
+async def parse_stream(reader,
+                       family = None,
+                       extract = False,
+                       chunk_size = 1 << 16,
+                       offload_threshold = 1024,
+                       offload_bytes = 1 << 14,
+                       executor = None,
+                       max_pending = 4,
+                       max_line = 1 << 16):
+    """
+    Parse the addresses in a stream, one line at a time.
+
+    The stream is read a chunk at a time and the complete lines in
+    each chunk are parsed as a batch with L{parse_lines}.  Batches of
+    at least C{offload_threshold} lines or C{offload_bytes} bytes are
+    parsed in an executor so that a burst does not block the event
+    loop; smaller batches are parsed inline, which bounds the time the
+    loop is held to the time it takes to parse that many lines or
+    bytes, whichever comes first.  Counting bytes matters with
+    C{extract}, where a few long lines can take as long as thousands
+    of short ones.
+
+    Backpressure comes from the iterator itself: nothing more is read
+    while the consumer is not asking for addresses, except that up to
+    C{max_pending} batches are read ahead while earlier ones are
+    being parsed.  Results are always produced in stream order.
+
+    >>> async for address in parse_stream(reader, extract = True):
+    ...     print(address)
+
+    @param reader: The stream
+    @type reader: L{asyncio.StreamReader}
+
+    @param family: The address family, 4 or 6, or C{None} to accept
+    either.
+    @type family: int
+
+    @param extract: Find every address embedded in each line rather
+    than treating each line as one address.
+    @type extract: bool
+
+    @param chunk_size: How much to read from the stream at a time.
+    @type chunk_size: int
+
+    @param offload_threshold: The smallest batch, in lines, that is
+    parsed in the executor.
+    @type offload_threshold: int
+
+    @param offload_bytes: The smallest batch, in bytes, that is
+    parsed in the executor.
+    @type offload_bytes: int
+
+    @param executor: The executor for large batches, by default the
+    event loop's default executor.  A process pool also works.
+    @type executor: L{concurrent.futures.Executor}
+
+    @param max_pending: The most batches read ahead of the consumer.
+    @type max_pending: int
+
+    @param max_line: Lines longer than this, in bytes, are skipped,
+    and are not buffered while their end is awaited.
+    @type max_line: int
+
+    @return: An asynchronous iterator of the addresses, in order.
+    """
+    if family not in (None, 4, 6):
+        raise ValueError('family must be 4, 6 or None, not {!r}'.format(family))
+
+    loop = asyncio.get_running_loop()
+    pending = collections.deque()
+    remainder = b''
+    skipping = False
+    eof = False
+
+    while True:
+        while not eof and len(pending) < max_pending:
+            data = await reader.read(chunk_size)
+            if not data:
+                eof = True
+                lines = [] if skipping or not remainder else [remainder]
+            else:
+                if skipping:
+                    # throw away the rest of a line that was too long
+                    end = data.find(b'\n')
+                    if end < 0:
+                        continue
+                    data = data[end + 1:]
+                    skipping = False
+                lines = (remainder + data).split(b'\n')
+                remainder = lines.pop()
+                if len(remainder) > max_line:
+                    remainder = b''
+                    skipping = True
+                lines = [line for line in lines if len(line) <= max_line]
+            if not lines:
+                continue
+
+            size = sum(len(line) for line in lines)
+            if len(lines) >= offload_threshold or size >= offload_bytes:
+                pending.append(loop.run_in_executor(executor, parse_lines, lines, family, extract))
+            else:
+                future = loop.create_future()
+                future.set_result(parse_lines(lines, family, extract))
+                pending.append(future)
+                # let other tasks run between inline batches
+                await asyncio.sleep(0)
+                break
+
+        if not pending:
+            return
+
+        for address in await pending.popleft():
+            yield address
@@ -0,0 +1,246 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ipyparse.batch import parse_many
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv6 import IPv6Address
+
+_new = int.__new__
+
+class AddressArray(object):
+    """
+    A column of addresses of one family in a contiguous buffer.
+
+    IPv4 addresses are stored as an array of
+    L{ipyparse.batch.IPV4_DTYPE} (C{uint32}) and IPv6 addresses as an
+    array of L{ipyparse.batch.IPV6_DTYPE}, whose records are the
+    16-byte packed addresses, exactly as returned by
+    L{ipyparse.batch.parse_many}.  Sorting, deduplication, membership
+    tests and set operations are done with whole-array numpy
+    operations; IPv6 records are compared as 16-byte strings, which in
+    network order sort the same as the addresses.
+
+    An array is never changed in place: operations return a new array
+    and slicing returns a view of the same buffer, without a copy.
+
+    >>> addresses = AddressArray.parse(['10.0.0.2', '10.0.0.1', '10.0.0.2'])
+    >>> [str(address) for address in addresses.unique()]
+    ['10.0.0.1', '10.0.0.2']
+
+    @ivar values: The addresses
+    @type values: L{numpy.ndarray}
+    @ivar family: The address family, 4 or 6.
+    """
+
+    def __init__(self, values = (), family = 4):
+        """
+        @param values: The addresses, as an array like those returned
+        by L{ipyparse.batch.parse_many} or as any iterable of
+        integers.
+        @type values: L{numpy.ndarray} or iterable of int
+
+        @param family: The address family, 4 or 6.
+        @type family: int
+        """
+        if numpy is None:
+            raise ImportError('AddressArray requires numpy')
+        if family not in (4, 6):
+            raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+
+        from ipyparse.batch import IPV4_DTYPE
+        from ipyparse.batch import IPV6_DTYPE
+
+        dtype = IPV4_DTYPE if family == 4 else IPV6_DTYPE
+        if isinstance(values, numpy.ndarray) and values.dtype == dtype:
+            if values.ndim != 1:
+                raise ValueError('values must be one-dimensional')
+        elif family == 4:
+            values = numpy.array(list(values), dtype = dtype)
+        else:
+            values = [int(value) for value in values]
+            if any(not 0 <= value < (1 << 128) for value in values):
+                raise ValueError('IPv6 addresses must be between 0 and 2**128 - 1')
+            records = numpy.zeros(len(values), dtype = dtype)
+            records['hi'] = [value >> 64 for value in values]
+            records['lo'] = [value & 0xffffffffffffffff for value in values]
+            values = records
+
+        self.values = values
+        self.family = family
+        self._sorted = len(values) < 2
+
+    @classmethod
+    def parse(cls, items, family = 4):
+        """
+        Parse many addresses with L{ipyparse.batch.parse_many},
+        keeping only the valid ones.
+
+        @param items: The strings to convert
+        @type items: iterable of str
+
+        @param family: The address family, 4 or 6.
+        @type family: int
+
+        @rtype: L{AddressArray}
+        """
+        values, valid = parse_many(items, family = family)
+        return cls(values[valid], family)
+
+    def _keys(self):
+        """
+        @return: The values in a form that numpy orders the same way
+        as the addresses.
+        @rtype: L{numpy.ndarray}
+        """
+        if self.family == 4:
+            return self.values
+        return self.values.view('S16')
+
+    def _wrap(self, keys, is_sorted):
+        """
+        Make a new array from keys returned by L{_keys}.
+        """
+        if self.family == 6:
+            keys = keys.view(self.values.dtype)
+        result = self.__class__(keys, self.family)
+        result._sorted = result._sorted or is_sorted
+        return result
+
+    def _other_keys(self, other):
+        """
+        Convert the other operand of a set operation or membership
+        test to keys.
+        """
+        if not isinstance(other, AddressArray):
+            other = self.__class__(other, self.family)
+        elif other.family != self.family:
+            raise ValueError('can not combine IPv{} and IPv{} addresses'.format(self.family, other.family))
+        return other._keys()
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return '{}(family = {}, len = {})'.format(self.__class__.__name__, self.family, len(self))
+
+    def _address(self, value):
+        if self.family == 4:
+            return _new(IPv4Address, value)
+        hi, lo = value
+        return _new(IPv6Address, (hi << 64) | lo)
+
+    def __getitem__(self, index):
+        """
+        Get one address, or a slice of the array.
+
+        A slice is a view of the same buffer; an index array or a
+        boolean mask makes a copy.
+
+        @rtype: L{ipyparse.ipv4.IPv4Address}, L{ipyparse.ipv6.IPv6Address}
+        or L{AddressArray}
+        """
+        if isinstance(index, (int, numpy.integer)):
+            return self._address(self.values[index].tolist())
+        result = self.__class__(self.values[index], self.family)
+        if isinstance(index, slice) and (index.step is None or index.step > 0):
+            result._sorted = result._sorted or self._sorted
+        return result
+
+    def __iter__(self):
+        for value in self.values.tolist():
+            yield self._address(value)
+
+    def tolist(self):
+        """
+        @return: The addresses
+        @rtype: list of L{ipyparse.ipv4.IPv4Address} or
+        L{ipyparse.ipv6.IPv6Address}
+        """
+        return list(self)
+
+    def sort(self):
+        """
+        @return: The addresses in ascending order.
+        @rtype: L{AddressArray}
+        """
+        if self._sorted:
+            return self
+        return self._wrap(numpy.sort(self._keys()), True)
+
+    def unique(self):
+        """
+        @return: The distinct addresses in ascending order.
+        @rtype: L{AddressArray}
+        """
+        return self._wrap(numpy.unique(self._keys()), True)
+
+    def contains_many(self, addresses):
+        """
+        Test many addresses for membership at once with a binary
+        search; the array is sorted first if it is not already.
+
+        @param addresses: The addresses to look for
+        @type addresses: L{AddressArray}, L{numpy.ndarray} or iterable of int
+
+        @return: Whether each address is in this array.
+        @rtype: L{numpy.ndarray} of bool
+        """
+        keys = self.sort()._keys()
+        wanted = self._other_keys(addresses)
+        if not len(keys):
+            return numpy.zeros(len(wanted), dtype = bool)
+        index = numpy.searchsorted(keys, wanted)
+        return keys[numpy.minimum(index, len(keys) - 1)] == wanted
+
+    def __contains__(self, address):
+        try:
+            return bool(self.contains_many([address])[0])
+        except (OverflowError, TypeError, ValueError):
+            return False
+
+    def union(self, other):
+        """
+        @return: The distinct addresses in either array, in order.
+        @rtype: L{AddressArray}
+        """
+        return self._wrap(numpy.union1d(self._keys(), self._other_keys(other)), True)
+
+    def intersection(self, other):
+        """
+        @return: The distinct addresses in both arrays, in order.
+        @rtype: L{AddressArray}
+        """
+        return self._wrap(numpy.intersect1d(self._keys(), self._other_keys(other)), True)
+
+    def difference(self, other):
+        """
+        @return: The distinct addresses in this array but not the
+        other, in order.
+        @rtype: L{AddressArray}
+        """
+        return self._wrap(numpy.setdiff1d(self._keys(), self._other_keys(other)), True)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
@@ -0,0 +1,310 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ipyparse.ipv4 import _ipv4_value
+from ipyparse.ipv4 import format_ipv4
+from ipyparse.ipv6 import _ipv6_value
+from ipyparse.ipv6 import format_ipv6
+
+if numpy is not None:
+    IPV4_DTYPE = numpy.dtype(numpy.uint32)
+    """
+    The type of the values returned by L{parse_many} for IPv4 addresses.
+    """
+
+    IPV6_DTYPE = numpy.dtype([('hi', '>u8'), ('lo', '>u8')])
+    """
+    The type of the values returned by L{parse_many} for IPv6
+    addresses.  The fields are big-endian so the raw memory of each
+    record is the 16-byte packed address, and
+    C{values.view(numpy.uint8).reshape(-1, 16)} gives the packed
+    addresses without a copy.
+    """
+
+    # hex digit value of every character code, 255 for anything else
+    _nibbles = numpy.full(256, 255, dtype = numpy.uint8)
+    for _c in '0123456789abcdef':
+        _nibbles[ord(_c)] = _nibbles[ord(_c.upper())] = int(_c, 16)
+    del _c
+
+IPV4_WIDTH = 15
+"""
+Rows longer than this are left to L{ipyparse.ipv4.parse_ipv4}.
+"""
+
+IPV6_WIDTH = 39
+"""
+Rows longer than this are left to L{ipyparse.ipv6.parse_ipv6}.
+"""
+
+def _as_matrix(items, width):
+    """
+    Pack strings into a matrix of character codes, one row per string.
+
+    @param items: The strings
+    @type items: list of str
+
+    @param width: Strings longer than this are replaced with an
+    empty row.
+    @type width: int
+
+    @return: The matrix, which has an extra column of padding at the
+    end and in which every non-ASCII character is replaced with 128,
+    and the length of each row.
+    @rtype: tuple of (L{numpy.ndarray}, L{numpy.ndarray})
+    """
+    lengths = numpy.fromiter(map(len, items), numpy.intp, len(items))
+    long = lengths > width
+    if long.any():
+        items = ['' if too_long else item for item, too_long in zip(items, long)]
+        lengths[long] = 0
+    chars = numpy.array(items, dtype = 'U{}'.format(width + 1))
+    chars = chars.view(numpy.uint32).reshape(len(items), width + 1)
+    return numpy.minimum(chars, 128).astype(numpy.uint8), lengths
+
+def _scan_ipv4(chars, lengths):
+    """
+    Convert a matrix of dotted quads to 32-bit integers.
+
+    The dots of every row are located at once and the (at most four)
+    digits of each octet are gathered and converted with a handful of
+    whole-array operations.  Octets follow the same rules as
+    L{ipyparse.ipv4.Octet}; rows with longer runs of zeros are marked
+    invalid and left to L{ipyparse.ipv4.parse_ipv4}.
+
+    @return: The converted values and a mask of the rows that were
+    valid.
+    @rtype: tuple of (L{numpy.ndarray}, L{numpy.ndarray})
+    """
+    n, width = chars.shape
+    digits = chars - numpy.uint8(48)
+    is_digit = digits < 10
+    is_dot = chars == 46
+    valid = ((lengths > 0) &
+             (numpy.count_nonzero(is_digit | is_dot, axis = 1) == lengths) &
+             (numpy.count_nonzero(is_dot, axis = 1) == 3))
+
+    rows = numpy.flatnonzero(valid)
+    dots = numpy.nonzero(is_dot[rows])[1].reshape(-1, 3)
+    starts = numpy.empty((len(rows), 4), dtype = numpy.intp)
+    starts[:, 0] = 0
+    starts[:, 1:] = dots + 1
+    ends = numpy.empty((len(rows), 4), dtype = numpy.intp)
+    ends[:, :3] = dots
+    ends[:, 3] = lengths[rows]
+    sizes = ends - starts
+
+    # index the octets' digits in the flattened matrix
+    starts += (rows * width)[:, None]
+    digits = digits.ravel()
+    last = digits.size - 1
+    octets = numpy.zeros(starts.shape, dtype = numpy.int32)
+    for index in range(4):
+        c = digits[numpy.minimum(starts + index, last)]
+        octets = numpy.where(index < sizes, octets * 10 + c, octets)
+        if index == 0:
+            first = c
+        elif index == 1:
+            second = c
+
+    # at most one leading zero unless the octet is all zeros
+    ok = ((sizes > 0) & (sizes <= 4) & (octets <= 255) &
+          ((octets == 0) | (first != 0) | (second != 0))).all(1)
+    valid[rows] = ok
+
+    octets = octets.astype(numpy.uint32)
+    values = numpy.zeros(n, dtype = numpy.uint32)
+    values[rows] = numpy.where(ok,
+                               (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3],
+                               0)
+    return values, valid
+
+def _scan_ipv6(chars, lengths):
+    """
+    Convert a matrix of IPv6 addresses to L{IPV6_DTYPE} records.
+
+    The groups of every row are located at once, the (at most four)
+    digits of each group are gathered and converted, and the groups
+    behind the double colon are moved to the end of the address, all
+    with whole-array operations.  Rows with an embedded dotted quad
+    are marked invalid and left to L{ipyparse.ipv6.parse_ipv6}.
+
+    @return: The converted values and a mask of the rows that were
+    valid.
+    @rtype: tuple of (L{numpy.ndarray}, L{numpy.ndarray})
+    """
+    n, width = chars.shape
+    rows = numpy.arange(n)
+    nibbles = numpy.take(_nibbles, chars)
+    is_hex = nibbles < 16
+    is_colon = chars == 58
+    valid = (lengths > 0) & (numpy.count_nonzero(is_hex | is_colon, axis = 1) == lengths)
+
+    # a single colon can not start or end the address
+    valid &= (chars[:, 0] != 58) | (chars[:, 1] == 58)
+    valid &= ((chars[rows, numpy.maximum(lengths - 1, 0)] != 58) |
+              (chars[rows, numpy.maximum(lengths - 2, 0)] == 58))
+
+    double = is_colon[:, :-1] & is_colon[:, 1:]
+    compressed = double.any(1)
+    valid &= numpy.count_nonzero(double, axis = 1) <= 1
+
+    # find the first and last digit of every group
+    is_start = is_hex.copy()
+    is_start[:, 1:] &= ~is_hex[:, :-1]
+    is_end = is_hex.copy()
+    is_end[:, :-1] &= ~is_hex[:, 1:]
+    starts = numpy.flatnonzero(is_start)
+    sizes = numpy.flatnonzero(is_end) - starts + 1
+    group_rows = starts // width
+    valid[group_rows[sizes > 4]] = False
+
+    count = numpy.bincount(group_rows, minlength = n)
+    valid &= numpy.where(compressed, (count > 0) & (count < 8), count == 8)
+
+    # groups after the double colon move to the end of the address
+    index = numpy.arange(len(group_rows)) - (numpy.cumsum(count) - count)[group_rows]
+    before = starts < numpy.argmax(double, axis = 1)[group_rows] + group_rows * width
+    left = numpy.where(compressed, numpy.bincount(group_rows[before], minlength = n), 8)
+    index += numpy.where(index >= left[group_rows], 8 - count[group_rows], 0)
+
+    # gather the groups' digits from the flattened matrix
+    nibbles = nibbles.ravel()
+    last = nibbles.size - 1
+    groups = numpy.zeros(len(group_rows), dtype = numpy.uint16)
+    for place in range(4):
+        c = nibbles[numpy.minimum(starts + place, last)]
+        groups = numpy.where(place < sizes, (groups << 4) | c, groups)
+
+    words = numpy.zeros((n, 8), dtype = '>u2')
+    keep = valid[group_rows]
+    words[group_rows[keep], index[keep]] = groups[keep]
+    return words.view(IPV6_DTYPE).reshape(n), valid
+
+def parse_many(items, family = 4, chunk_size = 65536):
+    """
+    Convert many addresses of one family at once.
+
+    Rows are converted with a vectorized scan over the whole column;
+    rows that scan rejects (including any that are too long for it or
+    that use forms it does not handle) are converted one at a time
+    the same way as L{ipyparse.ipv4.parse_ipv4} or
+    L{ipyparse.ipv6.parse_ipv6}, so the result is always the same as
+    calling those on each row.  Invalid rows do not raise; their
+    value is zero and they are cleared in the validity mask.
+
+    @param items: The strings to convert
+    @type items: iterable of str
+
+    @param family: The address family, 4 or 6.
+    @type family: int
+
+    @param chunk_size: How many rows to scan at a time, which bounds
+    the temporary memory used by the scan.
+    @type chunk_size: int
+
+    @return: The converted values, as an array of L{IPV4_DTYPE} or
+    L{IPV6_DTYPE}, and a boolean mask of the rows that were valid.
+    @rtype: tuple of (L{numpy.ndarray}, L{numpy.ndarray})
+    """
+    if numpy is None:
+        raise ImportError('parse_many requires numpy')
+
+    if family == 4:
+        dtype, width, scan, parse = IPV4_DTYPE, IPV4_WIDTH, _scan_ipv4, _ipv4_value
+    elif family == 6:
+        dtype, width, scan, parse = IPV6_DTYPE, IPV6_WIDTH, _scan_ipv6, _ipv6_value
+    else:
+        raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+
+    items = list(items)
+    values = numpy.zeros(len(items), dtype = dtype)
+    valid = numpy.zeros(len(items), dtype = bool)
+
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        chunk_values, chunk_valid = scan(*_as_matrix(chunk, width))
+        values[start:start + len(chunk)] = chunk_values
+        valid[start:start + len(chunk)] = chunk_valid
+
+    for index in numpy.flatnonzero(~valid):
+        value = parse(items[index])
+        if value is None:
+            continue
+        if family == 4:
+            values[index] = value
+        else:
+            values[index] = (value >> 64, value & 0xffffffffffffffff)
+        valid[index] = True
+
+    return values, valid
+
+_decimal = [str(n) for n in range(256)]
+
+def format_many(values, family = 4, valid = None):
+    """
+    Convert many addresses of one family back to text.
+
+    IPv4 addresses are split into octets with whole-array operations
+    and joined from a table of decimal strings.  IPv6 addresses are
+    formatted one at a time with L{ipyparse.ipv6.format_ipv6}.
+
+    @param values: The addresses, either as returned by L{parse_many}
+    or as any sequence of integers.
+    @type values: L{numpy.ndarray} or iterable of int
+
+    @param family: The address family, 4 or 6.
+    @type family: int
+
+    @param valid: A mask of the rows to format, such as the one
+    returned by L{parse_many}; the other rows become C{None}.
+    @type valid: L{numpy.ndarray} or sequence of bool
+
+    @return: The formatted addresses
+    @rtype: list of str
+
+    @raise ValueError: If a value is out of range for the family.
+    """
+    if family not in (4, 6):
+        raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+
+    dtype = getattr(values, 'dtype', None)
+    if family == 4 and dtype is not None and dtype.kind in 'iu':
+        if len(values) and (values.min() < 0 or values.max() > 0xffffffff):
+            raise ValueError('IPv4 addresses must be between 0 and 2**32 - 1')
+        columns = values.astype('>u4').view(numpy.uint8).reshape(-1, 4).T.tolist()
+        decimal = _decimal.__getitem__
+        result = ['.'.join(octets) for octets in zip(*[map(decimal, column) for column in columns])]
+    elif family == 4:
+        result = [format_ipv4(value) for value in values]
+    elif dtype is not None and dtype.names == ('hi', 'lo'):
+        result = [format_ipv6((hi << 64) | lo) for hi, lo in zip(values['hi'].tolist(), values['lo'].tolist())]
+    else:
+        result = [format_ipv6(value) for value in values]
+
+    if valid is not None:
+        if hasattr(valid, 'tolist'):
+            valid = valid.tolist()
+        result = [text if ok else None for text, ok in zip(result, valid)]
+    return result
@@ -0,0 +1,100 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Inputs for the benchmarks: the test vectors and synthetic corpora.
+
+Every generator takes a seeded L{random.Random} so that the same
+corpus is produced on every run and results can be compared across
+releases.
+"""
+
+from ipyparse.test import test_ipv4
+from ipyparse.test import test_ipv6
+
+def _cycle(items, size):
+    """
+    Repeat a list of items until it has C{size} entries.
+    """
+    return [items[i % len(items)] for i in range(size)]
+
+def octet_vectors(rng, size):
+    octets = [str(n) for n in range(256)] + ['0' + str(n) for n in range(1, 256)] + ['00', '000', '256', '001']
+    return [rng.choice(octets) for i in range(size)]
+
+def ipv4_vectors(rng, size):
+    return _cycle([address for counter, address, expected in test_ipv4.good] +
+                  [address for counter, address in test_ipv4.bad], size)
+
+def ipv6_vectors(rng, size):
+    return _cycle([address for counter, address, expected in test_ipv6.good] +
+                  [address for counter, address in test_ipv6.bad], size)
+
+def random_ipv4(rng, size):
+    return ['{}.{}.{}.{}'.format(*[rng.randrange(256) for j in range(4)]) for i in range(size)]
+
+def uncompressed_ipv6(rng, size):
+    return [':'.join('{:04x}'.format(rng.randrange(65536)) for j in range(8)) for i in range(size)]
+
+def compressed_ipv6(rng, size):
+    result = []
+    for i in range(size):
+        groups = ['{:x}'.format(rng.randrange(65536)) for j in range(8)]
+        # replace a run of groups with the double colon
+        start = rng.randrange(8)
+        end = rng.randrange(start + 1, 9)
+        if start == 0 and end == 8:
+            end = 7
+        result.append(':'.join(groups[:start]) + '::' + ':'.join(groups[end:]))
+    return result
+
+def mapped_ipv6(rng, size):
+    return ['::ffff:{}.{}.{}.{}'.format(*[rng.randrange(256) for j in range(4)]) for i in range(size)]
+
+def invalid_ipv4(rng, size):
+    templates = ['{}.{}.{}', '{}.{}.{}.{}.{}', '{}.{}.{}.{}x', '{}..{}.{}', '{}.{}.{}.256', 'x{}.{}.{}.{}']
+    return [rng.choice(templates).format(*[rng.randrange(256) for j in range(5)]) for i in range(size)]
+
+def invalid_ipv6(rng, size):
+    result = []
+    for address in compressed_ipv6(rng, size):
+        damage = rng.randrange(4)
+        if damage == 0:
+            address = address + '::1'
+        elif damage == 1:
+            address = address.replace('::', ':::')
+        elif damage == 2:
+            address = address + 'g'
+        else:
+            address = address.replace('::', ':12345:')
+        result.append(address)
+    return result
+
+corpora = {'octet-vectors': octet_vectors,
+           'ipv4-vectors': ipv4_vectors,
+           'ipv6-vectors': ipv6_vectors,
+           'random-ipv4': random_ipv4,
+           'uncompressed-ipv6': uncompressed_ipv6,
+           'compressed-ipv6': compressed_ipv6,
+           'mapped-ipv6': mapped_ipv6,
+           'invalid-ipv4': invalid_ipv4,
+           'invalid-ipv6': invalid_ipv6}
+"""
+The corpus generators by name.
+"""
@@ -0,0 +1,273 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the throughput, latency and memory use of each entry point.
+
+Every entry point is run over the test vectors and the synthetic
+corpora in L{ipyparse.benchmark.corpus} that fit it.  The results can
+be saved as JSON and compared with an earlier run to catch
+regressions.
+
+Run with C{python -m ipyparse.benchmark.suite}.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from ipyparse.benchmark.corpus import corpora
+
+_ipv4_corpora = ['ipv4-vectors', 'random-ipv4', 'invalid-ipv4']
+_ipv6_corpora = ['ipv6-vectors', 'uncompressed-ipv6', 'compressed-ipv6', 'mapped-ipv6', 'invalid-ipv6']
+
+def _grammar(module, name):
+    def factory():
+        import importlib
+        from pyparsing import StringEnd
+        from pyparsing import StringStart
+        # anchored like the *_WholeString elements, so that an element
+        # such as Octet does not accept an invalid vector such as '256'
+        # by matching a prefix of it
+        element = getattr(importlib.import_module(module), name)
+        element = StringStart() + element + StringEnd()
+        element.leaveWhitespace()
+        return element.parseString
+    return factory
+
+def _compiled(name):
+    def factory():
+        from ipyparse.compiler import compiled_grammar
+        return compiled_grammar(name).parse
+    return factory
+
+def _function(module, name):
+    def factory():
+        import importlib
+        return getattr(importlib.import_module(module), name)
+    return factory
+
+def _parse_many(family):
+    def factory():
+        from ipyparse.batch import parse_many
+        return lambda items: parse_many(items, family = family)
+    return factory
+
+entry_points = [('Octet', _grammar('ipyparse.ipv4', 'Octet'), ['octet-vectors'], 0.01, None),
+                ('IPv4', _grammar('ipyparse.ipv4', 'IPv4'), _ipv4_corpora, 0.01, None),
+                ('IPv6_WholeString', _grammar('ipyparse.ipv6', 'IPv6_WholeString'), _ipv6_corpora, 0.01, None),
+                ('compiled_IPv4', _compiled('IPv4_WholeString'), _ipv4_corpora, 0.2, None),
+                ('compiled_IPv6', _compiled('IPv6_WholeString'), _ipv6_corpora, 0.2, None),
+                ('parse_ipv4', _function('ipyparse.ipv4', 'parse_ipv4'), _ipv4_corpora, 1, None),
+                ('parse_ipv6', _function('ipyparse.ipv6', 'parse_ipv6'), _ipv6_corpora, 1, None),
+                ('parse_many_ipv4', _parse_many(4), _ipv4_corpora, 1, 1024),
+                ('parse_many_ipv6', _parse_many(6), _ipv6_corpora, 1, 1024)]
+"""
+The name, a function returning the callable to measure, the corpora
+to run it over, the fraction of the corpus size to use (the grammars
+are much slower than the fast paths) and the batch size, or C{None}
+if the callable takes one address at a time.
+"""
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def measure(function, items, batch = None):
+    """
+    Measure one callable over a corpus.
+
+    The corpus is run three times: once untimed per call for the
+    throughput, once timing each call for the latency percentiles,
+    and once under L{tracemalloc} for the peak memory, so that
+    neither the timer nor the tracing distorts the throughput.
+
+    @param function: The callable, which may raise on invalid input.
+    @type function: callable
+
+    @param items: The corpus
+    @type items: list of str
+
+    @param batch: If not C{None}, the callable takes a list of this
+    many items at a time and each latency is that of a whole batch.
+    @type batch: int
+
+    @return: The number of items, the items parsed per second, the
+    latency percentiles in nanoseconds and the peak memory in bytes.
+    @rtype: dict
+    """
+    if batch is None:
+        calls = items
+    else:
+        calls = [items[i:i + batch] for i in range(0, len(items), batch)]
+
+    def run():
+        for call in calls:
+            try:
+                function(call)
+            except Exception:
+                # invalid input is part of the corpus
+                pass
+
+    # warm up lazily built grammars and caches
+    for call in calls[:10]:
+        try:
+            function(call)
+        except Exception:
+            pass
+
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    latencies = []
+    clock = time.perf_counter_ns
+    for call in calls:
+        before = clock()
+        try:
+            function(call)
+        except Exception:
+            pass
+        latencies.append(clock() - before)
+    latencies.sort()
+
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'count': len(items),
+            'batch': batch,
+            'ops_per_sec': len(items) / elapsed if elapsed > 0 else 0.0,
+            'latency_ns': {'p50': _percentile(latencies, 0.50),
+                           'p90': _percentile(latencies, 0.90),
+                           'p99': _percentile(latencies, 0.99),
+                           'max': latencies[-1]},
+            'peak_bytes': peak}
+
+def run_suite(size = 100000, seed = 0, entries = None):
+    """
+    Run every entry point over each of its corpora.
+
+    Entry points that need numpy are skipped if it is not installed.
+
+    @param size: The number of items in each corpus.
+    @type size: int
+
+    @param seed: The seed for the synthetic corpora.
+    @type seed: int
+
+    @param entries: The names of the entry points to run, by default
+    all of them.
+    @type entries: list of str
+
+    @return: A description of the platform and the results of each
+    run, ready to be saved as JSON.
+    @rtype: dict
+    """
+    results = []
+    for name, factory, names, scale, batch in entry_points:
+        if entries is not None and name not in entries:
+            continue
+        try:
+            function = factory()
+        except ImportError:
+            continue
+        for corpus in names:
+            items = corpora[corpus](random.Random(seed), max(1, int(size * scale)))
+            result = measure(function, items, batch)
+            result['entry'] = name
+            result['corpus'] = corpus
+            results.append(result)
+
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'size': size,
+            'seed': seed,
+            'results': results}
+
+def compare(baseline, current, tolerance = 0.1):
+    """
+    Find the runs that got slower between two sets of results.
+
+    @param baseline: The earlier results from L{run_suite}.
+    @type baseline: dict
+
+    @param current: The later results from L{run_suite}.
+    @type current: dict
+
+    @param tolerance: How much throughput may drop, as a fraction,
+    before it counts as a regression.
+    @type tolerance: float
+
+    @return: The entry point, corpus and the earlier and later
+    throughput of each regression.
+    @rtype: list of tuple of (str, str, float, float)
+    """
+    before = dict(((result['entry'], result['corpus']), result['ops_per_sec'])
+                  for result in baseline['results'])
+    regressions = []
+    for result in current['results']:
+        key = (result['entry'], result['corpus'])
+        if key in before and result['ops_per_sec'] < before[key] * (1 - tolerance):
+            regressions.append(key + (before[key], result['ops_per_sec']))
+    return regressions
+
+def main(argv = None):
+    options = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    options.add_argument('--size', type = int, default = 100000)
+    options.add_argument('--seed', type = int, default = 0)
+    options.add_argument('--entry', nargs = '+', default = None)
+    options.add_argument('--output', help = 'save the results as JSON')
+    options.add_argument('--compare', help = 'JSON results of an earlier run')
+    options.add_argument('--tolerance', type = float, default = 0.1)
+    options = options.parse_args(argv)
+
+    results = run_suite(options.size, options.seed, options.entry)
+    for result in results['results']:
+        print('{:18s} {:18s} {:12.0f} ops/s  p50 {:8d} ns  p99 {:8d} ns  peak {:8d} KiB'.format(result['entry'],
+                                                                                               result['corpus'],
+                                                                                               result['ops_per_sec'],
+                                                                                               result['latency_ns']['p50'],
+                                                                                               result['latency_ns']['p99'],
+                                                                                               result['peak_bytes'] // 1024))
+
+    if options.output:
+        with open(options.output, 'w') as fileobj:
+            json.dump(results, fileobj, indent = 2, sort_keys = True)
+
+    if options.compare:
+        with open(options.compare) as fileobj:
+            baseline = json.load(fileobj)
+        regressions = compare(baseline, results, options.tolerance)
+        for entry, corpus, before, after in regressions:
+            print('regression: {} {} {:.0f} -> {:.0f} ops/s'.format(entry, corpus, before, after))
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
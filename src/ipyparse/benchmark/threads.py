@@ -0,0 +1,115 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Stress a shared L{ipyparse.parser.Parser} from many threads.
+
+Every thread parses the same IPv4 and IPv6 test vectors and checks
+each result, so any corruption of shared state shows up as a
+mismatch.  Throughput is reported for each thread count; it stays
+flat rather than dropping as threads are added because parsing takes
+no locks (Python threads still share one interpreter lock).
+
+Run with C{python -m ipyparse.benchmark.threads}.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ipyparse.parser import Parser
+from ipyparse.test import test_ipv4
+from ipyparse.test import test_ipv6
+
+def all_vectors():
+    """
+    @return: The function name, address and expected value (None if
+    invalid) of every test vector.
+    @rtype: list of tuple
+    """
+    vectors = []
+    for counter, address, expected in test_ipv4.good:
+        vectors.append(('parse_ipv4', address, expected))
+    for counter, address in test_ipv4.bad:
+        vectors.append(('parse_ipv4', address, None))
+    for counter, address, expected in test_ipv6.good:
+        vectors.append(('parse_ipv6', address, expected))
+    for counter, address in test_ipv6.bad:
+        vectors.append(('parse_ipv6', address, None))
+    return vectors
+
+def _work(parser, vectors, rounds):
+    """
+    Parse every vector C{rounds} times.
+
+    @return: How many results did not match.
+    @rtype: int
+    """
+    mismatches = 0
+    for i in range(rounds):
+        for method, address, expected in vectors:
+            try:
+                result = getattr(parser, method)(address)
+            except ValueError:
+                result = None
+            if result != expected:
+                mismatches += 1
+    return mismatches
+
+def stress(threads, rounds = 5, parser = None, vectors = None):
+    """
+    Run the vectors from a number of threads sharing one parser.
+
+    @param vectors: The vectors to run, by default all of them.
+
+    @return: The number of parses, the elapsed time in seconds and
+    the number of mismatches.
+    @rtype: tuple of (int, float, int)
+    """
+    if parser is None:
+        parser = Parser()
+    if vectors is None:
+        vectors = all_vectors()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = threads) as executor:
+        futures = [executor.submit(_work, parser, vectors, rounds) for i in range(threads)]
+        mismatches = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+    return threads * rounds * len(vectors), elapsed, mismatches
+
+def main(argv = None):
+    options = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    options.add_argument('--threads', type = int, nargs = '+', default = [1, 2, 4, 8, 16, 32])
+    options.add_argument('--rounds', type = int, default = 5)
+    options = options.parse_args(argv)
+
+    parser = Parser()
+    failed = False
+    for threads in options.threads:
+        parses, elapsed, mismatches = stress(threads, options.rounds, parser)
+        print('{:3d} threads: {:8d} parses {:10.0f} parses/s {} mismatches'.format(threads,
+                                                                                   parses,
+                                                                                   parses / elapsed,
+                                                                                   mismatches))
+        failed = failed or mismatches > 0
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
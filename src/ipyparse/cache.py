@@ -0,0 +1,135 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import threading
+
+class _Invalid(object):
+    """
+    A cached rejection, holding the message to raise again.
+    """
+    __slots__ = ['message']
+
+    def __init__(self, message):
+        self.message = message
+
+class ParseCache(object):
+    """
+    A bounded, least recently used cache in front of a parse function.
+
+    Both results and rejections are cached, so repeated invalid input
+    raises C{ValueError} again without being parsed.  A cache can be
+    shared between threads; parsing itself happens outside the lock.
+
+    >>> parse = ParseCache(parse_ipv6, maxsize = 4096)
+    >>> parse('::1')
+    IPv6Address('::1')
+
+    @ivar parse: The function being cached.
+    @ivar maxsize: The most entries kept before the least recently
+    used one is evicted.
+    @ivar hits: How many calls were answered from the cache.
+    @ivar misses: How many calls had to be parsed.
+    @ivar evictions: How many entries were evicted.
+    """
+
+    def __init__(self, parse, maxsize = 1024):
+        """
+        @param parse: A function that converts a string or raises
+        C{ValueError}, such as L{ipyparse.ipv6.parse_ipv6}.
+        @type parse: callable
+
+        @param maxsize: The most entries to keep.
+        @type maxsize: int
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1, not {!r}'.format(maxsize))
+        self.parse = parse
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, s):
+        """
+        Parse a string, using the cached result if there is one.
+
+        @param s: The address
+        @type s: str
+
+        @return: Whatever the cached function returns.
+
+        @raise ValueError: If C{s} is not a valid address.
+        """
+        with self._lock:
+            try:
+                result = self._entries[s]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(s)
+                if result.__class__ is _Invalid:
+                    raise ValueError(result.message)
+                return result
+
+        try:
+            result = self.parse(s)
+        except ValueError as e:
+            self._store(s, _Invalid(str(e)))
+            raise
+        self._store(s, result)
+        return result
+
+    def _store(self, s, result):
+        """
+        Add an entry, evicting the least recently used ones if the
+        cache is full.
+        """
+        with self._lock:
+            self._entries[s] = result
+            self._entries.move_to_end(s)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        @return: The counters and the current size of the cache.
+        @rtype: dict
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': len(self._entries),
+                    'maxsize': self.maxsize}
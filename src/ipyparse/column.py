@@ -0,0 +1,393 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+A binary file format for parsed address columns, read back by
+memory-mapping it.
+
+The file is a 64-byte header followed by three columns, each starting
+on a 16-byte boundary::
+
+  header    magic, version, value width, flags, row count and the
+            offset of each column, little-endian
+  families  one byte per row, 4 or 6
+  values    one packed address per row in network order: 4 bytes if
+            every row is IPv4, otherwise 16 bytes, with IPv4 rows
+            stored as their 32-bit value
+  index     optional; the row numbers as little-endian 64-bit
+            integers, ordered by family and then by address
+
+Opening a file maps it and makes numpy views of the columns, so
+nothing is parsed or copied until it is read.
+"""
+
+import mmap
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import _ipv4_value
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import _ipv6_value
+
+_new = int.__new__
+
+MAGIC = b'IPYPARSE'
+
+VERSION = 1
+
+INDEXED = 0x01
+"""
+The header flag set when the file has a sorted index.
+"""
+
+_header = struct.Struct('<8sHBBIQQQQ')
+_header_size = 64
+_alignment = 16
+
+def _align(offset):
+    return (offset + _alignment - 1) // _alignment * _alignment
+
+def _columns(addresses, family):
+    """
+    Convert addresses to the family and value columns.
+
+    @return: The families, the values and the width of a value.
+    @rtype: tuple of (L{numpy.ndarray}, L{numpy.ndarray}, int)
+    """
+    from ipyparse.array import AddressArray
+    from ipyparse.batch import IPV6_DTYPE
+
+    if isinstance(addresses, AddressArray):
+        addresses, family = addresses.values, addresses.family
+
+    if isinstance(addresses, numpy.ndarray):
+        if family not in (4, 6):
+            raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+        families = numpy.full(len(addresses), family, dtype = numpy.uint8)
+        if addresses.dtype.names is not None:
+            if family != 6:
+                raise ValueError('IPv6 records can not be written as IPv4 addresses')
+            return families, addresses.astype(IPV6_DTYPE), 16
+        if addresses.dtype.kind not in 'iu':
+            raise ValueError('addresses must be integers, not {}'.format(addresses.dtype))
+        # astype would silently wrap values that do not fit
+        if len(addresses) and addresses.min() < 0:
+            raise ValueError('IPv{} addresses can not be negative'.format(family))
+        if family == 4:
+            if len(addresses) and addresses.max() > 0xffffffff:
+                raise ValueError('IPv4 addresses must be between 0 and 2**32 - 1')
+            return families, addresses.astype('>u4'), 4
+        records = numpy.zeros(len(addresses), dtype = IPV6_DTYPE)
+        records['lo'] = addresses
+        return families, records, 16
+
+    families = []
+    values = []
+    for address in addresses:
+        if isinstance(address, IPv4Address):
+            families.append(4)
+        elif isinstance(address, IPv6Address):
+            families.append(6)
+        elif family in (4, 6):
+            families.append(family)
+        else:
+            raise ValueError('the family of {!r} is not known'.format(address))
+        if not 0 <= address < (1 << (32 if families[-1] == 4 else 128)):
+            raise ValueError('{!r} is not a valid IPv{} address'.format(address, families[-1]))
+        values.append(int(address))
+
+    families = numpy.array(families, dtype = numpy.uint8)
+    if not (families == 6).any():
+        return families, numpy.array(values, dtype = '>u4'), 4
+    records = numpy.zeros(len(values), dtype = IPV6_DTYPE)
+    records['hi'] = [value >> 64 for value in values]
+    records['lo'] = [value & 0xffffffffffffffff for value in values]
+    return families, records, 16
+
+def write_column(path, addresses, family = None, index = True):
+    """
+    Write parsed addresses to a column file.
+
+    >>> write_column('hosts.ipc', AddressArray.parse(lines))
+    >>> with ColumnFile('hosts.ipc') as column:
+    ...     rows = column.rows('10.0.0.0', '10.255.255.255')
+
+    @param addresses: The addresses, either as an
+    L{ipyparse.array.AddressArray}, an array as returned by
+    L{ipyparse.batch.parse_many}, or any iterable of
+    L{ipyparse.ipv4.IPv4Address} and L{ipyparse.ipv6.IPv6Address},
+    which may mix the two families.
+    @type addresses: L{ipyparse.array.AddressArray}, L{numpy.ndarray}
+    or iterable of int
+
+    @param family: The family of addresses that are plain integers or
+    a plain array.
+    @type family: int
+
+    @param index: Whether to write the sorted index that
+    L{ColumnFile.rows} and L{ColumnFile.scan} need.
+    @type index: bool
+
+    @raise ValueError: If the family of an address is not known, or
+    an address is out of range for its family.
+    """
+    if numpy is None:
+        raise ImportError('write_column requires numpy')
+
+    families, values, width = _columns(addresses, family)
+    count = len(families)
+
+    families_offset = _header_size
+    values_offset = _align(families_offset + count)
+    index_offset = _align(values_offset + count * width) if index else 0
+
+    flags = 0
+    if index:
+        flags |= INDEXED
+        if width == 4:
+            keys = (values.astype(numpy.uint32), families)
+        else:
+            keys = (values['lo'].astype(numpy.uint64), values['hi'].astype(numpy.uint64), families)
+        order = numpy.lexsort(keys).astype('<u8')
+
+    with open(path, 'wb') as output:
+        header = _header.pack(MAGIC, VERSION, width, flags, 0, count,
+                              families_offset, values_offset, index_offset)
+        output.write(header.ljust(_header_size, b'\0'))
+        output.write(families.tobytes())
+        output.write(b'\0' * (values_offset - families_offset - count))
+        output.write(values.tobytes())
+        if index:
+            output.write(b'\0' * (index_offset - values_offset - count * width))
+            output.write(order.tobytes())
+
+class ColumnFile(object):
+    """
+    A column file written by L{write_column}, memory-mapped for
+    reading.
+
+    Rows are read one at a time by index or all at once as numpy
+    views of the mapping.  If the file has a sorted index, the rows
+    whose addresses fall in a range are found with a binary search
+    through the index, touching only the pages it reads.
+
+    @ivar width: The width of each value in bytes, 4 or 16.
+    @ivar families: The family of each row.
+    @type families: L{numpy.ndarray} of C{uint8}
+    @ivar values: The packed value of each row, as big-endian
+    C{uint32} or as L{ipyparse.batch.IPV6_DTYPE} records.
+    @type values: L{numpy.ndarray}
+    @ivar index: The row numbers in order of family and address, or
+    C{None} if the file has no index.
+    @type index: L{numpy.ndarray}
+    """
+
+    def __init__(self, path):
+        """
+        @param path: The file to open
+        @type path: str
+
+        @raise ValueError: If the file is not a column file.
+        """
+        if numpy is None:
+            raise ImportError('ColumnFile requires numpy')
+
+        from ipyparse.batch import IPV6_DTYPE
+
+        with open(path, 'rb') as input:
+            self._map = mmap.mmap(input.fileno(), 0, access = mmap.ACCESS_READ)
+
+        try:
+            if len(self._map) < _header_size:
+                raise ValueError('{!r} is not an address column file'.format(path))
+            (magic, version, width, flags, reserved, count,
+             families_offset, values_offset, index_offset) = _header.unpack_from(self._map)
+            if magic != MAGIC or width not in (4, 16):
+                raise ValueError('{!r} is not an address column file'.format(path))
+            if version != VERSION:
+                raise ValueError('{!r} has unsupported version {!r}'.format(path, version))
+            end = index_offset + count * 8 if flags & INDEXED else values_offset + count * width
+            if end > len(self._map):
+                raise ValueError('{!r} is truncated'.format(path))
+
+            self.width = width
+            self.families = numpy.frombuffer(self._map, numpy.uint8, count, families_offset)
+            self.values = numpy.frombuffer(self._map, '>u4' if width == 4 else IPV6_DTYPE, count, values_offset)
+            self.index = None
+            if flags & INDEXED:
+                self.index = numpy.frombuffer(self._map, '<u8', count, index_offset)
+        except Exception:
+            self._map.close()
+            raise
+
+    def close(self):
+        """
+        Release the mapping.  The arrays of this file must not be used
+        afterwards.
+        """
+        self.families = self.values = self.index = None
+        try:
+            self._map.close()
+        except BufferError:
+            # a view is still in use elsewhere; the mapping is closed
+            # when the last one is released
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.families)
+
+    def __repr__(self):
+        return '{}(len = {}, width = {}, indexed = {})'.format(self.__class__.__name__, len(self),
+                                                               self.width, self.index is not None)
+
+    def _value(self, row):
+        if self.width == 4:
+            return int(self.values[row])
+        hi, lo = self.values[row].tolist()
+        return (hi << 64) | lo
+
+    def _address(self, row):
+        value = self._value(row)
+        return _new(IPv4Address if self.families[row] == 4 else IPv6Address, value)
+
+    def __getitem__(self, row):
+        """
+        @rtype: L{ipyparse.ipv4.IPv4Address} or
+        L{ipyparse.ipv6.IPv6Address}
+        """
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('column index out of range')
+        return self._address(row)
+
+    def __iter__(self):
+        if self.width == 4:
+            for value in self.values.tolist():
+                yield _new(IPv4Address, value)
+        else:
+            for family, (hi, lo) in zip(self.families.tolist(), self.values.tolist()):
+                yield _new(IPv4Address if family == 4 else IPv6Address, (hi << 64) | lo)
+
+    def array(self, family = 4):
+        """
+        @return: The addresses of one family, in file order.  If every
+        row is IPv6, the array is a view of the mapping.
+        @rtype: L{ipyparse.array.AddressArray}
+        """
+        from ipyparse.array import AddressArray
+        from ipyparse.batch import IPV4_DTYPE
+
+        mask = self.families == family
+        values = self.values if mask.all() else self.values[mask]
+        if family == 4:
+            if self.width == 16:
+                values = values['lo']
+            values = values.astype(IPV4_DTYPE)
+        elif self.width == 4:
+            values = []
+        return AddressArray(values, family)
+
+    def _bound(self, family, value, upper):
+        """
+        Binary search of the index.
+
+        @return: The position in the index of the first row ordered
+        after C{(family, value)} if C{upper} is true, otherwise of the
+        first row not ordered before it.
+        """
+        index = self.index
+        families = self.families
+        lo, hi = 0, len(index)
+        key = (family, value)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            row = int(index[middle])
+            other = (int(families[row]), self._value(row))
+            if other < key or (upper and other == key):
+                lo = middle + 1
+            else:
+                hi = middle
+        return lo
+
+    def rows(self, first, last, family = None):
+        """
+        Find the rows whose addresses are between C{first} and
+        C{last}, inclusive.
+
+        @param first: The first address of the range, as an integer
+        or a string.
+        @type first: int or str
+
+        @param last: The last address of the range.
+        @type last: int or str
+
+        @param family: The family of the range, needed only if C{first}
+        is a plain integer.
+        @type family: int
+
+        @return: The row numbers, in order of address; a view of the
+        index.
+        @rtype: L{numpy.ndarray}
+
+        @raise ValueError: If the file has no index.
+        """
+        if self.index is None:
+            raise ValueError('the column file has no index')
+        if family is None:
+            if isinstance(first, IPv4Address) or isinstance(first, str) and ':' not in first:
+                family = 4
+            elif isinstance(first, (IPv6Address, str)):
+                family = 6
+            else:
+                raise ValueError('the family of {!r} is not known'.format(first))
+        bounds = []
+        for address in (first, last):
+            if isinstance(address, str):
+                value = (_ipv4_value if family == 4 else _ipv6_value)(address)
+                if value is None:
+                    raise ValueError('{!r} is not a valid IPv{} address'.format(address, family))
+                address = value
+            bounds.append(int(address))
+        start = self._bound(family, bounds[0], False)
+        end = self._bound(family, bounds[1], True)
+        return self.index[start:max(start, end)]
+
+    def scan(self, first, last, family = None):
+        """
+        Iterate over the addresses between C{first} and C{last}
+        inclusive, in order, with L{rows}.
+
+        @return: The row number and address of each row in the range.
+        @rtype: iterable of tuple of (int, L{ipyparse.ipv4.IPv4Address}
+        or L{ipyparse.ipv6.IPv6Address})
+        """
+        for row in self.rows(first, last, family).tolist():
+            yield row, self._address(row)
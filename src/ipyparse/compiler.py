@@ -0,0 +1,360 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compile the pyparsing grammars to regular expressions.
+
+The grammars in L{ipyparse.ipv4} and L{ipyparse.ipv6} remain the
+definition of what is accepted.  L{compile_grammar} walks an element
+tree once and writes an equivalent regular expression with a capture
+group at every point where the tokens depend on what matched: each
+alternative, each optional part and each word.  After a match only
+the branches that took part are walked again, rebuilding the tokens
+pyparsing would have produced and running the elements' own parse
+actions on them, so the existing conversion functions produce the
+result.
+
+Python's C{re} module backtracks rather than running a DFA, but
+pyparsing never backtracks into a word, an optional part or a
+repetition once it has matched, so those are compiled to atomic
+groups and matching these short, bounded grammars stays linear.
+"""
+
+import importlib
+import re
+import threading
+
+def _chars(chars):
+    return '[' + ''.join(re.escape(c) for c in sorted(set(chars))) + ']'
+
+class _Node(object):
+    """
+    One element of the grammar, as compiled.
+
+    @ivar kind: How the tokens of the element are rebuilt.
+    @ivar element: The pyparsing element, or C{None} for the nodes
+    that only record which alternative or copy matched.
+    @ivar group: The capture group of the element, or C{None}.
+    @ivar children: The nodes of the element's children.
+    """
+    __slots__ = ['kind', 'element', 'group', 'children']
+
+    def __init__(self, kind, element, group = None, children = ()):
+        self.kind = kind
+        self.element = element
+        self.group = group
+        self.children = children
+
+class _Compiler(object):
+    """
+    One compilation, which numbers the capture groups as they are
+    written.
+
+    pyparsing's C{Or} keeps the longest alternative, which a regular
+    expression can only find by backtracking into the alternation, so
+    an optional part containing one is written as a plain greedy
+    optional rather than an atomic group.  For these grammars the
+    alternatives that can end at the same place as the longest one
+    convert to the same value.
+    """
+
+    def __init__(self):
+        self.groups = 0
+        self.choices = 0
+
+    def group(self):
+        self.groups += 1
+        return self.groups
+
+    def optional(self, regex, choices):
+        """
+        @param choices: The number of alternations written before
+        C{regex}, to tell whether it contains any.
+        """
+        if self.choices > choices:
+            return '({})?'.format(regex)
+        return '(?>({})?)'.format(regex)
+
+    def compile(self, element):
+        """
+        @return: The regular expression for an element and its node.
+        @rtype: tuple of (str, L{_Node})
+        """
+        from pyparsing import And
+        from pyparsing import Combine
+        from pyparsing import Group
+        from pyparsing import Literal
+        from pyparsing import MatchFirst
+        from pyparsing import OneOrMore
+        from pyparsing import Optional
+        from pyparsing import Or
+        from pyparsing import StringEnd
+        from pyparsing import StringStart
+        from pyparsing import Suppress
+        from pyparsing import Word
+        from pyparsing import ZeroOrMore
+
+        if isinstance(element, Literal):
+            return re.escape(element.match), _Node('literal', element)
+
+        if isinstance(element, Word):
+            init = element.initCharsOrig
+            body = element.bodyCharsOrig or init
+            if element.maxLen >= 1 << 31:
+                repeat = '{{{},}}'.format(element.minLen - 1)
+            else:
+                repeat = '{{{},{}}}'.format(element.minLen - 1, element.maxLen - 1)
+            return '((?>{}{}{}))'.format(_chars(init), _chars(body), repeat), _Node('word', element, self.group())
+
+        if isinstance(element, StringStart):
+            return r'\A', _Node('empty', element)
+
+        if isinstance(element, StringEnd):
+            return r'\Z', _Node('empty', element)
+
+        if isinstance(element, (Or, MatchFirst)):
+            self.choices += 1
+            regexes = []
+            children = []
+            for alternative in element.exprs:
+                group = self.group()
+                regex, child = self.compile(alternative)
+                regexes.append('({})'.format(regex))
+                children.append(_Node('alternative', None, group, [child]))
+            regex = '|'.join(regexes)
+            if isinstance(element, MatchFirst):
+                # pyparsing keeps the first alternative that matches
+                regex = '(?>{})'.format(regex)
+            else:
+                regex = '(?:{})'.format(regex)
+            return regex, _Node('choice', element, None, children)
+
+        if isinstance(element, And):
+            regexes = []
+            children = []
+            for expr in element.exprs:
+                regex, child = self.compile(expr)
+                regexes.append(regex)
+                children.append(child)
+            return ''.join(regexes), _Node('sequence', element, None, children)
+
+        if isinstance(element, Optional):
+            group = self.group()
+            choices = self.choices
+            regex, child = self.compile(element.expr)
+            return self.optional(regex, choices), _Node('optional', element, group, [child])
+
+        if isinstance(element, (OneOrMore, ZeroOrMore)):
+            minimum = 1 if isinstance(element, OneOrMore) else 0
+            maximum = getattr(element, 'max_count', None)
+            if maximum is None:
+                # an unbounded repetition is only compiled for a
+                # literal, whose count follows from the length matched
+                if not isinstance(element.expr, Literal):
+                    raise ValueError('can not compile an unbounded repetition of {!r}'.format(element.expr))
+                regex = '((?>(?:{}){}))'.format(re.escape(element.expr.match), '+' if minimum else '*')
+                return regex, _Node('repeat', element, self.group(), [_Node('literal', element.expr)])
+
+            # a bounded repetition is unrolled so that every copy has
+            # its own groups, and the optional copies are nested so
+            # that each can only match after the one before it
+            copies = []
+            children = []
+            choices = self.choices
+            for index in range(maximum):
+                group = self.group() if index >= minimum else None
+                regex, child = self.compile(element.expr)
+                copies.append((group, regex))
+                children.append(child if group is None else _Node('optional', None, group, [child]))
+            regex = ''
+            for group, copy in reversed(copies):
+                if group is None:
+                    regex = copy + regex
+                else:
+                    regex = self.optional(copy + regex, choices)
+            return regex, _Node('repeated', element, None, children)
+
+        for cls, kind in ((Combine, 'combine'), (Group, 'group'), (Suppress, 'suppress')):
+            if isinstance(element, cls):
+                regex, child = self.compile(element.expr)
+                return regex, _Node(kind, element, None, [child])
+
+        raise TypeError('can not compile {} elements'.format(type(element).__name__))
+
+class CompiledGrammar(object):
+    """
+    A grammar element compiled to a regular expression.
+
+    >>> from ipyparse import ipv6
+    >>> compiled = compile_grammar(ipv6.IPv6_WholeString)
+    >>> compiled.parse('2001:db8::1')
+    [IPv6Address('2001:db8::1')]
+
+    @ivar element: The pyparsing element.
+    @ivar pattern: The compiled regular expression.
+    """
+
+    def __init__(self, element):
+        """
+        @param element: The element to compile.
+        @type element: L{pyparsing.ParserElement}
+
+        @raise TypeError: If the element uses a kind of element that
+        can not be compiled.
+        @raise ValueError: If the element repeats anything but a
+        literal without a limit.
+        """
+        self.element = element
+        regex, self._root = _Compiler().compile(element)
+        self.pattern = re.compile(regex)
+
+    def _tokens(self, node, match, s, position):
+        """
+        Rebuild the tokens of one node of a successful match.
+
+        @return: The tokens and the position after them.
+        @rtype: tuple of (list, int)
+        """
+        kind = node.kind
+        if kind == 'literal':
+            tokens = [node.element.match]
+            end = position + len(node.element.match)
+        elif kind == 'word':
+            end = match.end(node.group)
+            tokens = [s[position:end]]
+        elif kind == 'empty':
+            tokens = []
+            end = position
+        elif kind == 'repeat':
+            end = match.end(node.group)
+            literal = node.children[0].element.match
+            tokens = [literal] * ((end - position) // len(literal))
+        elif kind == 'choice':
+            for child in node.children:
+                if match.start(child.group) == position:
+                    tokens, end = self._tokens(child, match, s, position)
+                    break
+            else:
+                raise AssertionError('no alternative of {} matched'.format(node.element))
+        elif kind == 'optional':
+            if match.start(node.group) == position:
+                tokens, end = self._tokens(node.children[0], match, s, position)
+            else:
+                tokens = []
+                end = position
+        elif kind in ('alternative', 'suppress', 'combine', 'group'):
+            tokens, end = self._tokens(node.children[0], match, s, position)
+            if kind == 'suppress':
+                tokens = []
+            elif kind == 'combine':
+                tokens = [''.join(str(token) for token in tokens)]
+            elif kind == 'group':
+                tokens = [tokens]
+        else:
+            tokens = []
+            end = position
+            for child in node.children:
+                child_tokens, end = self._tokens(child, match, s, end)
+                tokens.extend(child_tokens)
+
+        if node.element is None:
+            return tokens, end
+        for action in node.element.parseAction:
+            result = action(s, position, tokens)
+            if result is not None:
+                tokens = list(result) if isinstance(result, list) else [result]
+        return tokens, end
+
+    def parse(self, s):
+        """
+        Match the whole of a string, as with C{parseString(s, parseAll
+        = True)}.
+
+        @param s: The string
+        @type s: str
+
+        @return: The tokens, after the element's parse actions.
+        @rtype: list
+
+        @raise ValueError: If the string does not match the element
+        or one of its parse actions rejects it.
+        """
+        from pyparsing import ParseBaseException
+
+        match = self.pattern.fullmatch(s)
+        if match is not None:
+            try:
+                return self._tokens(self._root, match, s, 0)[0]
+            except ParseBaseException:
+                pass
+        raise ValueError('{!r} does not match {}'.format(s, self.element))
+
+    def matches(self, s):
+        """
+        @return: Whether the whole string matches, without running any
+        parse actions.
+        @rtype: bool
+        """
+        return self.pattern.fullmatch(s) is not None
+
+def compile_grammar(element):
+    """
+    Compile a pyparsing element to a regular expression.
+
+    @param element: The element, usually one of the grammars from
+    L{ipyparse.ipv4.build_grammar} or L{ipyparse.ipv6.build_grammar}.
+    @type element: L{pyparsing.ParserElement}
+
+    @rtype: L{CompiledGrammar}
+    """
+    return CompiledGrammar(element)
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+def compiled_grammar(name):
+    """
+    Compile one of the module level grammars the first time it is
+    asked for.
+
+    >>> compiled_grammar('IPv4').parse('192.168.1.1')
+    [IPv4Address('192.168.1.1')]
+
+    @param name: The name of an element of L{ipyparse.ipv4} or
+    L{ipyparse.ipv6}, such as C{'Octet'}, C{'IPv4'} or C{'IPv6'}.
+    @type name: str
+
+    @rtype: L{CompiledGrammar}
+
+    @raise KeyError: If there is no grammar by that name.
+    """
+    try:
+        return _compiled[name]
+    except KeyError:
+        pass
+    with _compiled_lock:
+        if name not in _compiled:
+            for module in ('ipyparse.ipv4', 'ipyparse.ipv6'):
+                module = importlib.import_module(module)
+                if name in module._grammar:
+                    _compiled[name] = CompiledGrammar(getattr(module, name))
+                    break
+            else:
+                raise KeyError(name)
+        return _compiled[name]
@@ -0,0 +1,213 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+One 128-bit key for an address of either family.
+
+IPv4 addresses appear in three forms: as 32-bit integers from
+L{ipyparse.ipv4.parse_ipv4}, as IPv4-mapped IPv6 addresses
+(C{::ffff:a.b.c.d}) and as the deprecated IPv4-compatible IPv6
+addresses (C{::a.b.c.d}).  The key of all three is the IPv4-mapped
+address, and the key of any other IPv6 address is the address itself,
+so a single column of 128-bit keys can be joined or hashed across
+IPv4 and dual-stack data.  C{::} and C{::1} are not treated as
+IPv4-compatible.
+
+>>> to_key(parse_ipv4('192.0.2.1')) == parse_key('::192.0.2.1') == parse_key('::ffff:192.0.2.1')
+True
+>>> from_key(parse_key('::ffff:192.0.2.1'))
+IPv4Address('192.0.2.1')
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import _ipv4_value
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import _ipv6_value
+
+_new = int.__new__
+
+MAPPED = 0xffff << 32
+"""
+The IPv4-mapped prefix, C{::ffff:0:0/96}, as an integer.
+"""
+
+def to_key(address, family = None):
+    """
+    Convert an address to its key.
+
+    @param address: The address
+    @type address: L{ipyparse.ipv4.IPv4Address},
+    L{ipyparse.ipv6.IPv6Address} or int
+
+    @param family: The family of a plain integer; by default the
+    family of an L{ipyparse.ipv4.IPv4Address} is 4 and of anything
+    else 6.
+    @type family: int
+
+    @rtype: L{ipyparse.ipv6.IPv6Address}
+    """
+    if family is None:
+        family = 4 if isinstance(address, IPv4Address) else 6
+    if family == 4:
+        if not 0 <= address <= 0xffffffff:
+            raise ValueError('{!r} is not a valid IPv4 address'.format(address))
+        return _new(IPv6Address, MAPPED | address)
+    if family != 6:
+        raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+    if not 0 <= address < (1 << 128):
+        raise ValueError('{!r} is not a valid IPv6 address'.format(address))
+    if 1 < address <= 0xffffffff:
+        return _new(IPv6Address, MAPPED | address)
+    return _new(IPv6Address, address)
+
+def parse_key(s):
+    """
+    Parse an address of either family to its key.
+
+    @param s: An IPv4 or IPv6 address
+    @type s: str
+
+    @rtype: L{ipyparse.ipv6.IPv6Address}
+
+    @raise ValueError: If C{s} is not a valid address.
+    """
+    if ':' in s:
+        value = _ipv6_value(s)
+        if value is None:
+            raise ValueError('{!r} is not a valid IPv6 address'.format(s))
+        if 1 < value <= 0xffffffff:
+            value |= MAPPED
+    else:
+        value = _ipv4_value(s)
+        if value is None:
+            raise ValueError('{!r} is not a valid IPv4 address'.format(s))
+        value |= MAPPED
+    return _new(IPv6Address, value)
+
+def from_key(key):
+    """
+    Recover the address from a key.
+
+    @param key: The key
+    @type key: int
+
+    @return: An L{ipyparse.ipv4.IPv4Address} for any key in
+    C{::ffff:0:0/96}, otherwise an L{ipyparse.ipv6.IPv6Address}.
+    """
+    if key >> 32 == 0xffff:
+        return _new(IPv4Address, key & 0xffffffff)
+    return _new(IPv6Address, key)
+
+def to_keys(values, family):
+    """
+    Convert the values of one family, as returned by
+    L{ipyparse.batch.parse_many}, to keys with whole-array operations.
+
+    @param values: The addresses
+    @type values: L{numpy.ndarray}
+
+    @param family: The address family, 4 or 6.
+    @type family: int
+
+    @return: The keys, as L{ipyparse.batch.IPV6_DTYPE} records.
+    @rtype: L{numpy.ndarray}
+
+    @raise ValueError: If an IPv4 value is out of range, as with
+    L{to_key}.
+    """
+    if numpy is None:
+        raise ImportError('to_keys requires numpy')
+
+    from ipyparse.batch import IPV6_DTYPE
+
+    keys = numpy.zeros(len(values), dtype = IPV6_DTYPE)
+    if family == 4:
+        values = numpy.asarray(values)
+        if len(values) and values.dtype.kind not in 'iu':
+            raise ValueError('IPv4 addresses must be integers, not {}'.format(values.dtype))
+        # check before the cast, which would wrap negative and wide values
+        if len(values) and (values.min() < 0 or values.max() > 0xffffffff):
+            raise ValueError('IPv4 addresses must be between 0 and 2**32 - 1')
+        keys['lo'] = values.astype(numpy.uint64) | numpy.uint64(MAPPED)
+    elif family == 6:
+        keys[...] = values
+        lo = keys['lo']
+        compatible = (keys['hi'] == 0) & (lo > 1) & (lo <= 0xffffffff)
+        keys['lo'] = numpy.where(compatible, lo | numpy.uint64(MAPPED), lo)
+    else:
+        raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+    return keys
+
+def parse_keys(items, chunk_size = 65536):
+    """
+    Parse many addresses of either family to keys.
+
+    The items are split by family and each family is converted with
+    L{ipyparse.batch.parse_many}.  Invalid items do not raise; their
+    key is zero and they are cleared in the validity mask.
+
+    @param items: The strings to convert
+    @type items: iterable of str
+
+    @param chunk_size: How many rows L{ipyparse.batch.parse_many}
+    scans at a time.
+    @type chunk_size: int
+
+    @return: The keys, as L{ipyparse.batch.IPV6_DTYPE} records, and a
+    boolean mask of the rows that were valid.
+    @rtype: tuple of (L{numpy.ndarray}, L{numpy.ndarray})
+    """
+    if numpy is None:
+        raise ImportError('parse_keys requires numpy')
+
+    from ipyparse.batch import IPV6_DTYPE
+    from ipyparse.batch import parse_many
+
+    items = list(items)
+    is_ipv6 = numpy.fromiter((':' in item for item in items), bool, len(items))
+    keys = numpy.zeros(len(items), dtype = IPV6_DTYPE)
+    valid = numpy.zeros(len(items), dtype = bool)
+    for family, rows in ((4, numpy.flatnonzero(~is_ipv6)), (6, numpy.flatnonzero(is_ipv6))):
+        if not len(rows):
+            continue
+        values, family_valid = parse_many([items[row] for row in rows.tolist()], family = family,
+                                          chunk_size = chunk_size)
+        keys[rows] = numpy.where(family_valid, to_keys(values, family), numpy.zeros(1, dtype = IPV6_DTYPE))
+        valid[rows] = family_valid
+    return keys, valid
+
+def key_families(keys):
+    """
+    Recover the family of many keys at once.
+
+    @param keys: The keys, as returned by L{parse_keys} or
+    L{to_keys}.
+    @type keys: L{numpy.ndarray}
+
+    @return: 4 for the keys in C{::ffff:0:0/96}, whose IPv4 address
+    is C{keys['lo'] & 0xffffffff}, and 6 for the others.
+    @rtype: L{numpy.ndarray} of C{uint8}
+    """
+    mapped = (keys['hi'] == 0) & (keys['lo'] >> numpy.uint64(32) == 0xffff)
+    return numpy.where(mapped, 4, 6).astype(numpy.uint8)
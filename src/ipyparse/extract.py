@@ -0,0 +1,207 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import mmap
+import re
+
+from ipyparse import ipv4
+from ipyparse import ipv6
+from ipyparse.ipv4 import _ipv4_value
+from ipyparse.ipv6 import _ipv6_value
+
+_candidate_chars = b'0123456789ABCDEFabcdef:.'
+
+_hexdigits = frozenset('0123456789ABCDEFabcdef')
+
+MAX_SPAN = 128
+"""
+Runs of candidate characters longer than this are skipped.  It is
+well over the longest address (45 characters, or 49 with the leading
+zeros the IPv4 grammar allows), leaving room for a port or a
+neighbouring address.
+"""
+
+Candidate = re.compile(b'[0-9A-Fa-f:.]{3,}')
+"""
+A run of characters that could make up one or more addresses.
+"""
+
+def _bounded(span, start, end, family):
+    """
+    Whether a match stands on its own rather than being part of a
+    longer token.
+
+    The characters on either side must not continue the address: no
+    hex digit, no dot before it or dot and hex digit after it, and for
+    IPv6 no colon before it or colon and hex digit after it.  An IPv4
+    address may be followed by a colon, as in C{10.0.0.1:8080}.
+    """
+    if start > 0:
+        before = span[start - 1]
+        if before in _hexdigits or before == '.' or (family == 6 and before == ':'):
+            return False
+    if end < len(span):
+        after = span[end]
+        if after in _hexdigits:
+            return False
+        if (after == '.' or (family == 6 and after == ':')) and span[end + 1:end + 2] in _hexdigits:
+            return False
+    return True
+
+def scan_span(span):
+    """
+    Find the addresses in a candidate span.
+
+    A span that is a whole address is converted the same way as
+    L{ipyparse.ipv6.parse_ipv6} or L{ipyparse.ipv4.parse_ipv4}, but
+    without raising an exception when it is not.  Anything else is
+    searched with the L{ipyparse.ipv6.IPv6} and L{ipyparse.ipv4.IPv4}
+    grammars, keeping only matches on a token boundary (see
+    L{_bounded}); IPv4 matches that are part of an IPv6 match (the
+    embedded dotted quad) are dropped.
+
+    @param span: The span
+    @type span: str
+
+    @return: The offset in the span, the family (4 or 6) and the
+    value of each address, in order.
+    @rtype: list of tuple of (int, int, int)
+    """
+    if ':' in span:
+        value = _ipv6_value(span)
+        if value is not None:
+            return [(0, 6, value)]
+    else:
+        value = _ipv4_value(span)
+        if value is not None:
+            return [(0, 4, value)]
+
+    found = [(start, end, 6, tokens[0]) for tokens, start, end in ipv6.IPv6.scanString(span)]
+    if '.' in span:
+        for tokens, start, end in ipv4.IPv4.scanString(span):
+            if not any(s <= start and end <= e for s, e, family, value in found):
+                found.append((start, end, 4, tokens[0]))
+        found.sort()
+
+    return [(start, family, value) for start, end, family, value in found
+            if _bounded(span, start, end, family)]
+
+def _spans(buffer, base = 0):
+    """
+    Find the plausible candidate spans in a buffer.
+
+    @param buffer: The buffer to search
+    @type buffer: bytes-like
+
+    @param base: The offset of the buffer in the whole input.
+    @type base: int
+
+    @return: A generator of the offset and text of each span.
+    """
+    for match in Candidate.finditer(buffer):
+        span = match.group()
+        if len(span) > MAX_SPAN:
+            continue
+        if b':' in span or span.count(b'.') >= 3:
+            yield base + match.start(), span.decode('ascii')
+
+def _read_spans(fileobj, block_size):
+    """
+    Find the candidate spans in a file that can not be memory-mapped.
+
+    The file is read a block at a time.  A span that runs up to the
+    end of a block is held back and searched again with the next
+    block so that spans are never split.  At most L{MAX_SPAN} bytes
+    are held back: a longer run is dropped, along with the rest of it
+    in the blocks that follow.
+
+    @return: A generator of the offset and text of each span.
+    """
+    base = 0
+    pending = b''
+    skipping = False
+    while True:
+        block = fileobj.read(block_size)
+        if not block:
+            for span in _spans(pending, base):
+                yield span
+            return
+
+        if skipping:
+            rest = block.lstrip(_candidate_chars)
+            base += len(block) - len(rest)
+            if not rest:
+                continue
+            block = rest
+            skipping = False
+
+        # hold back a candidate that touches the end of the buffer
+        buffer = pending + block
+        cut = len(buffer.rstrip(_candidate_chars))
+        for span in _spans(buffer[:cut], base):
+            yield span
+        pending = buffer[cut:]
+        base += cut
+        if len(pending) > MAX_SPAN:
+            base += len(pending)
+            pending = b''
+            skipping = True
+
+def scan(source, block_size = 1 << 20):
+    """
+    Find every IPv4 and IPv6 address embedded in a file.
+
+    The file is memory-mapped where possible and otherwise read a
+    block at a time, so memory use does not grow with the size of the
+    file.  Only runs of hex digits, colons and dots that could hold
+    an address are handed to L{scan_span}.
+
+    @param source: The file, either a path or a file object opened
+    in binary mode.
+    @type source: str or file
+
+    @param block_size: How much to read at a time from a file object
+    that can not be memory-mapped.
+    @type block_size: int
+
+    @return: A generator of the byte offset in the file, the family
+    (4 or 6) and the value of each address, in order.
+    """
+    if isinstance(source, (str, bytes)):
+        with open(source, 'rb') as fileobj:
+            for address in scan(fileobj, block_size):
+                yield address
+        return
+
+    try:
+        buffer = mmap.mmap(source.fileno(), 0, access = mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # not a real file, or an empty one
+        spans = _read_spans(source, block_size)
+        buffer = None
+    else:
+        spans = _spans(buffer)
+
+    try:
+        for offset, span in spans:
+            for start, family, value in scan_span(span):
+                yield offset + start, family, value
+    finally:
+        if buffer is not None:
+            buffer.close()
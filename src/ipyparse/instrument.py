@@ -0,0 +1,208 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import functools
+import threading
+import time
+
+def _plain_action(name, function):
+    return function
+
+def _plain_alternatives(name, alternatives):
+    return alternatives
+
+class Instrumentation(object):
+    """
+    Counters and timings for the parsers, collected only where they
+    are asked for.
+
+    Nothing is instrumented by default and nothing here changes the
+    module level parsers or grammars, so there is no cost unless an
+    instrumented parser is used:
+
+     - L{wrap} returns an instrumented copy of an entry point such as
+       L{ipyparse.ipv4.parse_ipv4}, counting calls, successes and
+       failures and keeping a latency histogram.
+     - Passing an instance to L{ipyparse.parser.Parser} builds that
+       parser's grammars with a counter on every alternative of
+       L{ipyparse.ipv6.IPv6} and L{ipyparse.ipv4.Octet}, timing every
+       parse action, and wraps its C{parse_ipv4} and C{parse_ipv6}.
+
+    >>> instrument = Instrumentation()
+    >>> parser = Parser(instrument = instrument)
+    >>> parser.parse_ipv6('::1')
+    IPv6Address('::1')
+    >>> instrument.snapshot()['alternatives']['IPv6']
+    {15: 1}
+
+    Latencies are counted in power of two buckets of nanoseconds; the
+    histogram maps the upper bound of each bucket to its count.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """
+        Set every counter back to zero.
+        """
+        with self._lock:
+            self._calls = collections.Counter()
+            self._failures = collections.Counter()
+            self._elapsed = collections.Counter()
+            self._histograms = collections.defaultdict(collections.Counter)
+            self._alternatives = collections.defaultdict(collections.Counter)
+            self._action_calls = collections.Counter()
+            self._action_elapsed = collections.Counter()
+
+    def wrap(self, name, function):
+        """
+        Instrument an entry point.
+
+        @param name: The name to record it under.
+        @type name: str
+
+        @param function: A parse function that raises an exception,
+        such as C{ValueError}, for invalid input.
+        @type function: callable
+
+        @return: The instrumented function.
+        @rtype: callable
+        """
+        clock = time.perf_counter_ns
+        local = self._local
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # alternatives that match during the call are held here
+            # and only counted if the call succeeds
+            outer = getattr(local, 'hits', None)
+            hits = local.hits = []
+            start = clock()
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                local.hits = outer
+                self._record(name, clock() - start, False, ())
+                raise
+            local.hits = outer
+            if outer is not None:
+                # a nested entry point; the outer call decides
+                outer.extend(hits)
+                hits = ()
+            self._record(name, clock() - start, True, hits)
+            return result
+        return wrapper
+
+    def _record(self, name, elapsed, success, hits):
+        with self._lock:
+            self._calls[name] += 1
+            if not success:
+                self._failures[name] += 1
+            self._elapsed[name] += elapsed
+            self._histograms[name][1 << elapsed.bit_length()] += 1
+            for alternatives, index in hits:
+                self._alternatives[alternatives][index] += 1
+
+    def action(self, name, function):
+        """
+        Time a parse action.  Used by the C{build_grammar} functions.
+
+        @return: The timed parse action.
+        @rtype: callable
+        """
+        clock = time.perf_counter_ns
+
+        def timed(s, loc, toks):
+            start = clock()
+            try:
+                return function(s, loc, toks)
+            finally:
+                elapsed = clock() - start
+                with self._lock:
+                    self._action_calls[name] += 1
+                    self._action_elapsed[name] += elapsed
+        timed.__name__ = function.__name__
+        return timed
+
+    def alternatives(self, name, alternatives):
+        """
+        Count which of a list of alternatives matches.  Used by the
+        C{build_grammar} functions.
+
+        Inside an entry point instrumented with L{wrap}, the matches
+        are only counted if the call succeeds, so an alternative that
+        matched inside an address that was then rejected is not
+        counted.  Outside one, such as when a grammar is used
+        directly, every match is counted as it happens.
+
+        @param alternatives: The alternatives, which are changed in
+        place.
+        @type alternatives: list of L{pyparsing.ParserElement}
+
+        @return: The same alternatives.
+        @rtype: list of L{pyparsing.ParserElement}
+        """
+        local = self._local
+
+        def counter(index):
+            def count(s, loc, toks):
+                hits = getattr(local, 'hits', None)
+                if hits is not None:
+                    hits.append((name, index))
+                    return
+                with self._lock:
+                    self._alternatives[name][index] += 1
+            return count
+
+        for index, alternative in enumerate(alternatives):
+            alternative.addParseAction(counter(index))
+        return alternatives
+
+    def snapshot(self):
+        """
+        @return: A copy of every counter:
+
+         - C{entry_points}: for each name given to L{wrap}, the
+           C{calls}, C{successes}, C{failures}, total C{elapsed_ns}
+           and latency C{histogram}.
+         - C{alternatives}: for C{IPv6} and C{Octet}, how many times
+           each alternative (numbered in the order they appear in the
+           grammar) matched in calls to wrapped entry points that
+           succeeded, plus every match made outside such a call.
+         - C{actions}: for each parse action, its C{calls} and total
+           C{elapsed_ns}.
+        @rtype: dict
+        """
+        with self._lock:
+            entry_points = {}
+            for name, calls in self._calls.items():
+                entry_points[name] = {'calls': calls,
+                                      'successes': calls - self._failures[name],
+                                      'failures': self._failures[name],
+                                      'elapsed_ns': self._elapsed[name],
+                                      'histogram': dict(sorted(self._histograms[name].items()))}
+            return {'entry_points': entry_points,
+                    'alternatives': dict((name, dict(sorted(counts.items())))
+                                         for name, counts in self._alternatives.items()),
+                    'actions': dict((name, {'calls': calls, 'elapsed_ns': self._action_elapsed[name]})
+                                    for name, calls in self._action_calls.items())}
@@ -0,0 +1,363 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import bisect
+
+from ipyparse.ipv4 import parse_ipv4_prefix
+from ipyparse.ipv6 import parse_ipv6_prefix
+from ipyparse.ranges import AddressRange
+from ipyparse.ranges import WildcardRange
+from ipyparse.ranges import parse_ipv4_range
+from ipyparse.ranges import parse_ipv6_range
+
+def _merge(intervals):
+    """
+    Merge intervals into sorted, disjoint, non-adjacent intervals.
+
+    @param intervals: The first and last address of each interval.
+    @type intervals: iterable of tuple of (int, int)
+
+    @return: The first and last addresses of the merged intervals.
+    @rtype: tuple of (list of int, list of int)
+    """
+    starts = []
+    ends = []
+    for first, last in sorted(intervals):
+        if ends and first <= ends[-1] + 1:
+            if last > ends[-1]:
+                ends[-1] = last
+        else:
+            starts.append(first)
+            ends.append(last)
+    return starts, ends
+
+class IPSet(object):
+    """
+    A set of addresses of one family, kept as sorted, disjoint
+    intervals.
+
+    Single addresses, prefixes and ranges are merged with their
+    neighbours, so memory depends on the number of intervals rather
+    than the number of addresses, and a membership test is a binary
+    search.  Like L{ipyparse.prefix.PrefixIndex}, additions are
+    merged on the first lookup after them, so load entries in bulk
+    with L{update} before looking anything up.  Pending additions are
+    also merged once there are L{pending_limit} of them, so adding
+    millions of single addresses does not hold one entry for each.
+
+    >>> blocked = IPSet(['10.0.0.0/8', '192.168.1.1-192.168.1.20', '172.16.0.1'])
+    >>> blocked.contains(parse_ipv4('10.1.2.3'))
+    True
+
+    @ivar family: The address family, 4 or 6.
+    @ivar bits: The width of an address in bits.
+    """
+
+    pending_limit = 1 << 16
+    """
+    The most additions kept before they are merged, unless the set
+    already has more intervals than that.
+    """
+
+    def __init__(self, items = (), family = 4):
+        """
+        @param items: Addresses, prefixes or ranges to add, as for
+        L{update}.
+        @type items: iterable
+
+        @param family: The address family, 4 or 6.
+        @type family: int
+        """
+        if family not in (4, 6):
+            raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+        self.family = family
+        self.bits = 32 if family == 4 else 128
+        self._starts = []
+        self._ends = []
+        self._pending = []
+        self.update(items)
+
+    @classmethod
+    def _from_intervals(cls, family, starts, ends):
+        result = cls(family = family)
+        result._starts = starts
+        result._ends = ends
+        return result
+
+    def add_range(self, first, last):
+        """
+        Add every address from C{first} to C{last} inclusive.
+
+        @type first: int
+        @type last: int
+        """
+        if not 0 <= first <= last < (1 << self.bits):
+            raise ValueError('invalid range {!r} to {!r}'.format(first, last))
+        self._pending.append((first, last))
+        # merging costs as much as the intervals already held, so wait
+        # for at least that many additions to keep it amortized
+        if len(self._pending) >= max(self.pending_limit, len(self._starts)):
+            self._normalize()
+
+    def add_prefix(self, network, length):
+        """
+        Add every address in a prefix, such as one returned by
+        L{ipyparse.ipv4.parse_ipv4_prefix}.
+
+        @type network: int
+        @type length: int
+        """
+        if not 0 <= length <= self.bits:
+            raise ValueError('invalid prefix length {!r}'.format(length))
+        host = (1 << (self.bits - length)) - 1
+        if network & host:
+            raise ValueError('invalid network address {!r} for length {!r}'.format(network, length))
+        self.add_range(network, network | host)
+
+    def add(self, item):
+        """
+        Add an address, prefix or range.
+
+        @param item: An address as an integer; a string holding an
+        address, a prefix such as C{10.0.0.0/8} (host bits are
+        cleared), a range such as C{10.0.0.1-10.0.0.9}, with or
+        without spaces around the dash, or a wildcard pattern such as
+        C{192.168.*.*}; or a range from
+        L{ipyparse.ranges}.
+        @type item: int, str, L{ipyparse.ranges.AddressRange} or
+        L{ipyparse.ranges.WildcardRange}
+
+        @raise ValueError: If C{item} is not valid for the family.
+        """
+        if isinstance(item, str):
+            if '/' in item:
+                self.add_prefix(*(parse_ipv4_prefix if self.family == 4 else parse_ipv6_prefix)(item))
+                return
+            # the range parsers follow the grammar, which allows no
+            # spaces, but sets have always taken '10.0.0.1 - 10.0.0.9'
+            first, sep, last = item.partition('-')
+            item = (parse_ipv4_range if self.family == 4 else parse_ipv6_range)(first.strip() + sep + last.strip())
+        elif not isinstance(item, (AddressRange, WildcardRange)):
+            self.add_range(item, item)
+            return
+
+        if item.family != self.family:
+            raise ValueError('can not add an IPv{} range to an IPv{} set'.format(item.family, self.family))
+        for first, last in item.intervals():
+            self.add_range(first, last)
+
+    def update(self, items):
+        """
+        Add many addresses, prefixes or ranges, as for L{add}.
+
+        @type items: iterable
+        """
+        for item in items:
+            self.add(item)
+
+    def _normalize(self):
+        if self._pending:
+            self._pending.extend(zip(self._starts, self._ends))
+            self._starts, self._ends = _merge(self._pending)
+            self._pending = []
+
+    def intervals(self):
+        """
+        @return: The first and last address of each interval, in
+        order.
+        @rtype: list of tuple of (int, int)
+        """
+        self._normalize()
+        return list(zip(self._starts, self._ends))
+
+    def size(self):
+        """
+        @return: The number of addresses in the set.
+        @rtype: int
+        """
+        self._normalize()
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def __bool__(self):
+        self._normalize()
+        return bool(self._starts)
+
+    def __eq__(self, other):
+        if not isinstance(other, IPSet):
+            return NotImplemented
+        return self.family == other.family and self.intervals() == other.intervals()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}(family = {}, intervals = {})'.format(self.__class__.__name__,
+                                                        self.family,
+                                                        len(self.intervals()))
+
+    def contains(self, address):
+        """
+        Test whether an address is in the set.
+
+        @param address: The address; an address of the other family
+        is never in the set.
+        @type address: int
+
+        @rtype: bool
+        """
+        if getattr(address, 'family', self.family) != self.family:
+            return False
+        self._normalize()
+        index = bisect.bisect_right(self._starts, address) - 1
+        return index >= 0 and address <= self._ends[index]
+
+    def __contains__(self, address):
+        return self.contains(address)
+
+    def contains_many(self, addresses):
+        """
+        Test many addresses at once.
+
+        @param addresses: The addresses, for example the values from
+        L{ipyparse.batch.parse_many}, which are tested with a single
+        vectorized search.  Addresses of the other family, including
+        IPv6 records tested against an IPv4 set, are never in the set.
+        @type addresses: iterable of int, or L{numpy.ndarray} of
+        C{uint32} or L{ipyparse.batch.IPV6_DTYPE}
+
+        @return: Whether each address is in the set.
+        @rtype: list of bool, or L{numpy.ndarray} of bool for an
+        array
+        """
+        self._normalize()
+        dtype = getattr(addresses, 'dtype', None)
+        if dtype is not None and (dtype.names is not None or self.family == 4):
+            import numpy
+            if dtype.names is not None:
+                # IPv6 records, searched as 16 big-endian bytes like
+                # ipyparse.array.AddressArray does
+                from ipyparse.batch import IPV6_DTYPE
+                if self.family != 6 or not self._starts:
+                    return numpy.zeros(len(addresses), dtype = bool)
+                addresses = numpy.ascontiguousarray(addresses, dtype = IPV6_DTYPE).view('S16')
+                starts = numpy.array([start.to_bytes(16, 'big') for start in self._starts], dtype = 'S16')
+                ends = numpy.array([end.to_bytes(16, 'big') for end in self._ends], dtype = 'S16')
+            else:
+                if not self._starts:
+                    return numpy.zeros(len(addresses), dtype = bool)
+                starts = numpy.array(self._starts, dtype = numpy.int64)
+                ends = numpy.array(self._ends, dtype = numpy.int64)
+            index = numpy.searchsorted(starts, addresses, side = 'right') - 1
+            return (index >= 0) & (addresses <= ends[numpy.maximum(index, 0)])
+        if hasattr(addresses, 'tolist'):
+            addresses = addresses.tolist()
+        family = self.family
+        starts = self._starts
+        ends = self._ends
+        result = []
+        for address in addresses:
+            if getattr(address, 'family', family) != family:
+                result.append(False)
+                continue
+            index = bisect.bisect_right(starts, address) - 1
+            result.append(index >= 0 and address <= ends[index])
+        return result
+
+    def _check(self, other):
+        if not isinstance(other, IPSet):
+            other = self.__class__(other, self.family)
+        elif other.family != self.family:
+            raise ValueError('can not combine IPv{} and IPv{} sets'.format(self.family, other.family))
+        self._normalize()
+        other._normalize()
+        return other
+
+    def union(self, other):
+        """
+        @return: The addresses in either set.
+        @rtype: L{IPSet}
+        """
+        other = self._check(other)
+        starts, ends = _merge(list(zip(self._starts, self._ends)) + list(zip(other._starts, other._ends)))
+        return self._from_intervals(self.family, starts, ends)
+
+    def intersection(self, other):
+        """
+        @return: The addresses in both sets.
+        @rtype: L{IPSet}
+        """
+        other = self._check(other)
+        a_starts, a_ends, b_starts, b_ends = self._starts, self._ends, other._starts, other._ends
+        starts = []
+        ends = []
+        i = j = 0
+        while i < len(a_starts) and j < len(b_starts):
+            first = max(a_starts[i], b_starts[j])
+            last = min(a_ends[i], b_ends[j])
+            if first <= last:
+                starts.append(first)
+                ends.append(last)
+            # move past whichever interval ends first
+            if a_ends[i] < b_ends[j]:
+                i += 1
+            else:
+                j += 1
+        return self._from_intervals(self.family, starts, ends)
+
+    def difference(self, other):
+        """
+        @return: The addresses in this set but not the other.
+        @rtype: L{IPSet}
+        """
+        other = self._check(other)
+        b_starts, b_ends = other._starts, other._ends
+        starts = []
+        ends = []
+        j = 0
+        for first, last in zip(self._starts, self._ends):
+            # skip the intervals that end before this one starts
+            while j < len(b_starts) and b_ends[j] < first:
+                j += 1
+            k = j
+            while k < len(b_starts) and b_starts[k] <= last:
+                if b_starts[k] > first:
+                    starts.append(first)
+                    ends.append(b_starts[k] - 1)
+                first = b_ends[k] + 1
+                k += 1
+            if first <= last:
+                starts.append(first)
+                ends.append(last)
+        return self._from_intervals(self.family, starts, ends)
+
+    def symmetric_difference(self, other):
+        """
+        @return: The addresses in exactly one of the sets.
+        @rtype: L{IPSet}
+        """
+        other = self._check(other)
+        return self.difference(other).union(other.difference(self))
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
@@ -17,16 +17,8 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
 
-from pyparsing import Combine
-from pyparsing import Group
-from pyparsing import Literal
-from pyparsing import OneOrMore
-from pyparsing import Optional
-from pyparsing import ParserElement
-from pyparsing import Word
-
-dwspc = ParserElement.DEFAULT_WHITE_CHARS
-ParserElement.setDefaultWhitespaceChars('')
+import mmap
+import threading
 
 def convert_octet(s, l, t):
     """
@@ -82,27 +74,507 @@ def convert_ipv4(s, l, t):
     @type toks: L{pyparsing.ParseResult}
 
     @return: The IPv4 address expressed as a 32-bit integer.
-    @rtype: int
+    @rtype: L{IPv4Address}
     """
-    r = [ (t[0][0] << 24) + 
-          (t[0][1] << 16) +
-          (t[0][2] << 8) +
-          (t[0][3]) ]
+    r = [ IPv4Address((t[0][0] << 24) +
+                      (t[0][1] << 16) +
+                      (t[0][2] << 8) +
+                      (t[0][3])) ]
     return r
 
-LeadingZeros = Optional(Literal('0')).suppress()
+def convert_ipv4_prefix(s, l, t):
+    """
+    Convert an IPv4 prefix to its network address and length.
+
+    @param s: The original string
+    @type s: str
+    
+    @param loc: The location in the string that the match occurred
+    @type loc: int
+
+    @param toks: The tokens that make up the IPv4 prefix.
+    @type toks: L{pyparsing.ParseResult}
+
+    @return: The network address expressed as a 32-bit integer, with
+    any bits past the prefix length cleared, and the prefix length.
+    @rtype: tuple of (int, int)
+    """
+    length = int(t[1])
+    mask = (0xffffffff << (32 - length)) & 0xffffffff
+    return [ (t[0] & mask, length) ]
+
+def convert_ipv4_range(s, l, t):
+    """
+    Convert an IPv4 range to an L{ipyparse.ranges.AddressRange}.
+
+    @param s: The original string
+    @type s: str
+
+    @param loc: The location in the string that the match occurred
+    @type loc: int
+
+    @param toks: The first and last address of the range.
+    @type toks: L{pyparsing.ParseResult}
+
+    @return: The range
+    @rtype: L{ipyparse.ranges.AddressRange}
+    """
+    from pyparsing import ParseException
+    from ipyparse.ranges import AddressRange
+
+    if t[1] < t[0]:
+        raise ParseException(s, l, 'empty range')
+    return [ AddressRange(t[0], t[1], 4) ]
+
+def convert_ipv4_wildcard(s, l, t):
+    """
+    Convert an IPv4 wildcard pattern to a lazy range.
+
+    @param s: The original string
+    @type s: str
+
+    @param loc: The location in the string that the match occurred
+    @type loc: int
+
+    @param toks: The octets of the pattern, with C{*} for wildcards.
+    @type toks: L{pyparsing.ParseResult}
+
+    @return: The range
+    @rtype: L{ipyparse.ranges.AddressRange} or L{ipyparse.ranges.WildcardRange}
+    """
+    from ipyparse.ranges import from_wildcard
+
+    return [ from_wildcard([None if octet == '*' else octet for octet in t[0]]) ]
+
+def build_grammar(instrument = None):
+    """
+    Build a new, independent copy of the pyparsing grammar.
+
+    Whitespace skipping is turned off on each element rather than by
+    changing pyparsing's default, so building a grammar does not
+    affect other users of pyparsing.
+
+    @param instrument: Count the alternatives of L{Octet} and time the
+    parse actions of this copy of the grammar.
+    @type instrument: L{ipyparse.instrument.Instrumentation}
+
+    @return: The grammar elements by name.
+    @rtype: dict
+    """
+    from pyparsing import Combine
+    from pyparsing import Group
+    from pyparsing import Literal
+    from pyparsing import OneOrMore
+    from pyparsing import Optional
+    from pyparsing import Or
+    from pyparsing import StringEnd
+    from pyparsing import StringStart
+    from pyparsing import Word
+
+    if instrument is None:
+        from ipyparse.instrument import _plain_action as action
+        from ipyparse.instrument import _plain_alternatives as alternatives
+    else:
+        action = instrument.action
+        alternatives = instrument.alternatives
+
+    LeadingZeros = Optional(Literal('0')).suppress()
+
+    Octet = Combine(Or(alternatives('Octet',
+                                    [(OneOrMore(Literal('0'))),
+                                     (LeadingZeros + Word('123456789', exact = 1)),
+                                     (LeadingZeros + Word('123456789', '0123456789', exact = 2)),
+                                     (LeadingZeros + '1' + Word('0123456789', exact = 2)),
+                                     (LeadingZeros + '2' + Word('01234', '0123456789', exact = 2)),
+                                     (LeadingZeros + '25' + Word('012345', exact = 1))])))
+    Octet.setParseAction(action('convert_octet', convert_octet))
+
+    Dot = Literal('.').suppress()
+
+    _IPv4 = Octet + (Dot + Octet) * 3
+    IPv4 = Group(_IPv4).setParseAction(action('convert_ipv4', convert_ipv4))
+    IPv4_in_IPv6 = Group(_IPv4).setParseAction(action('convert_ipv4_in_ipv6', convert_ipv4_in_ipv6))
+
+    IPv4_WholeString = StringStart() + IPv4 + StringEnd()
+
+    Slash = Literal('/').suppress()
+
+    IPv4_PrefixLength = Combine(Word('0123456789', exact = 1) ^
+                                Word('12', '0123456789', exact = 2) ^
+                                ('3' + Word('012', exact = 1)))
+
+    IPv4_Prefix = (IPv4 + Slash + IPv4_PrefixLength)
+    IPv4_Prefix.setParseAction(action('convert_ipv4_prefix', convert_ipv4_prefix))
+    IPv4_Prefix_WholeString = StringStart() + IPv4_Prefix + StringEnd()
+
+    Dash = Literal('-').suppress()
+    Star = Literal('*')
+
+    IPv4_Range = (IPv4 + Dash + IPv4).setParseAction(action('convert_ipv4_range', convert_ipv4_range))
+    IPv4_Wildcard = Group((Octet ^ Star) + (Dot + (Octet ^ Star)) * 3)
+    IPv4_Wildcard.setParseAction(action('convert_ipv4_wildcard', convert_ipv4_wildcard))
+    IPv4_Range_WholeString = StringStart() + (IPv4_Range ^ IPv4_Wildcard) + StringEnd()
+
+    grammar = {'LeadingZeros': LeadingZeros,
+               'Octet': Octet,
+               'Dot': Dot,
+               '_IPv4': _IPv4,
+               'IPv4': IPv4,
+               'IPv4_in_IPv6': IPv4_in_IPv6,
+               'IPv4_WholeString': IPv4_WholeString,
+               'Slash': Slash,
+               'IPv4_PrefixLength': IPv4_PrefixLength,
+               'IPv4_Prefix': IPv4_Prefix,
+               'IPv4_Prefix_WholeString': IPv4_Prefix_WholeString,
+               'Dash': Dash,
+               'Star': Star,
+               'IPv4_Range': IPv4_Range,
+               'IPv4_Wildcard': IPv4_Wildcard,
+               'IPv4_Range_WholeString': IPv4_Range_WholeString}
+    for element in grammar.values():
+        element.leaveWhitespace()
+        element.streamline()
+    return grammar
+
+_grammar = frozenset(['LeadingZeros', 'Octet', 'Dot', '_IPv4', 'IPv4', 'IPv4_in_IPv6', 'IPv4_WholeString',
+                      'Slash', 'IPv4_PrefixLength', 'IPv4_Prefix', 'IPv4_Prefix_WholeString',
+                      'Dash', 'Star', 'IPv4_Range', 'IPv4_Wildcard', 'IPv4_Range_WholeString'])
+_grammar_lock = threading.Lock()
+
+def __getattr__(name):
+    # the module's own grammar is built the first time it is used so
+    # that importing this module (and using parse_ipv4) does not
+    # import pyparsing
+    if name in _grammar:
+        with _grammar_lock:
+            if name not in globals():
+                globals().update(build_grammar())
+        return globals()[name]
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+_octets = dict((str(n), n) for n in range(256))
+_octets.update(('0' + str(n), n) for n in range(1, 256))
+
+def _ipv4_value(s):
+    """
+    Convert an IPv4 address to a 32-bit integer.
+
+    Each octet is validated and converted in the same loop with a
+    table lookup and follows the same rules as L{Octet}: a string of
+    zeros, or a decimal number from 1 to 255 with at most one leading
+    zero.
+
+    @return: The IPv4 address expressed as a 32-bit integer, or
+    C{None} if C{s} is not a valid IPv4 address.
+    @rtype: int
+    """
+    octets = s.split('.')
+    if len(octets) != 4:
+        return None
+
+    result = 0
+    for octet in octets:
+        value = _octets.get(octet)
+        if value is None:
+            # any number of zeros is also allowed
+            if not octet or octet.strip('0'):
+                return None
+            value = 0
+        result = (result << 8) + value
+
+    return result
+
+_new = int.__new__
+
+_buffer_types = (bytes, bytearray, memoryview, mmap.mmap)
+
+def _ipv4_buffer_value(buffer, start, end):
+    """
+    Convert an IPv4 address held in part of a buffer to a 32-bit
+    integer.
+
+    The bytes are read one at a time in place, following the same
+    rules as L{_ipv4_value}, so nothing is decoded or copied.
+
+    @return: The IPv4 address expressed as a 32-bit integer, or
+    C{None} if C{buffer[start:end]} is not a valid IPv4 address.
+    @rtype: int
+    """
+    result = 0
+    octets = 0
+    i = start
+    while octets < 4:
+        value = 0
+        zeros = 0
+        digits = 0
+        while i < end:
+            c = buffer[i] - 48
+            if not 0 <= c <= 9:
+                break
+            if value:
+                value = value * 10 + c
+                if value > 255:
+                    return None
+            elif c:
+                value = c
+            else:
+                zeros += 1
+            digits += 1
+            i += 1
+        # a string of zeros, or 1 to 255 with at most one leading zero
+        if not digits or (value and zeros > 1):
+            return None
+        result = (result << 8) + value
+        octets += 1
+        if octets < 4:
+            if i >= end or buffer[i] != 46:
+                return None
+            i += 1
+    if i != end:
+        return None
+    return result
+
+def _ipv4_any_value(s, start, end):
+    """
+    Convert an IPv4 address in a string or a buffer.
+
+    @raise TypeError: If C{s} is neither a string nor a buffer.
+    """
+    if isinstance(s, str):
+        if start or end is not None:
+            s = s[start:end]
+        return _ipv4_value(s)
+    if isinstance(s, _buffer_types):
+        start, end, step = slice(start, end).indices(len(s))
+        return _ipv4_buffer_value(s, start, end)
+    raise TypeError('expected a string or a buffer, not {!r}'.format(type(s).__name__))
+
+def parse_ipv4(s, start = 0, end = None):
+    """
+    Convert the string representation of an IPv4 address to a 32-bit integer.
+
+    This is a single pass equivalent of
+    C{IPv4_WholeString.parseString(s)[0]}.  The address can also be
+    read straight out of a C{bytes}, C{bytearray}, C{memoryview} or
+    C{mmap} object, in which case the bytes are parsed in place
+    without being decoded or copied.
+
+    @param s: The IPv4 address
+    @type s: str or bytes-like
+
+    @param start: Where the address starts in C{s}.
+    @type start: int
+
+    @param end: Where the address ends in C{s}, by default the end of
+    C{s}.  Like C{start}, it is interpreted as in a slice.
+    @type end: int
+
+    @return: The IPv4 address expressed as a 32-bit integer.
+    @rtype: L{IPv4Address}
+
+    @raise ValueError: If C{s[start:end]} is not a valid IPv4 address.
+    """
+    if s.__class__ is str and not start and end is None:
+        result = _ipv4_value(s)
+    else:
+        result = _ipv4_any_value(s, start, end)
+    if result is None:
+        if not isinstance(s, str):
+            s = bytes(s[start:end])
+        elif start or end is not None:
+            s = s[start:end]
+        raise ValueError('{!r} is not a valid IPv4 address'.format(s))
+    return _new(IPv4Address, result)
+
+def is_valid_ipv4(s, start = 0, end = None):
+    """
+    Check whether a string is a valid IPv4 address.
+
+    This accepts exactly what L{parse_ipv4} accepts, but rejects
+    invalid input without building an exception, which makes it the
+    cheaper test when most candidates are not addresses.
+
+    @param s: The candidate
+    @type s: str or bytes-like
+
+    @param start: Where the candidate starts in C{s}.
+    @type start: int
+
+    @param end: Where the candidate ends in C{s}.
+    @type end: int
+
+    @return: Whether C{s[start:end]} is a valid IPv4 address.
+    Anything that is neither a string nor a buffer is not.
+    @rtype: bool
+    """
+    try:
+        return _ipv4_any_value(s, start, end) is not None
+    except TypeError:
+        return False
+
+_prefix_lengths = dict((str(n), n) for n in range(33))
+
+def parse_ipv4_prefix(s, strict = False):
+    """
+    Convert an IPv4 prefix such as C{10.0.0.0/8} to its network
+    address and length.
+
+    This is the equivalent of
+    C{IPv4_Prefix_WholeString.parseString(s)[0]}.
+
+    @param s: The IPv4 prefix
+    @type s: str
+
+    @param strict: Reject prefixes with bits set past the prefix
+    length instead of clearing them.
+    @type strict: bool
+
+    @return: The network address expressed as a 32-bit integer and
+    the prefix length.
+    @rtype: tuple of (int, int)
+
+    @raise ValueError: If C{s} is not a valid IPv4 prefix.
+    """
+    address, sep, length = s.partition('/')
+    length = _prefix_lengths.get(length)
+    if not sep or length is None:
+        raise ValueError('{!r} is not a valid IPv4 prefix'.format(s))
+    try:
+        network = parse_ipv4(address)
+    except ValueError:
+        raise ValueError('{!r} is not a valid IPv4 prefix'.format(s))
+
+    mask = (0xffffffff << (32 - length)) & 0xffffffff
+    if network & ~mask:
+        if strict:
+            raise ValueError('{!r} has host bits set'.format(s))
+        network &= mask
+    return network, length
+
+def format_ipv4(value):
+    """
+    Convert a 32-bit integer to the dotted decimal form of an IPv4
+    address, without leading zeros.
+
+    @param value: The IPv4 address expressed as a 32-bit integer.
+    @type value: int
+
+    @return: The IPv4 address
+    @rtype: str
+
+    @raise ValueError: If C{value} is out of range.
+    """
+    if not 0 <= value <= 0xffffffff:
+        raise ValueError('{!r} is not a valid IPv4 address'.format(value))
+    return '{}.{}.{}.{}'.format(value >> 24, (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff)
+
+class IPv4Address(int):
+    """
+    An IPv4 address.
+
+    This is the 32-bit integer itself, so it is ordered and equal to
+    the plain integer, and can be used anywhere an integer is
+    expected; C{str()} gives the dotted decimal form.  It has no
+    instance dictionary, so it takes only a few bytes more memory than
+    the integer.
+
+    An address is never equal to an address of the other family with
+    the same value, so C{0.0.0.1} and C{::1} stay apart in sets and
+    dictionaries that mix the families.  The hash is the plain
+    integer's, so an address and its integer are the same key.
+
+    Addresses that repeat many times can be shared with L{intern}.
+
+    >>> address = parse_ipv4('192.168.1.26')
+    >>> address == 3232235802
+    True
+    >>> str(address)
+    '192.168.1.26'
+    """
+    __slots__ = ()
+
+    family = 4
+
+    intern_limit = 1 << 16
+    """
+    The most addresses L{intern} keeps; the oldest are forgotten
+    first.
+    """
+
+    _interned = {}
+
+    def __new__(cls, value):
+        """
+        @param value: The address as a 32-bit integer or as a string.
+        @type value: int or str
+
+        @raise ValueError: If C{value} is not a valid IPv4 address.
+        """
+        if isinstance(value, str):
+            return parse_ipv4(value)
+        if not 0 <= value <= 0xffffffff:
+            raise ValueError('{!r} is not a valid IPv4 address'.format(value))
+        return int.__new__(cls, value)
+
+    @classmethod
+    def intern(cls, value):
+        """
+        Return a shared instance for an address, so that many copies
+        of the same address are kept in memory only once.
+
+        At most L{intern_limit} addresses are kept, so a long stream
+        of distinct addresses does not grow the table without bound.
+
+        @param value: The address as a 32-bit integer or as a string.
+        @type value: int or str
+
+        @rtype: L{IPv4Address}
+        """
+        if value.__class__ is not cls:
+            value = cls(value)
+        interned = cls._interned
+        address = interned.get(value)
+        if address is None:
+            if len(interned) >= cls.intern_limit:
+                try:
+                    del interned[next(iter(interned))]
+                except (KeyError, RuntimeError, StopIteration):
+                    # another thread changed the table first
+                    pass
+            address = interned.setdefault(value, value)
+        return address
+
+    @classmethod
+    def clear_interned(cls):
+        """
+        Forget every interned address.
+        """
+        cls._interned.clear()
+
+    def __eq__(self, other):
+        if isinstance(other, int) and getattr(other, 'family', self.family) != self.family:
+            return False
+        return int.__eq__(self, other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    # defining __eq__ would otherwise make the type unhashable
+    __hash__ = int.__hash__
 
-Octet = Combine((OneOrMore(Literal('0'))) ^
-                (LeadingZeros + Word('123456789', exact = 1)) ^
-                (LeadingZeros + Word('123456789', '0123456789', exact = 2)) ^
-                (LeadingZeros + '1' + Word('0123456789', exact = 2)) ^
-                (LeadingZeros + '2' + Word('01234', '0123456789', exact = 2)) ^
-                (LeadingZeros + '25' + Word('012345', exact = 1))).setParseAction(convert_octet)
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, format_ipv4(self))
 
-Dot = Literal('.').suppress()
+    def __str__(self):
+        return format_ipv4(self)
 
-_IPv4 = Octet + (Dot + Octet) * 3
-IPv4 = Group(_IPv4).setParseAction(convert_ipv4)
-IPv4_in_IPv6 = Group(_IPv4).setParseAction(convert_ipv4_in_ipv6)
+    def __reduce__(self):
+        return (self.__class__, (int(self),))
 
-ParserElement.setDefaultWhitespaceChars(dwspc)
+    @property
+    def packed(self):
+        """
+        The address as 4 bytes in network order.
+        """
+        return self.to_bytes(4, 'big')
@@ -17,17 +17,14 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
 
-from pyparsing import Group
-from pyparsing import Literal
-from pyparsing import ParserElement
-from pyparsing import StringEnd
-from pyparsing import StringStart
-from pyparsing import Word
+import functools
+import threading
 
-from ipparse.ipv4 import IPv4_in_IPv6
-
-dwspc = ParserElement.DEFAULT_WHITE_CHARS
-ParserElement.setDefaultWhitespaceChars('')
+from ipyparse.ipv4 import _buffer_types
+from ipyparse.ipv4 import _ipv4_buffer_value
+from ipyparse.ipv4 import _ipv4_value
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import format_ipv4
 
 def convert_short(s, loc, toks):
     """
@@ -64,7 +61,7 @@ def convert_ipv6(s, loc, toks):
     @type toks: L{pyparsing.ParseResult}
 
     @return: The IPv6 address expressed as a 128-bit integer.
-    @rtype: int
+    @rtype: L{IPv6Address}
     """
     # convert toks to a read list or we get some wierd exceptions
     toks = toks[:]
@@ -82,28 +79,560 @@ def convert_ipv6(s, loc, toks):
     for tok in toks:
         result = (result << 16) + tok
 
-    return [ result ]
+    return [ IPv6Address(result) ]
+
+def convert_unspecified(s, loc, toks):
+    """
+    Convert the unspecified address C{::} to zero.
+
+    @param s: The original string
+    @type s: str
+    
+    @param loc: The location in the string that the match occurred
+    @type loc: int
+
+    @param toks: The tokens that make up the unspecified address.
+    @type toks: L{pyparsing.ParseResult}
+
+    @return: Zero.
+    @rtype: int
+    """
+    return [ 0 ]
+
+def convert_ipv6_prefix(s, loc, toks):
+    """
+    Convert an IPv6 prefix to its network address and length.
+
+    @param s: The original string
+    @type s: str
+    
+    @param loc: The location in the string that the match occurred
+    @type loc: int
+
+    @param toks: The tokens that make up the IPv6 prefix.
+    @type toks: L{pyparsing.ParseResult}
+
+    @return: The network address expressed as a 128-bit integer, with
+    any bits past the prefix length cleared, and the prefix length.
+    @rtype: tuple of (int, int)
+    """
+    length = int(toks[1])
+    mask = ((1 << 128) - 1) ^ ((1 << (128 - length)) - 1)
+    return [ (toks[0] & mask, length) ]
+
+def convert_ipv6_range(s, loc, toks):
+    """
+    Convert an IPv6 range, or a single address, to an
+    L{ipyparse.ranges.AddressRange}.
+
+    @param s: The original string
+    @type s: str
+
+    @param loc: The location in the string that the match occurred
+    @type loc: int
+
+    @param toks: The first and last address of the range, or just the
+    one address.
+    @type toks: L{pyparsing.ParseResult}
+
+    @return: The range
+    @rtype: L{ipyparse.ranges.AddressRange}
+    """
+    from pyparsing import ParseException
+    from ipyparse.ranges import AddressRange
+
+    first = toks[0]
+    last = toks[-1]
+    if last < first:
+        raise ParseException(s, loc, 'empty range')
+    return [ AddressRange(first, last, 6) ]
+
+def build_grammar(instrument = None):
+    """
+    Build a new, independent copy of the pyparsing grammar, including
+    its own copy of the IPv4 grammar for the embedded dotted quad.
+
+    Whitespace skipping is turned off on each element rather than by
+    changing pyparsing's default, so building a grammar does not
+    affect other users of pyparsing.
+
+    @param instrument: Count the alternatives of L{IPv6} and time the
+    parse actions of this copy of the grammar.
+    @type instrument: L{ipyparse.instrument.Instrumentation}
+
+    @return: The grammar elements by name.
+    @rtype: dict
+    """
+    from pyparsing import Combine
+    from pyparsing import Literal
+    from pyparsing import Optional
+    from pyparsing import Or
+    from pyparsing import StringEnd
+    from pyparsing import StringStart
+    from pyparsing import Word
+
+    from ipyparse.ipv4 import build_grammar as build_ipv4_grammar
+
+    if instrument is None:
+        from ipyparse.instrument import _plain_action as action
+        from ipyparse.instrument import _plain_alternatives as alternatives
+    else:
+        action = instrument.action
+        alternatives = instrument.alternatives
+
+    IPv4_in_IPv6 = build_ipv4_grammar(instrument)['IPv4_in_IPv6']
+
+    G = Word('0123456789abcdefABCDEF', min = 1, max = 4).setParseAction(action('convert_short', convert_short))
+
+    Colon = Literal(':').suppress()
+    DoubleColon = Literal('::')
+
+    IPv6 = Or(alternatives('IPv6',
+                           [((G + Colon) * 7 + G),
+                            ((G + Colon) * 6 + IPv4_in_IPv6),
+                            (G + (Colon + G) * (0, 6) + DoubleColon),
+                            (G + (Colon + G) * (0, 5) + DoubleColon + G),
+                            (G + (Colon + G) * (0, 4) + DoubleColon + IPv4_in_IPv6),
+                            (G + (Colon + G) * (0, 4) + DoubleColon + (G + Colon) + G),
+                            (G + (Colon + G) * (0, 3) + DoubleColon + (G + Colon) + IPv4_in_IPv6),
+                            (G + (Colon + G) * (0, 3) + DoubleColon + (G + Colon) * 2 + G),
+                            (G + (Colon + G) * (0, 2) + DoubleColon + (G + Colon) * 2 + IPv4_in_IPv6),
+                            (G + (Colon + G) * (0, 2) + DoubleColon + (G + Colon) * 3 + G),
+                            (G + (Colon + G) * (0, 1) + DoubleColon + (G + Colon) * 3 + IPv4_in_IPv6),
+                            (G + (Colon + G) * (0, 1) + DoubleColon + (G + Colon) * 4 + G),
+                            (G                        + DoubleColon + (G + Colon) * 4 + IPv4_in_IPv6),
+                            (G                        + DoubleColon + (G + Colon) * 5 + G),
+                            (DoubleColon + (G + Colon) * (0, 5) + IPv4_in_IPv6),
+                            (DoubleColon + (G + Colon) * (0, 6) + G)]))
+    IPv6.setParseAction(action('convert_ipv6', convert_ipv6))
+
+    IPv6_WholeString = StringStart() + IPv6 + StringEnd()
+
+    Slash = Literal('/').suppress()
+
+    IPv6_PrefixLength = Combine(Word('0123456789', exact = 1) ^
+                                Word('123456789', '0123456789', exact = 2) ^
+                                ('1' + Word('01', '0123456789', exact = 2)) ^
+                                ('12' + Word('012345678', exact = 1)))
+
+    # the unspecified address is only allowed as a prefix, for ::/0
+    Unspecified = Literal('::').setParseAction(action('convert_unspecified', convert_unspecified))
+
+    IPv6_Prefix = ((IPv6 ^ Unspecified) + Slash + IPv6_PrefixLength)
+    IPv6_Prefix.setParseAction(action('convert_ipv6_prefix', convert_ipv6_prefix))
+    IPv6_Prefix_WholeString = StringStart() + IPv6_Prefix + StringEnd()
+
+    Dash = Literal('-').suppress()
+
+    IPv6_Range = (IPv6 + Optional(Dash + IPv6)).setParseAction(action('convert_ipv6_range', convert_ipv6_range))
+    IPv6_Range_WholeString = StringStart() + IPv6_Range + StringEnd()
+
+    grammar = {'G': G,
+               'Colon': Colon,
+               'DoubleColon': DoubleColon,
+               'IPv6': IPv6,
+               'IPv6_WholeString': IPv6_WholeString,
+               'Slash': Slash,
+               'Unspecified': Unspecified,
+               'IPv6_PrefixLength': IPv6_PrefixLength,
+               'IPv6_Prefix': IPv6_Prefix,
+               'IPv6_Prefix_WholeString': IPv6_Prefix_WholeString,
+               'Dash': Dash,
+               'IPv6_Range': IPv6_Range,
+               'IPv6_Range_WholeString': IPv6_Range_WholeString}
+    for element in grammar.values():
+        element.leaveWhitespace()
+        element.streamline()
+    return grammar
+
+_grammar = frozenset(['G', 'Colon', 'DoubleColon', 'IPv6', 'IPv6_WholeString',
+                      'Slash', 'Unspecified', 'IPv6_PrefixLength', 'IPv6_Prefix', 'IPv6_Prefix_WholeString',
+                      'Dash', 'IPv6_Range', 'IPv6_Range_WholeString'])
+_grammar_lock = threading.Lock()
+
+def __getattr__(name):
+    # the module's own grammar is built the first time it is used so
+    # that importing this module (and using parse_ipv6) does not
+    # import pyparsing
+    if name in _grammar:
+        with _grammar_lock:
+            if name not in globals():
+                globals().update(build_grammar())
+        return globals()[name]
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+_hexdigits = frozenset('0123456789abcdefABCDEF')
+
+def _ipv6_value(s):
+    """
+    Convert an IPv6 address to a 128-bit integer.
+
+    The string is split on the double colon (if any), the groups on
+    either side are counted and an embedded dotted quad at the end is
+    converted to the last two groups.  Strings with more colons than
+    any address can have are rejected before they are split.
+
+    @return: The IPv6 address expressed as a 128-bit integer, or
+    C{None} if C{s} is not a valid IPv6 address.
+    @rtype: int
+    """
+    if s.count(':') > 8:
+        return None
+
+    head, sep, tail = s.partition('::')
+    if sep:
+        if '::' in tail:
+            return None
+        left = head.split(':') if head else []
+        right = tail.split(':') if tail else []
+    else:
+        left = []
+        right = s.split(':')
+
+    groups = len(left) + len(right)
+
+    dotted = None
+    if right and '.' in right[-1]:
+        dotted = _ipv4_value(right.pop())
+        if dotted is None:
+            return None
+        groups += 1
+
+    if sep:
+        # the double colon has to stand for at least one group of zeros
+        if not 0 < groups < 8:
+            return None
+        left.extend(['0'] * (8 - groups))
+        left.extend(right)
+    elif groups == 8:
+        left = right
+    else:
+        return None
+
+    result = 0
+    for group in left:
+        if not 0 < len(group) < 5 or not _hexdigits.issuperset(group):
+            return None
+        result = (result << 16) + int(group, 16)
+
+    if dotted is not None:
+        result = (result << 32) + dotted
+
+    return result
+
+_new = int.__new__
+
+# hex digit value of every byte, 16 for anything else
+_nibbles = [16] * 256
+for _c in '0123456789abcdef':
+    _nibbles[ord(_c)] = _nibbles[ord(_c.upper())] = int(_c, 16)
+del _c
+
+def _ipv6_buffer_value(buffer, start, end):
+    """
+    Convert an IPv6 address held in part of a buffer to a 128-bit
+    integer.
+
+    The bytes are read one at a time in place, following the same
+    rules as L{_ipv6_value}, so nothing is decoded or copied.
+
+    @return: The IPv6 address expressed as a 128-bit integer, or
+    C{None} if C{buffer[start:end]} is not a valid IPv6 address.
+    @rtype: int
+    """
+    groups = []
+    gap = None
+    i = start
+    if end - start >= 2 and buffer[i] == 58 and buffer[i + 1] == 58:
+        gap = 0
+        i += 2
+        if i == end:
+            return None
+
+    while i < end:
+        j = i
+        value = 0
+        while j < end:
+            nibble = _nibbles[buffer[j]]
+            if nibble == 16:
+                break
+            value = (value << 4) | nibble
+            j += 1
+
+        if j < end and buffer[j] == 46:
+            # an embedded dotted quad has to be the last thing
+            dotted = _ipv4_buffer_value(buffer, i, end)
+            if dotted is None:
+                return None
+            groups.append(dotted >> 16)
+            groups.append(dotted & 0xffff)
+            break
+
+        if not 0 < j - i < 5:
+            return None
+        groups.append(value)
+        if j == end:
+            break
+        if buffer[j] != 58 or j + 1 == end:
+            return None
+        j += 1
+        if buffer[j] == 58:
+            if gap is not None:
+                return None
+            gap = len(groups)
+            j += 1
+        i = j
+
+    if gap is not None:
+        # the double colon has to stand for at least one group of zeros
+        if len(groups) > 7:
+            return None
+        groups[gap:gap] = [0] * (8 - len(groups))
+    elif len(groups) != 8:
+        return None
+
+    result = 0
+    for group in groups:
+        result = (result << 16) | group
+    return result
+
+def _ipv6_any_value(s, start, end):
+    """
+    Convert an IPv6 address in a string or a buffer.
+
+    @raise TypeError: If C{s} is neither a string nor a buffer.
+    """
+    if isinstance(s, str):
+        if start or end is not None:
+            s = s[start:end]
+        return _ipv6_value(s)
+    if isinstance(s, _buffer_types):
+        start, end, step = slice(start, end).indices(len(s))
+        return _ipv6_buffer_value(s, start, end)
+    raise TypeError('expected a string or a buffer, not {!r}'.format(type(s).__name__))
+
+def parse_ipv6(s, start = 0, end = None):
+    """
+    Convert the string representation of an IPv6 address to a 128-bit number.
+
+    This is a single pass equivalent of
+    C{IPv6_WholeString.parseString(s)[0]} that avoids trying every
+    alternative of the L{IPv6} grammar.  Like
+    L{ipyparse.ipv4.parse_ipv4}, it also parses addresses in place in
+    a C{bytes}, C{bytearray}, C{memoryview} or C{mmap} object.
+
+    @param s: The IPv6 address
+    @type s: str or bytes-like
+
+    @param start: Where the address starts in C{s}.
+    @type start: int
+
+    @param end: Where the address ends in C{s}, by default the end of
+    C{s}.  Like C{start}, it is interpreted as in a slice.
+    @type end: int
+
+    @return: The IPv6 address expressed as a 128-bit integer.
+    @rtype: L{IPv6Address}
+
+    @raise ValueError: If C{s[start:end]} is not a valid IPv6 address.
+    """
+    if s.__class__ is str and not start and end is None:
+        result = _ipv6_value(s)
+    else:
+        result = _ipv6_any_value(s, start, end)
+    if result is None:
+        if not isinstance(s, str):
+            s = bytes(s[start:end])
+        elif start or end is not None:
+            s = s[start:end]
+        raise ValueError('{!r} is not a valid IPv6 address'.format(s))
+    return _new(IPv6Address, result)
+
+def is_valid_ipv6(s, start = 0, end = None):
+    """
+    Check whether a string is a valid IPv6 address.
+
+    This accepts exactly what L{parse_ipv6} accepts, but rejects
+    invalid input without building an exception.
+
+    @param s: The candidate
+    @type s: str or bytes-like
+
+    @param start: Where the candidate starts in C{s}.
+    @type start: int
+
+    @param end: Where the candidate ends in C{s}.
+    @type end: int
+
+    @return: Whether C{s[start:end]} is a valid IPv6 address.
+    Anything that is neither a string nor a buffer is not.
+    @rtype: bool
+    """
+    try:
+        return _ipv6_any_value(s, start, end) is not None
+    except TypeError:
+        return False
+
+_prefix_lengths = dict((str(n), n) for n in range(129))
+
+def parse_ipv6_prefix(s, strict = False):
+    """
+    Convert an IPv6 prefix such as C{2001:db8::/32} to its network
+    address and length.
+
+    This is the equivalent of
+    C{IPv6_Prefix_WholeString.parseString(s)[0]}.  Unlike
+    L{parse_ipv6}, the unspecified address C{::} is accepted so that
+    the default route C{::/0} can be written.
+
+    @param s: The IPv6 prefix
+    @type s: str
+
+    @param strict: Reject prefixes with bits set past the prefix
+    length instead of clearing them.
+    @type strict: bool
+
+    @return: The network address expressed as a 128-bit integer and
+    the prefix length.
+    @rtype: tuple of (int, int)
+
+    @raise ValueError: If C{s} is not a valid IPv6 prefix.
+    """
+    address, sep, length = s.partition('/')
+    length = _prefix_lengths.get(length)
+    if not sep or length is None:
+        raise ValueError('{!r} is not a valid IPv6 prefix'.format(s))
+    try:
+        network = 0 if address == '::' else parse_ipv6(address)
+    except ValueError:
+        raise ValueError('{!r} is not a valid IPv6 prefix'.format(s))
+
+    host = (1 << (128 - length)) - 1
+    if network & host:
+        if strict:
+            raise ValueError('{!r} has host bits set'.format(s))
+        network &= ~host
+    return network, length
+
+@functools.lru_cache(maxsize = 4096)
+def format_ipv6(value):
+    """
+    Convert a 128-bit integer to the canonical text form of an IPv6
+    address described in RFC 5952.
+
+    Groups are written in lower case without leading zeros and the
+    longest run of two or more zero groups (the first, if there is a
+    tie) is replaced by a double colon.  IPv4-mapped addresses are
+    written as C{::ffff:a.b.c.d}.  The most recently formatted
+    addresses are cached, since the same few addresses tend to repeat
+    in logs.
+
+    Zero is formatted as C{::}, as RFC 5952 requires, but
+    L{parse_ipv6} and the L{IPv6} grammar do not accept the
+    unspecified address (only L{parse_ipv6_prefix} does, for
+    C{::/0}), so that one value does not round-trip.
+
+    @param value: The IPv6 address expressed as a 128-bit integer.
+    @type value: int
+
+    @return: The IPv6 address
+    @rtype: str
+
+    @raise ValueError: If C{value} is out of range.
+    """
+    if not 0 <= value < (1 << 128):
+        raise ValueError('{!r} is not a valid IPv6 address'.format(value))
+
+    if value >> 32 == 0xffff:
+        return '::ffff:' + format_ipv4(value & 0xffffffff)
+
+    groups = [(value >> shift) & 0xffff for shift in range(112, -16, -16)]
+
+    # find the longest run of zero groups
+    best, best_length = 0, 0
+    start = None
+    for index, group in enumerate(groups + [1]):
+        if group == 0:
+            if start is None:
+                start = index
+        elif start is not None:
+            if index - start > best_length:
+                best, best_length = start, index - start
+            start = None
+
+    groups = ['{:x}'.format(group) for group in groups]
+    if best_length < 2:
+        return ':'.join(groups)
+    return ':'.join(groups[:best]) + '::' + ':'.join(groups[best + best_length:])
+
+class IPv6Address(int):
+    """
+    An IPv6 address.
+
+    Like L{ipyparse.ipv4.IPv4Address}, this is the 128-bit integer
+    itself with no instance dictionary; C{str()} gives the canonical
+    form from L{format_ipv6}.  It is never equal to an IPv4 address
+    and hashes like the plain integer.
+
+    @see: L{ipyparse.ipv4.IPv4Address.intern}
+    """
+    __slots__ = ()
+
+    family = 6
+
+    intern_limit = 1 << 16
+
+    _interned = {}
+
+    def __new__(cls, value):
+        """
+        @param value: The address as a 128-bit integer or as a string.
+        @type value: int or str
+
+        @raise ValueError: If C{value} is not a valid IPv6 address.
+        """
+        if isinstance(value, str):
+            return parse_ipv6(value)
+        if not 0 <= value < (1 << 128):
+            raise ValueError('{!r} is not a valid IPv6 address'.format(value))
+        return int.__new__(cls, value)
+
+    intern = classmethod(IPv4Address.intern.__func__)
+    clear_interned = classmethod(IPv4Address.clear_interned.__func__)
+
+    __eq__ = IPv4Address.__eq__
+    __ne__ = IPv4Address.__ne__
+    __hash__ = IPv4Address.__hash__
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, format_ipv6(self))
 
-G = Word('0123456789abcdefABCDEF', min = 1, max = 4).setParseAction(convert_short)
+    def __str__(self):
+        return format_ipv6(self)
 
-Colon = Literal(':').suppress()
-DoubleColon = Literal('::')
+    def __reduce__(self):
+        return (self.__class__, (int(self),))
 
-IPv6 = (((G + Colon) * 7 + G) ^
-         ((G + Colon) * 6 + IPv4_in_IPv6) ^
-         (G + (Colon + G) * (0, 6) + DoubleColon) ^
-         (G + (Colon + G) * (0, 5) + DoubleColon + G) ^
-         (G + (Colon + G) * (0, 4) + DoubleColon + IPv4_in_IPv6) ^
-         (G + (Colon + G) * (0, 4) + DoubleColon + (G + Colon) + G) ^
-         (G + (Colon + G) * (0, 3) + DoubleColon + (G + Colon) + IPv4_in_IPv6) ^
-         (G + (Colon + G) * (0, 3) + DoubleColon + (G + Colon) * 2 + G) ^
-         (G + (Colon + G) * (0, 2) + DoubleColon + (G + Colon) * 2 + IPv4_in_IPv6) ^
-         (G + (Colon + G) * (0, 2) + DoubleColon + (G + Colon) * 3 + G) ^
-         (G + (Colon + G) * (0, 1) + DoubleColon + (G + Colon) * 3 + IPv4_in_IPv6) ^
-         (G + (Colon + G) * (0, 1) + DoubleColon + (G + Colon) * 4 + G) ^
-         (G                        + DoubleColon + (G + Colon) * 5 + G) ^
-         (DoubleColon + (G + Colon) * (0, 6) + (G ^ IPv4_in_IPv6))).setParseAction(convert_ipv6)
+    @property
+    def packed(self):
+        """
+        The address as 16 bytes in network order.
+        """
+        return self.to_bytes(16, 'big')
 
-IPv6_WholeString = StringStart() + IPv6 + StringEnd()
+    @property
+    def is_ipv4_mapped(self):
+        """
+        Whether this is an IPv4-mapped address, C{::ffff:a.b.c.d}.
+        """
+        return self >> 32 == 0xffff
 
-ParserElement.setDefaultWhitespaceChars(dwspc)
+    @property
+    def ipv4_mapped(self):
+        """
+        The IPv4 address in the last 32 bits if this is an
+        IPv4-mapped address, otherwise C{None}.
+        """
+        if self >> 32 == 0xffff:
+            return _new(IPv4Address, self & 0xffffffff)
+        return None
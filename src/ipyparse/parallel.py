@@ -0,0 +1,121 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ipyparse.batch import parse_many
+
+def chunk_bounds(path, chunk_size):
+    """
+    Split a file into chunks that start and end on line boundaries.
+
+    @param path: The file
+    @type path: str
+
+    @param chunk_size: The approximate size of each chunk in bytes.
+    @type chunk_size: int
+
+    @return: The start and end offset of each chunk.
+    @rtype: list of tuple of (int, int)
+    """
+    size = os.path.getsize(path)
+    bounds = []
+    with open(path, 'rb') as fileobj:
+        start = 0
+        while start < size:
+            fileobj.seek(min(start + chunk_size, size))
+            # finish the line that the cut falls in
+            fileobj.readline()
+            end = min(fileobj.tell(), size)
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+_warm_up = {4: ['10.0.0.1', '00000000.1.2.3'],
+            6: ['2001:db8::1', '::ffff:10.0.0.1']}
+"""
+Rows parsed by each worker when it starts: one that the vectorized
+scan converts and one that it leaves to the fallback parser.
+"""
+
+def _init_worker(family):
+    """
+    Parse a few rows when a worker starts, so that numpy is imported
+    and both the vectorized scan and the fallback parser have run
+    once before the first chunk arrives.
+    """
+    parse_many(_warm_up[family], family = family)
+
+def _parse_chunk(path, start, end, family):
+    """
+    Parse the lines of one chunk of a file in a worker.
+
+    @return: The values and validity mask from L{parse_many}.
+    @rtype: tuple of (L{numpy.ndarray}, L{numpy.ndarray})
+    """
+    with open(path, 'rb') as fileobj:
+        fileobj.seek(start)
+        data = fileobj.read(end - start)
+    # latin-1 never fails to decode; anything outside ASCII is invalid anyway
+    return parse_many([line.decode('latin-1') for line in data.splitlines()], family = family)
+
+def parse_file_parallel(path, family = 4, workers = None, chunk_size = 1 << 22):
+    """
+    Parse a file of addresses, one per line, using a pool of processes.
+
+    The file is split into chunks on line boundaries and each chunk
+    is parsed with L{parse_many} in a worker process.  Only a few
+    chunks per worker are in flight at once, so results are streamed
+    back in file order without holding the whole file in memory.
+
+    @param path: The file
+    @type path: str
+
+    @param family: The address family, 4 or 6.
+    @type family: int
+
+    @param workers: The number of worker processes, by default the
+    number of CPUs.
+    @type workers: int
+
+    @param chunk_size: The approximate size of each chunk in bytes.
+    @type chunk_size: int
+
+    @return: A generator of the values and validity mask of each
+    chunk, in order.
+    """
+    if family not in (4, 6):
+        raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    bounds = chunk_bounds(path, chunk_size)
+    with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker,
+                             initargs = (family,)) as executor:
+        window = 2 * workers
+        pending = collections.deque()
+        for start, end in bounds:
+            pending.append(executor.submit(_parse_chunk, path, start, end, family))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
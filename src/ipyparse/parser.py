@@ -0,0 +1,99 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+from ipyparse import ipv4
+from ipyparse import ipv6
+
+class Parser(object):
+    """
+    A parser that owns its own copy of the IPv4 and IPv6 grammars.
+
+    The grammars are built and streamlined when the parser is created
+    and are not changed afterwards; whitespace skipping is turned off
+    on each element instead of through pyparsing's global default.
+    One parser can therefore be used from many threads at once (for
+    example from a C{ThreadPoolExecutor}) without locking, and
+    without affecting or being affected by other users of pyparsing.
+
+    @ivar Octet: The octet grammar.
+    @ivar IPv4: The IPv4 grammar.
+    @ivar IPv4_in_IPv6: The grammar for an IPv4 address embedded in
+    an IPv6 address.
+    @ivar IPv4_WholeString: The IPv4 grammar anchored at both ends.
+    @ivar G: The grammar for one group of an IPv6 address.
+    @ivar IPv6: The IPv6 grammar.
+    @ivar IPv6_WholeString: The IPv6 grammar anchored at both ends.
+    @ivar IPv4_Range_WholeString: The IPv4 range and wildcard grammar
+    anchored at both ends.
+    @ivar IPv6_Range_WholeString: The IPv6 range grammar anchored at
+    both ends.
+    """
+
+    def __init__(self, instrument = None):
+        """
+        @param instrument: Record counters and timings for this
+        parser's grammars and parse methods.
+        @type instrument: L{ipyparse.instrument.Instrumentation}
+        """
+        for name, element in ipv4.build_grammar(instrument).items():
+            if not name.startswith('_'):
+                setattr(self, name, element)
+        for name, element in ipv6.build_grammar(instrument).items():
+            setattr(self, name, element)
+        if instrument is not None:
+            self.parse_ipv4 = instrument.wrap('Parser.parse_ipv4', self.parse_ipv4)
+            self.parse_ipv6 = instrument.wrap('Parser.parse_ipv6', self.parse_ipv6)
+
+    def parse_ipv4(self, s):
+        """
+        Convert an IPv4 address to a 32-bit integer with the grammar.
+
+        @param s: The IPv4 address
+        @type s: str
+
+        @return: The IPv4 address expressed as a 32-bit integer.
+        @rtype: int
+
+        @raise ValueError: If C{s} is not a valid IPv4 address.
+        """
+        from pyparsing import ParseException
+
+        try:
+            return self.IPv4_WholeString.parseString(s)[0]
+        except ParseException:
+            raise ValueError('{!r} is not a valid IPv4 address'.format(s))
+
+    def parse_ipv6(self, s):
+        """
+        Convert an IPv6 address to a 128-bit integer with the grammar.
+
+        @param s: The IPv6 address
+        @type s: str
+
+        @return: The IPv6 address expressed as a 128-bit integer.
+        @rtype: int
+
+        @raise ValueError: If C{s} is not a valid IPv6 address.
+        """
+        from pyparsing import ParseException
+
+        try:
+            return self.IPv6_WholeString.parseString(s)[0]
+        except ParseException:
+            raise ValueError('{!r} is not a valid IPv6 address'.format(s))
@@ -0,0 +1,178 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import bisect
+
+_missing = object()
+
+class PrefixIndex(object):
+    """
+    A longest-prefix-match index over the integers produced by
+    L{ipyparse.ipv4.parse_ipv4} or L{ipyparse.ipv6.parse_ipv6}.
+
+    The prefixes are flattened into a sorted list of disjoint ranges,
+    each of which maps to the most specific prefix covering it, so a
+    lookup is a single binary search however deeply the prefixes are
+    nested.  There are at most two ranges per prefix, which keeps the
+    index to a few flat lists.  The ranges are rebuilt on the first
+    lookup after prefixes are added, so load prefixes in bulk with
+    L{update} before looking anything up.
+
+    >>> index = PrefixIndex(family = 4)
+    >>> index.update([parse_ipv4_prefix('10.0.0.0/8'),
+    ...               parse_ipv4_prefix('10.1.0.0/16')])
+    >>> index.lookup(parse_ipv4('10.1.2.3'))
+    (167837696, 16)
+
+    @ivar family: The address family, 4 or 6.
+    @ivar bits: The width of an address in bits.
+    """
+
+    def __init__(self, family = 4):
+        """
+        @param family: The address family, 4 or 6.
+        @type family: int
+        """
+        if family not in (4, 6):
+            raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+        self.family = family
+        self.bits = 32 if family == 4 else 128
+        self._prefixes = {}
+        self._starts = None
+        self._values = None
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def add(self, network, length, value = _missing):
+        """
+        Add a prefix, replacing any value already stored for it.
+
+        @param network: The network address
+        @type network: int
+
+        @param length: The prefix length
+        @type length: int
+
+        @param value: What a lookup that matches this prefix returns;
+        by default the tuple C{(network, length)}.
+        """
+        if not 0 <= length <= self.bits:
+            raise ValueError('invalid prefix length {!r}'.format(length))
+        host = (1 << (self.bits - length)) - 1
+        if network & host or not 0 <= network < (1 << self.bits):
+            raise ValueError('invalid network address {!r} for length {!r}'.format(network, length))
+        if value is _missing:
+            value = (network, length)
+        self._prefixes[(network, length)] = value
+        self._starts = None
+
+    def update(self, prefixes):
+        """
+        Add many prefixes at once.
+
+        @param prefixes: The prefixes, either as C{(network, length)}
+        as returned by L{ipyparse.ipv4.parse_ipv4_prefix} and
+        L{ipyparse.ipv6.parse_ipv6_prefix}, or as
+        C{(network, length, value)}.
+        @type prefixes: iterable of tuple
+        """
+        for prefix in prefixes:
+            self.add(*prefix)
+
+    def remove(self, network, length):
+        """
+        Remove a prefix.
+
+        @raise KeyError: If the prefix is not in the index.
+        """
+        del self._prefixes[(network, length)]
+        self._starts = None
+
+    def _build(self):
+        """
+        Flatten the prefixes into disjoint ranges.
+
+        Prefixes are visited in order of their first address, shorter
+        prefixes first, keeping a stack of the prefixes that enclose
+        the current one.  A range starts at the first address of every
+        prefix and just past the last address of every prefix, where
+        the enclosing prefix (if any) takes over again.
+        """
+        starts = [0]
+        values = [_missing]
+
+        def mark(start, value):
+            if starts[-1] == start:
+                values[-1] = value
+            elif values[-1] is not value:
+                starts.append(start)
+                values.append(value)
+
+        stack = []
+        for network, length in sorted(self._prefixes):
+            while stack and stack[-1][0] <= network:
+                end, value = stack.pop()
+                mark(end, stack[-1][1] if stack else _missing)
+            end = network + (1 << (self.bits - length))
+            value = self._prefixes[(network, length)]
+            mark(network, value)
+            stack.append((end, value))
+        while stack:
+            end, value = stack.pop()
+            mark(end, stack[-1][1] if stack else _missing)
+
+        self._starts = starts
+        self._values = values
+
+    def lookup(self, address, default = None):
+        """
+        Find the longest prefix that contains an address.
+
+        @param address: The address
+        @type address: int
+
+        @return: The value of the longest matching prefix, or
+        C{default} if no prefix matches.
+        """
+        if self._starts is None:
+            self._build()
+        value = self._values[bisect.bisect_right(self._starts, address) - 1]
+        return default if value is _missing else value
+
+    def lookup_many(self, addresses, default = None):
+        """
+        Find the longest matching prefix of many addresses.
+
+        @param addresses: The addresses, for example the values from
+        L{ipyparse.batch.parse_many} for IPv4.
+        @type addresses: iterable of int
+
+        @return: The value of the longest matching prefix of each
+        address, or C{default} where no prefix matches.
+        @rtype: list
+        """
+        if self._starts is None:
+            self._build()
+        if hasattr(addresses, 'tolist'):
+            addresses = addresses.tolist()
+        starts = self._starts
+        values = self._values
+        result = [values[bisect.bisect_right(starts, address) - 1] for address in addresses]
+        return [default if value is _missing else value for value in result]
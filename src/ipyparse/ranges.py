@@ -0,0 +1,283 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import itertools
+
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import _ipv4_value
+from ipyparse.ipv4 import _octets
+from ipyparse.ipv4 import format_ipv4
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import _ipv6_value
+from ipyparse.ipv6 import format_ipv6
+
+_new = int.__new__
+
+def _address_value(address, family):
+    """
+    @return: The integer value of an address given as an integer or
+    a string, or C{None} if it is not a valid address of the family
+    or is an address of the other family.
+    """
+    if isinstance(address, str):
+        return (_ipv4_value if family == 4 else _ipv6_value)(address)
+    if getattr(address, 'family', family) != family:
+        return None
+    return address
+
+class AddressRange(object):
+    """
+    Every address from C{first} to C{last} inclusive, such as
+    C{10.0.0.1-10.0.3.255}.
+
+    Nothing is expanded: the length and membership tests are simple
+    arithmetic, and iteration produces one address at a time.
+
+    @ivar first: The first address in the range.
+    @ivar last: The last address in the range.
+    @ivar family: The address family, 4 or 6.
+    """
+    __slots__ = ['first', 'last', 'family']
+
+    def __init__(self, first, last, family = 4):
+        if family not in (4, 6):
+            raise ValueError('family must be 4 or 6, not {!r}'.format(family))
+        if not 0 <= first <= last < (1 << (32 if family == 4 else 128)):
+            raise ValueError('invalid range {!r} to {!r}'.format(first, last))
+        self.first = first
+        self.last = last
+        self.family = family
+
+    @property
+    def size(self):
+        """
+        The number of addresses in the range.  Unlike C{len()} this
+        also works for IPv6 ranges of more than C{sys.maxsize}
+        addresses.
+        """
+        return self.last - self.first + 1
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, address):
+        address = _address_value(address, self.family)
+        return address is not None and self.first <= address <= self.last
+
+    def __iter__(self):
+        cls = IPv4Address if self.family == 4 else IPv6Address
+        for value in range(self.first, self.last + 1):
+            yield _new(cls, value)
+
+    def __getitem__(self, index):
+        size = self.size
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('range index out of range')
+        return _new(IPv4Address if self.family == 4 else IPv6Address, self.first + index)
+
+    def intervals(self):
+        """
+        @return: The first and last address of each interval that
+        makes up the range, in order.
+        @rtype: iterable of tuple of (int, int)
+        """
+        return [(self.first, self.last)]
+
+    def __eq__(self, other):
+        if not isinstance(other, AddressRange):
+            return NotImplemented
+        return (self.first, self.last, self.family) == (other.first, other.last, other.family)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash((self.first, self.last, self.family))
+
+    def __repr__(self):
+        format = format_ipv4 if self.family == 4 else format_ipv6
+        return '{}({!r})'.format(self.__class__.__name__, '{}-{}'.format(format(self.first), format(self.last)))
+
+class WildcardRange(object):
+    """
+    The IPv4 addresses matching a pattern such as C{192.168.*.1},
+    where each C{*} stands for any octet.
+
+    Like L{AddressRange}, nothing is expanded.  A membership test
+    checks the four octets against the pattern.
+
+    @ivar octets: The value of each octet, or C{None} for a wildcard.
+    @type octets: tuple of int
+    """
+    __slots__ = ['octets']
+
+    family = 4
+
+    def __init__(self, octets):
+        octets = tuple(octets)
+        if len(octets) != 4 or any(octet is not None and not 0 <= octet <= 255 for octet in octets):
+            raise ValueError('invalid wildcard {!r}'.format(octets))
+        self.octets = octets
+
+    @property
+    def size(self):
+        """
+        The number of addresses matching the pattern.
+        """
+        return 256 ** self.octets.count(None)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, address):
+        address = _address_value(address, 4)
+        if address is None or not 0 <= address <= 0xffffffff:
+            return False
+        for shift, octet in zip((24, 16, 8, 0), self.octets):
+            if octet is not None and (address >> shift) & 0xff != octet:
+                return False
+        return True
+
+    def _choices(self):
+        return [range(256) if octet is None else (octet,) for octet in self.octets]
+
+    def __iter__(self):
+        for a, b, c, d in itertools.product(*self._choices()):
+            yield _new(IPv4Address, (a << 24) | (b << 16) | (c << 8) | d)
+
+    def intervals(self):
+        """
+        @return: The first and last address of each interval that
+        makes up the pattern, in order.  Trailing wildcards make one
+        interval per combination of the octets before them.
+        @rtype: generator of tuple of (int, int)
+        """
+        fixed = 4
+        while fixed and self.octets[fixed - 1] is None:
+            fixed -= 1
+        block = 256 ** (4 - fixed)
+        for head in itertools.product(*self._choices()[:fixed]):
+            first = 0
+            for octet in head:
+                first = (first << 8) | octet
+            first *= block
+            yield first, first + block - 1
+
+    def __eq__(self, other):
+        if not isinstance(other, WildcardRange):
+            return NotImplemented
+        return self.octets == other.octets
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(self.octets)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__,
+                                 '.'.join('*' if octet is None else str(octet) for octet in self.octets))
+
+def from_wildcard(octets):
+    """
+    Make the simplest range for a wildcard pattern: an
+    L{AddressRange} if the wildcards are all at the end (as in
+    C{10.1.*.*}) and a L{WildcardRange} otherwise.
+
+    @param octets: The value of each octet, or C{None} for a wildcard.
+    @type octets: sequence of int
+    """
+    fixed = 4
+    while fixed and octets[fixed - 1] is None:
+        fixed -= 1
+    if None in octets[:fixed]:
+        return WildcardRange(octets)
+    first = 0
+    for octet in octets[:fixed]:
+        first = (first << 8) | octet
+    first <<= 8 * (4 - fixed)
+    return AddressRange(first, first + (1 << (8 * (4 - fixed))) - 1, 4)
+
+def parse_ipv4_range(s):
+    """
+    Convert an IPv4 range such as C{10.0.0.1-10.0.3.255} or a
+    wildcard pattern such as C{192.168.*.*} to a lazy range.
+
+    This is the equivalent of
+    C{IPv4_Range_WholeString.parseString(s)[0]}.  A single address is
+    a range of one address.
+
+    @param s: The range
+    @type s: str
+
+    @rtype: L{AddressRange} or L{WildcardRange}
+
+    @raise ValueError: If C{s} is not a valid IPv4 range.
+    """
+    first, sep, last = s.partition('-')
+    if sep:
+        first = _ipv4_value(first)
+        last = _ipv4_value(last)
+        if first is None or last is None or last < first:
+            raise ValueError('{!r} is not a valid IPv4 range'.format(s))
+        return AddressRange(first, last, 4)
+
+    octets = s.split('.')
+    if len(octets) != 4:
+        raise ValueError('{!r} is not a valid IPv4 range'.format(s))
+    values = []
+    for octet in octets:
+        if octet == '*':
+            values.append(None)
+            continue
+        value = _octets.get(octet)
+        if value is None:
+            # any number of zeros is also allowed
+            if not octet or octet.strip('0'):
+                raise ValueError('{!r} is not a valid IPv4 range'.format(s))
+            value = 0
+        values.append(value)
+    return from_wildcard(values)
+
+def parse_ipv6_range(s):
+    """
+    Convert an IPv6 range such as C{2001:db8::1-2001:db8::ff} to a
+    lazy range.
+
+    This is the equivalent of
+    C{IPv6_Range_WholeString.parseString(s)[0]}.  A single address is
+    a range of one address.
+
+    @param s: The range
+    @type s: str
+
+    @rtype: L{AddressRange}
+
+    @raise ValueError: If C{s} is not a valid IPv6 range.
+    """
+    first, sep, last = s.partition('-')
+    first = _ipv6_value(first)
+    last = _ipv6_value(last) if sep else first
+    if first is None or last is None or last < first:
+        raise ValueError('{!r} is not a valid IPv6 range'.format(s))
+    return AddressRange(first, last, 6)
@@ -0,0 +1,132 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import pickle
+import random
+import unittest
+from ipyparse.aggregate import Aggregator
+from ipyparse.batch import numpy
+from ipyparse.batch import parse_many
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import parse_ipv6
+
+def stream(seed, size):
+    """
+    A skewed stream of IPv4 addresses: a few heavy hitters in one
+    /24 and many addresses seen once.
+    """
+    generator = random.Random(seed)
+    heavy = [0x0a000001, 0x0a000002, 0x0a000003]
+    return [generator.choice(heavy) if generator.random() < 0.3 else generator.randrange(1 << 32)
+            for i in range(size)]
+
+class TestAggregator(unittest.TestCase):
+    def test_exact(self):
+        aggregator = Aggregator(family = 4, lengths = [16, 24])
+        for address in ['10.0.0.1', '10.0.0.1', '10.0.0.2', '10.0.1.1', '192.168.1.1']:
+            aggregator.add(parse_ipv4(address))
+        self.assertTrue(aggregator.is_exact())
+        self.assertEqual(aggregator.total, 5)
+        self.assertEqual(aggregator.count(parse_ipv4('10.0.0.1')), 2)
+        self.assertEqual(aggregator.count(parse_ipv4('10.0.0.99'), 24), 3)
+        self.assertEqual(aggregator.count(parse_ipv4('10.0.99.99'), 16), 4)
+        self.assertEqual(aggregator.top(1), [(parse_ipv4('10.0.0.1'), 2)])
+        self.assertEqual(aggregator.top(2, length = 24),
+                         [(parse_ipv4('10.0.0.0'), 3), (parse_ipv4('10.0.1.0'), 1)])
+        self.assertIsInstance(aggregator.top(1)[0][0], IPv4Address)
+        self.assertRaises(ValueError, aggregator.top, 1, 8)
+        self.assertRaises(ValueError, aggregator.add, parse_ipv4('10.0.0.1'), -5)
+        self.assertEqual(aggregator.total, 5)
+
+    def test_ipv6(self):
+        aggregator = Aggregator(family = 6)
+        aggregator.update([parse_ipv6('2001:db8::1'), parse_ipv6('2001:db8::2'), parse_ipv6('2001:db8:1::1')])
+        self.assertEqual(aggregator.lengths, [64, 128])
+        self.assertEqual(aggregator.top(1, length = 64), [(parse_ipv6('2001:db8::'), 2)])
+        self.assertIsInstance(aggregator.top(1)[0][0], IPv6Address)
+        self.assertRaises(ValueError, aggregator.add, 1 << 128)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_arrays(self):
+        addresses = stream(1, 2000)
+        expected = Aggregator(family = 4)
+        expected.update(addresses)
+        aggregator = Aggregator(family = 4)
+        aggregator.update(numpy.array(addresses, dtype = numpy.uint32))
+        self.assertEqual(aggregator.top(5), expected.top(5))
+        self.assertEqual(aggregator.top(5, length = 24), expected.top(5, length = 24))
+        self.assertEqual(aggregator.total, expected.total)
+
+        values, valid = parse_many(['::1', '::1', '::2'], family = 6)
+        aggregator = Aggregator(family = 6)
+        aggregator.update(values)
+        self.assertEqual(aggregator.top(1), [(1, 2)])
+
+    def test_sketch(self):
+        addresses = stream(2, 20000)
+        truth = collections.Counter(addresses)
+        aggregator = Aggregator(family = 4, max_exact = 500, width = 1024, heavy = 10)
+        aggregator.update(addresses)
+        self.assertFalse(aggregator.is_exact())
+        self.assertFalse(aggregator.is_exact(24))
+        self.assertEqual([address for address, count in aggregator.top(3)],
+                         [address for address, count in truth.most_common(3)])
+        # a count-min sketch never underestimates
+        for address in list(truth)[:500]:
+            self.assertTrue(aggregator.count(address) >= truth[address])
+        self.assertEqual(aggregator.top(1, length = 24)[0][0], parse_ipv4('10.0.0.0'))
+
+    def test_single_heavy_hitter(self):
+        aggregator = Aggregator(family = 4, max_exact = 10, width = 1024, heavy = 1)
+        aggregator.update(stream(5, 5000))
+        self.assertIn(aggregator.top(3)[0][0], [0x0a000001, 0x0a000002, 0x0a000003])
+        self.assertEqual(len(aggregator.top(3)), 1)
+        self.assertRaises(ValueError, Aggregator, heavy = 0)
+
+    def test_merge(self):
+        first = stream(3, 6000)
+        second = stream(4, 6000)
+        whole = Aggregator(family = 4, max_exact = 500, width = 1024, heavy = 10)
+        whole.update(first + second)
+        for exact in (False, True):
+            left = Aggregator(family = 4, max_exact = 500, width = 1024, heavy = 10)
+            right = Aggregator(family = 4, max_exact = 500, width = 1024, heavy = 10)
+            left.update(first)
+            right.update(second[:100] if exact else second)
+            right = pickle.loads(pickle.dumps(right))
+            self.assertEqual(right.is_exact(), exact)
+            left.merge(right)
+            if not exact:
+                # the merged sketch is the sketch of the whole stream
+                self.assertEqual(left.top(3), whole.top(3))
+                self.assertEqual(left.total, whole.total)
+
+    def test_merge_exact(self):
+        left = Aggregator(family = 4)
+        right = Aggregator(family = 4)
+        left.add(parse_ipv4('10.0.0.1'))
+        right.add(parse_ipv4('10.0.0.1'), 2)
+        left.merge(right)
+        self.assertEqual(left.count(parse_ipv4('10.0.0.1')), 3)
+        self.assertTrue(left.is_exact())
+        self.assertRaises(ValueError, left.merge, Aggregator(family = 4, lengths = [16]))
+        self.assertRaises(ValueError, left.merge, Aggregator(family = 4, seed = 1))
@@ -0,0 +1,88 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from ipyparse.aio import parse_lines
+from ipyparse.aio import parse_stream
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv6 import IPv6Address
+
+def collect(data, **kwargs):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [address async for address in parse_stream(reader, **kwargs)]
+    return asyncio.run(run())
+
+class TestParseStream(unittest.TestCase):
+    def test_lines(self):
+        result = collect(b'10.0.0.1\n::1\r\nnot an address\n\n2001:db8::1')
+        self.assertEqual(result, [167772161, 1, 0x20010db8000000000000000000000001])
+        self.assertIsInstance(result[0], IPv4Address)
+        self.assertIsInstance(result[1], IPv6Address)
+
+    def test_family(self):
+        self.assertEqual(collect(b'10.0.0.1\n::1\n', family = 6), [1])
+        self.assertRaises(ValueError, collect, b'', family = 5)
+
+    def test_extract(self):
+        result = collect(b'<13>Oct 18 sshd: Failed password from 192.0.2.7 port 22\n'
+                         b'<13>Oct 18 sshd: Accepted key from 2001:db8::7\n',
+                         extract = True)
+        self.assertEqual([str(address) for address in result], ['192.0.2.7', '2001:db8::7'])
+
+    def test_order_with_offload(self):
+        lines = ['10.{}.{}.{}'.format(i >> 16, (i >> 8) & 255, i & 255) for i in range(20000)]
+        data = '\n'.join(lines).encode('ascii')
+        with ThreadPoolExecutor(max_workers = 4) as executor:
+            result = collect(data, chunk_size = 1000, offload_threshold = 10, executor = executor)
+        self.assertEqual([str(address) for address in result], lines)
+
+    def test_long_line(self):
+        data = b'1.1.1.1\n' + b'9' * 5000 + b'\n2.2.2.2\n'
+        self.assertEqual([str(address) for address in collect(data, chunk_size = 64, max_line = 100)],
+                         ['1.1.1.1', '2.2.2.2'])
+
+    def test_long_line_in_chunk(self):
+        # a whole long line inside one chunk is skipped as well
+        data = b'1.1.1.1\n' + b'x 3.3.3.3 ' * 22 + b'\n2.2.2.2\n'
+        self.assertEqual([str(address) for address in collect(data, max_line = 50, extract = True)],
+                         ['1.1.1.1', '2.2.2.2'])
+
+    def test_offload_bytes(self):
+        submitted = []
+
+        class Executor(ThreadPoolExecutor):
+            def submit(self, *args, **kwargs):
+                submitted.append(args)
+                return ThreadPoolExecutor.submit(self, *args, **kwargs)
+
+        data = b'\n'.join([b'x ' * 1000 + b'10.0.0.1'] * 3) + b'\n'
+        with Executor(max_workers = 1) as executor:
+            result = collect(data, extract = True, offload_bytes = 1024, executor = executor)
+            self.assertEqual(result, [167772161] * 3)
+            self.assertEqual(len(submitted), 1)
+            result = collect(data, extract = True, offload_bytes = 1 << 20, executor = executor)
+            self.assertEqual(len(submitted), 1)
+
+    def test_lines_batch(self):
+        self.assertEqual(parse_lines([b'1.2.3.4', b'bad', b' ::1 ']), [16909060, 1])
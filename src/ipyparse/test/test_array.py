@@ -0,0 +1,81 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from ipyparse.batch import numpy
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv6 import IPv6Address
+
+if numpy is not None:
+    from ipyparse.array import AddressArray
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestAddressArray(unittest.TestCase):
+    def test_parse(self):
+        addresses = AddressArray.parse(['10.0.0.2', 'bad', '10.0.0.1'])
+        self.assertEqual(len(addresses), 2)
+        self.assertEqual(addresses.tolist(), [167772162, 167772161])
+        self.assertIsInstance(addresses[0], IPv4Address)
+
+    def test_sort_unique_ipv4(self):
+        addresses = AddressArray([3, 1, 2, 1, 0xffffffff])
+        self.assertEqual(addresses.sort().tolist(), [1, 1, 2, 3, 0xffffffff])
+        self.assertEqual(addresses.unique().tolist(), [1, 2, 3, 0xffffffff])
+
+    def test_sort_unique_ipv6(self):
+        values = [1 << 64, 1, (1 << 128) - 1, 1 << 64, 256]
+        addresses = AddressArray(values, family = 6)
+        self.assertEqual(addresses.sort().tolist(), sorted(values))
+        self.assertEqual(addresses.unique().tolist(), sorted(set(values)))
+        self.assertIsInstance(addresses[0], IPv6Address)
+
+    def test_contains(self):
+        addresses = AddressArray.parse(['2001:db8::1', '::1', '2001:db8::'], family = 6)
+        self.assertIn(1, addresses)
+        self.assertNotIn(2, addresses)
+        self.assertNotIn('bad', addresses)
+        self.assertEqual(list(addresses.contains_many([1, 2, 0x20010db8000000000000000000000000])),
+                         [True, False, True])
+        self.assertEqual(list(AddressArray().contains_many([1])), [False])
+
+    def test_set_operations(self):
+        a = AddressArray([1, 2, 3, 3])
+        b = AddressArray([3, 4])
+        self.assertEqual((a | b).tolist(), [1, 2, 3, 4])
+        self.assertEqual((a & b).tolist(), [3])
+        self.assertEqual((a - b).tolist(), [1, 2])
+        self.assertEqual(a.union([5]).tolist(), [1, 2, 3, 5])
+        self.assertRaises(ValueError, a.union, AddressArray([1], family = 6))
+
+    def test_set_operations_ipv6(self):
+        a = AddressArray([1 << 100, 1, 1 << 64], family = 6)
+        b = AddressArray([1 << 64, 2], family = 6)
+        self.assertEqual((a | b).tolist(), [1, 2, 1 << 64, 1 << 100])
+        self.assertEqual((a & b).tolist(), [1 << 64])
+        self.assertEqual((a - b).tolist(), [1, 1 << 100])
+
+    def test_slice_is_a_view(self):
+        addresses = AddressArray(range(10))
+        part = addresses[2:5]
+        self.assertTrue(numpy.shares_memory(part.values, addresses.values))
+        self.assertEqual(part.tolist(), [2, 3, 4])
+
+    def test_bad_family(self):
+        self.assertRaises(ValueError, AddressArray, [], family = 5)
+        self.assertRaises(ValueError, AddressArray, [1 << 128], family = 6)
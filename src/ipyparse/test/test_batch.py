@@ -0,0 +1,100 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from ipyparse.batch import format_many
+from ipyparse.batch import numpy
+from ipyparse.batch import parse_many
+from ipyparse.test import test_ipv4
+from ipyparse.test import test_ipv6
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestParseMany(unittest.TestCase):
+    def test_ipv4(self):
+        good = [address for counter, address, expected in test_ipv4.good]
+        bad = [address for counter, address in test_ipv4.bad]
+        values, valid = parse_many(good + bad, family = 4)
+        self.assertEqual(values.dtype, numpy.uint32)
+        self.assertEqual(list(valid), [True] * len(good) + [False] * len(bad))
+        self.assertEqual(list(values),
+                         [expected for counter, address, expected in test_ipv4.good] + [0] * len(bad))
+
+    def test_ipv6(self):
+        good = [address for counter, address, expected in test_ipv6.good]
+        bad = [address for counter, address in test_ipv6.bad]
+        values, valid = parse_many(good + bad, family = 6)
+        self.assertEqual(list(valid), [True] * len(good) + [False] * len(bad))
+        self.assertEqual([(int(value['hi']) << 64) + int(value['lo']) for value in values],
+                         [expected for counter, address, expected in test_ipv6.good] + [0] * len(bad))
+
+    def test_ipv6_packed(self):
+        values, valid = parse_many(['2001:db8::1', '::ffff:1.2.3.4'], family = 6)
+        packed = values.view(numpy.uint8).reshape(-1, 16)
+        self.assertEqual(packed[0].tobytes(), b'\x20\x01\x0d\xb8' + b'\x00' * 11 + b'\x01')
+        self.assertEqual(packed[1].tobytes(), b'\x00' * 10 + b'\xff\xff\x01\x02\x03\x04')
+
+    def test_fallback(self):
+        # too long for the vectorized scan but still valid
+        values, valid = parse_many(['00000000.1.2.3', '1.2.3.4.5.6.7.8'], family = 4)
+        self.assertEqual(list(valid), [True, False])
+        self.assertEqual(values[0], 0x00010203)
+
+    def test_chunks(self):
+        addresses = ['10.0.{}.{}'.format(i // 256, i % 256) for i in range(1000)]
+        values, valid = parse_many(addresses, family = 4, chunk_size = 64)
+        self.assertTrue(valid.all())
+        self.assertEqual(list(values), [0x0a000000 + i for i in range(1000)])
+
+    def test_empty(self):
+        values, valid = parse_many([], family = 6)
+        self.assertEqual(len(values), 0)
+        self.assertEqual(len(valid), 0)
+
+    def test_bad_family(self):
+        self.assertRaises(ValueError, parse_many, ['1.2.3.4'], family = 5)
+
+class TestFormatMany(unittest.TestCase):
+    def test_ipv4_list(self):
+        self.assertEqual(format_many([2130706433, 0]), ['127.0.0.1', '0.0.0.0'])
+
+    def test_ipv6_list(self):
+        self.assertEqual(format_many([1, 0xffff01020304], family = 6), ['::1', '::ffff:1.2.3.4'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_ipv4_out_of_range(self):
+        self.assertRaises(ValueError, format_many, numpy.array([1 << 32], dtype = numpy.uint64))
+        self.assertRaises(ValueError, format_many, numpy.array([-1], dtype = numpy.int64))
+        self.assertEqual(format_many(numpy.array([0xffffffff], dtype = numpy.int64)), ['255.255.255.255'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_ipv4_round_trip(self):
+        addresses = ['010.0.0.1', '255.255.255.255', '1.2.3', '0.0.0.0']
+        values, valid = parse_many(addresses, family = 4)
+        self.assertEqual(format_many(values, family = 4, valid = valid),
+                         ['10.0.0.1', '255.255.255.255', None, '0.0.0.0'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_ipv6_round_trip(self):
+        addresses = ['2001:0DB8:0:0:0:0:0:1', '::ffff:1.2.3.4', '1::2::3', '0:0:0:0:0:0:0:1']
+        values, valid = parse_many(addresses, family = 6)
+        self.assertEqual(format_many(values, family = 6, valid = valid),
+                         ['2001:db8::1', '::ffff:1.2.3.4', None, '::1'])
+
+    def test_bad_family(self):
+        self.assertRaises(ValueError, format_many, [1], family = 5)
@@ -0,0 +1,80 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import random
+import unittest
+from ipyparse.benchmark import corpus
+from ipyparse.benchmark import suite
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv6 import parse_ipv6
+
+class TestCorpus(unittest.TestCase):
+    def test_repeatable(self):
+        for name, generate in corpus.corpora.items():
+            self.assertEqual(generate(random.Random(1), 50), generate(random.Random(1), 50))
+
+    def test_valid(self):
+        for address in corpus.random_ipv4(random.Random(0), 200):
+            parse_ipv4(address)
+        for name in ['uncompressed_ipv6', 'compressed_ipv6', 'mapped_ipv6']:
+            for address in getattr(corpus, name)(random.Random(0), 200):
+                parse_ipv6(address)
+
+    def test_invalid(self):
+        for address in corpus.invalid_ipv4(random.Random(0), 200):
+            self.assertRaises(ValueError, parse_ipv4, address)
+        for address in corpus.invalid_ipv6(random.Random(0), 200):
+            self.assertRaises(ValueError, parse_ipv6, address)
+
+class TestSuite(unittest.TestCase):
+    def test_measure(self):
+        result = suite.measure(parse_ipv4, ['1.2.3.4', '1.2.3'] * 10)
+        self.assertEqual(result['count'], 20)
+        self.assertTrue(result['ops_per_sec'] > 0)
+        latency = result['latency_ns']
+        self.assertTrue(latency['p50'] <= latency['p90'] <= latency['p99'] <= latency['max'])
+
+    def test_grammars_whole_input(self):
+        # a grammar only counts as a success if it takes the whole input
+        factories = dict((entry[0], entry[1]) for entry in suite.entry_points)
+        octet = factories['Octet']()
+        self.assertEqual(octet('255')[0], 255)
+        for vector in ['256', '1.2', '00256']:
+            self.assertRaises(Exception, octet, vector)
+        ipv4 = factories['IPv4']()
+        for address in corpus.invalid_ipv4(random.Random(0), 200) + ['1.2.3.4.5', '1.2.3.4 ']:
+            self.assertRaises(Exception, ipv4, address)
+
+    def test_run_suite(self):
+        results = suite.run_suite(size = 100, entries = ['Octet', 'parse_ipv4', 'parse_ipv6'])
+        # survives a round trip through JSON
+        results = json.loads(json.dumps(results))
+        runs = set((result['entry'], result['corpus']) for result in results['results'])
+        self.assertIn(('Octet', 'octet-vectors'), runs)
+        self.assertIn(('parse_ipv6', 'mapped-ipv6'), runs)
+        self.assertNotIn('IPv4', set(entry for entry, corpus in runs))
+
+    def test_compare(self):
+        baseline = {'results': [{'entry': 'parse_ipv4', 'corpus': 'random-ipv4', 'ops_per_sec': 1000.0},
+                                {'entry': 'parse_ipv6', 'corpus': 'mapped-ipv6', 'ops_per_sec': 1000.0}]}
+        current = {'results': [{'entry': 'parse_ipv4', 'corpus': 'random-ipv4', 'ops_per_sec': 950.0},
+                               {'entry': 'parse_ipv6', 'corpus': 'mapped-ipv6', 'ops_per_sec': 500.0}]}
+        self.assertEqual(suite.compare(baseline, current, tolerance = 0.1),
+                         [('parse_ipv6', 'mapped-ipv6', 1000.0, 500.0)])
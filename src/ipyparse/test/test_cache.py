@@ -0,0 +1,96 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import unittest
+from ipyparse.cache import ParseCache
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv6 import parse_ipv6
+
+class CountingParse(object):
+    def __init__(self, parse):
+        self.parse = parse
+        self.calls = 0
+
+    def __call__(self, s):
+        self.calls += 1
+        return self.parse(s)
+
+class TestParseCache(unittest.TestCase):
+    def test_hit(self):
+        parse = CountingParse(parse_ipv6)
+        cache = ParseCache(parse, maxsize = 4)
+        self.assertEqual(cache('::1'), 1)
+        self.assertEqual(cache('::1'), 1)
+        self.assertEqual(parse.calls, 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'maxsize': 4})
+
+    def test_negative(self):
+        parse = CountingParse(parse_ipv4)
+        cache = ParseCache(parse)
+        self.assertRaises(ValueError, cache, '1.2.3')
+        self.assertRaises(ValueError, cache, '1.2.3')
+        self.assertEqual(parse.calls, 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_eviction(self):
+        parse = CountingParse(parse_ipv4)
+        cache = ParseCache(parse, maxsize = 2)
+        cache('1.1.1.1')
+        cache('2.2.2.2')
+        cache('1.1.1.1')
+        cache('3.3.3.3')
+        # 2.2.2.2 was the least recently used
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(cache), 2)
+        cache('1.1.1.1')
+        self.assertEqual(parse.calls, 3)
+        cache('2.2.2.2')
+        self.assertEqual(parse.calls, 4)
+
+    def test_clear(self):
+        cache = ParseCache(parse_ipv4)
+        cache('1.1.1.1')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()['misses'], 0)
+
+    def test_maxsize(self):
+        self.assertRaises(ValueError, ParseCache, parse_ipv4, maxsize = 0)
+
+    def test_threads(self):
+        cache = ParseCache(parse_ipv4, maxsize = 50)
+        addresses = ['10.0.0.{}'.format(i) for i in range(100)]
+        errors = []
+
+        def worker():
+            for i in range(20):
+                for value, address in enumerate(addresses):
+                    if cache(address) != 0x0a000000 + value:
+                        errors.append(address)
+
+        threads = [threading.Thread(target = worker) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertTrue(len(cache) <= 50)
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 8 * 20 * 100)
@@ -0,0 +1,126 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+from ipyparse.array import AddressArray
+from ipyparse.batch import numpy
+from ipyparse.batch import parse_many
+from ipyparse.column import ColumnFile
+from ipyparse.column import write_column
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import parse_ipv6
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestColumnFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'addresses.ipc')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_ipv4(self):
+        addresses = AddressArray.parse(['10.0.0.3', '192.168.1.1', '10.0.0.1', '10.0.0.2'])
+        write_column(self.path, addresses)
+        with ColumnFile(self.path) as column:
+            self.assertEqual(len(column), 4)
+            self.assertEqual(column.width, 4)
+            self.assertEqual(column[1], parse_ipv4('192.168.1.1'))
+            self.assertIsInstance(column[-1], IPv4Address)
+            self.assertEqual(list(column.rows('10.0.0.0', '10.255.255.255')), [2, 3, 0])
+            self.assertEqual([str(address) for row, address in column.scan('10.0.0.2', '192.168.1.1')],
+                             ['10.0.0.2', '10.0.0.3', '192.168.1.1'])
+            self.assertEqual(column.array(4).tolist(), addresses.tolist())
+            self.assertEqual(len(column.array(6)), 0)
+            self.assertRaises(IndexError, column.__getitem__, 4)
+
+    def test_packed(self):
+        write_column(self.path, [parse_ipv4('1.2.3.4')], index = False)
+        with open(self.path, 'rb') as input:
+            data = input.read()
+        self.assertEqual(len(data), 64 + 16 + 4)
+        self.assertEqual(data[80:], b'\x01\x02\x03\x04')
+
+    def test_mixed(self):
+        addresses = [parse_ipv6('2001:db8::1'), parse_ipv4('10.0.0.1'),
+                     parse_ipv6('::ffff:10.0.0.1'), parse_ipv4('1.2.3.4')]
+        write_column(self.path, addresses)
+        with ColumnFile(self.path) as column:
+            self.assertEqual(column.width, 16)
+            self.assertEqual(list(column.families), [6, 4, 6, 4])
+            self.assertEqual(list(column), addresses)
+            self.assertEqual([type(address) for address in column],
+                             [IPv6Address, IPv4Address, IPv6Address, IPv4Address])
+            self.assertEqual(list(column.rows('0.0.0.0', '255.255.255.255')), [3, 1])
+            self.assertEqual(list(column.rows('::1', 'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff')), [2, 0])
+            self.assertEqual(list(column.rows(0, 1 << 32, family = 4)), [3, 1])
+            self.assertEqual(column.values[0].tobytes(), parse_ipv6('2001:db8::1').packed)
+            self.assertEqual(column.array(4).tolist(), [addresses[1], addresses[3]])
+
+    def test_parse_many(self):
+        values, valid = parse_many(['::1', 'nonsense', '::2'], family = 6)
+        write_column(self.path, values[valid], family = 6)
+        with ColumnFile(self.path) as column:
+            self.assertEqual(list(column), [1, 2])
+            self.assertEqual(list(column.rows('::2', '::ff')), [1])
+
+    def test_no_index(self):
+        write_column(self.path, [parse_ipv4('1.2.3.4')], index = False)
+        with ColumnFile(self.path) as column:
+            self.assertIsNone(column.index)
+            self.assertEqual(list(column), [parse_ipv4('1.2.3.4')])
+            self.assertRaises(ValueError, column.rows, '1.0.0.0', '2.0.0.0')
+
+    def test_empty(self):
+        write_column(self.path, [])
+        with ColumnFile(self.path) as column:
+            self.assertEqual(len(column), 0)
+            self.assertEqual(len(column.rows('0.0.0.0', '255.255.255.255')), 0)
+
+    def test_integer_array(self):
+        write_column(self.path, numpy.array([5, 0xffffffff], dtype = numpy.int64), family = 4)
+        with ColumnFile(self.path) as column:
+            self.assertEqual([str(address) for address in column], ['0.0.0.5', '255.255.255.255'])
+        write_column(self.path, numpy.array([1, 1 << 40], dtype = numpy.uint64), family = 6)
+        with ColumnFile(self.path) as column:
+            self.assertEqual(list(column), [1, 1 << 40])
+            self.assertIsInstance(column[0], IPv6Address)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, write_column, self.path, [1, 2])
+        self.assertRaises(ValueError, write_column, self.path, [1 << 32], family = 4)
+        # arrays are range checked rather than wrapped by astype
+        self.assertRaises(ValueError, write_column, self.path, numpy.array([(1 << 32) + 5], dtype = numpy.uint64), family = 4)
+        self.assertRaises(ValueError, write_column, self.path, numpy.array([-1], dtype = numpy.int64), family = 4)
+        self.assertRaises(ValueError, write_column, self.path, numpy.array([-1], dtype = numpy.int64), family = 6)
+        self.assertRaises(ValueError, write_column, self.path, numpy.array([1.5]), family = 4)
+        values, valid = parse_many(['::1'], family = 6)
+        self.assertRaises(ValueError, write_column, self.path, values, family = 4)
+        with open(self.path, 'wb') as output:
+            output.write(b'not a column file'.ljust(64))
+        self.assertRaises(ValueError, ColumnFile, self.path)
+        write_column(self.path, [parse_ipv4('1.2.3.4')])
+        with open(self.path, 'r+b') as output:
+            output.truncate(70)
+        self.assertRaises(ValueError, ColumnFile, self.path)
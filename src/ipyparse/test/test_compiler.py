@@ -0,0 +1,88 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from ipyparse import ipv4
+from ipyparse import ipv6
+from ipyparse.compiler import compile_grammar
+from ipyparse.compiler import compiled_grammar
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.test import test_ipv4
+from ipyparse.test import test_ipv6
+
+class TestCompiler(unittest.TestCase):
+    def test_ipv4(self):
+        compiled = compiled_grammar('IPv4_WholeString')
+        for counter, address, expected in test_ipv4.good:
+            result = compiled.parse(address)
+            self.assertEqual(result, [expected])
+            self.assertIsInstance(result[0], IPv4Address)
+        for counter, address in test_ipv4.bad:
+            self.assertRaises(ValueError, compiled.parse, address)
+            self.assertFalse(compiled.matches(address))
+
+    def test_ipv6(self):
+        compiled = compiled_grammar('IPv6_WholeString')
+        for counter, address, expected in test_ipv6.good:
+            result = compiled.parse(address)
+            self.assertEqual(result, [expected])
+            self.assertIsInstance(result[0], IPv6Address)
+        for counter, address in test_ipv6.bad:
+            self.assertRaises(ValueError, compiled.parse, address)
+
+    def test_octet(self):
+        compiled = compiled_grammar('Octet')
+        for text in ['0', '000', '7', '07', '99', '099', '255', '0255']:
+            self.assertEqual(compiled.parse(text), list(ipv4.Octet.parseString(text)))
+        for text in ['256', '00255', '1000', '', 'a']:
+            self.assertRaises(ValueError, compiled.parse, text)
+
+    def test_prefix(self):
+        self.assertEqual(compiled_grammar('IPv4_Prefix_WholeString').parse('10.1.2.3/8'), [(0x0a000000, 8)])
+        self.assertEqual(compiled_grammar('IPv6_Prefix_WholeString').parse('::/0'), [(0, 0)])
+
+    def test_ranges(self):
+        compiled = compiled_grammar('IPv6_Range_WholeString')
+        for text in ['::1eea-abc:1:1::ffff', '1::-1::ffff:1.2.3.4', '2001:db8::1']:
+            self.assertEqual(compiled.parse(text), list(ipv6.IPv6_Range_WholeString.parseString(text)))
+        compiled = compiled_grammar('IPv4_Range_WholeString')
+        self.assertEqual(compiled.parse('10.*.*.*'), list(ipv4.IPv4_Range_WholeString.parseString('10.*.*.*')))
+        # the range's parse action rejects it
+        self.assertRaises(ValueError, compiled.parse, '1.2.3.4-1.2.3.3')
+
+    def test_instrumented(self):
+        from ipyparse.instrument import Instrumentation
+
+        instrument = Instrumentation()
+        compiled = compile_grammar(ipv6.build_grammar(instrument)['IPv6_WholeString'])
+        self.assertEqual(compiled.parse('::1'), [1])
+        self.assertEqual(instrument.snapshot()['alternatives']['IPv6'], {15: 1})
+
+    def test_unsupported(self):
+        from pyparsing import OneOrMore
+        from pyparsing import Regex
+        from pyparsing import Word
+
+        self.assertRaises(TypeError, compile_grammar, Regex('[0-9]+'))
+        self.assertRaises(ValueError, compile_grammar, OneOrMore(Word('0123456789')))
+
+    def test_cached(self):
+        self.assertIs(compiled_grammar('IPv6'), compiled_grammar('IPv6'))
+        self.assertRaises(KeyError, compiled_grammar, 'parse_ipv4')
@@ -0,0 +1,116 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from ipyparse.batch import numpy
+from ipyparse.batch import parse_many
+from ipyparse.dualstack import from_key
+from ipyparse.dualstack import key_families
+from ipyparse.dualstack import parse_key
+from ipyparse.dualstack import parse_keys
+from ipyparse.dualstack import to_key
+from ipyparse.dualstack import to_keys
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import parse_ipv6
+
+# addresses and the key each one folds to
+good = [(0, '192.0.2.1', 0xffffc0000201),
+        (1, '::ffff:192.0.2.1', 0xffffc0000201),
+        (2, '::192.0.2.1', 0xffffc0000201),
+        (3, '0.0.0.0', 0xffff00000000),
+        (4, '::ffff:0.0.0.0', 0xffff00000000),
+        (5, '::1', 1),
+        (6, '::0.0.0.2', 0xffff00000002),
+        (7, '2001:db8::1', 0x20010db8000000000000000000000001),
+        (8, '::1:0:0', 0x100000000),
+        (9, '64:ff9b::192.0.2.1', 0x0064ff9b0000000000000000c0000201)]
+
+bad = [(0, ''),
+       (1, '1.2.3'),
+       (2, '::ffff:1.2.3.4.5'),
+       (3, '1::2::3')]
+
+class TestDualStack(unittest.TestCase):
+    def test_to_key(self):
+        self.assertEqual(to_key(parse_ipv4('10.0.0.1')), parse_ipv6('::ffff:10.0.0.1'))
+        self.assertEqual(to_key(parse_ipv6('::10.0.0.1')), parse_ipv6('::ffff:10.0.0.1'))
+        self.assertEqual(to_key(0x0a000001, family = 4), parse_ipv6('::ffff:10.0.0.1'))
+        self.assertEqual(to_key(0x0a000001), parse_ipv6('::ffff:10.0.0.1'))
+        self.assertIsInstance(to_key(parse_ipv4('10.0.0.1')), IPv6Address)
+        self.assertRaises(ValueError, to_key, 1 << 32, family = 4)
+        self.assertRaises(ValueError, to_key, 1, family = 5)
+
+    def test_from_key(self):
+        address = from_key(parse_key('10.0.0.1'))
+        self.assertIsInstance(address, IPv4Address)
+        self.assertEqual(str(address), '10.0.0.1')
+        address = from_key(parse_key('2001:db8::1'))
+        self.assertIsInstance(address, IPv6Address)
+        self.assertEqual(str(address), '2001:db8::1')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_parse_keys(self):
+        items = [address for counter, address, key in good] + [address for counter, address in bad]
+        keys, valid = parse_keys(items)
+        self.assertEqual(list(valid), [True] * len(good) + [False] * len(bad))
+        self.assertEqual([(int(record['hi']) << 64) | int(record['lo']) for record in keys],
+                         [key for counter, address, key in good] + [0] * len(bad))
+        self.assertEqual(list(key_families(keys[valid])), [4, 4, 4, 4, 4, 6, 4, 6, 6, 6])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_keys(self):
+        values, valid = parse_many(['10.0.0.1', '255.255.255.255'], family = 4)
+        keys = to_keys(values, 4)
+        self.assertEqual(keys.view(numpy.uint8).reshape(-1, 16)[1].tobytes(), b'\x00' * 10 + b'\xff' * 6)
+        values, valid = parse_many(['::10.0.0.1', '::1'], family = 6)
+        keys = to_keys(values, 6)
+        self.assertEqual(list(key_families(keys)), [4, 6])
+        self.assertEqual(int(keys[0]['lo']), 0xffff0a000001)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_keys_range(self):
+        keys = to_keys(numpy.array([0, 0xffffffff], dtype = numpy.int64), 4)
+        self.assertEqual(keys['lo'].tolist(), [0xffff00000000, 0xffffffffffff])
+        self.assertRaises(ValueError, to_keys, numpy.array([(1 << 33) + 5], dtype = numpy.uint64), 4)
+        self.assertRaises(ValueError, to_keys, numpy.array([-1], dtype = numpy.int64), 4)
+        self.assertRaises(ValueError, to_keys, [-1], 4)
+        self.assertRaises(ValueError, to_keys, numpy.array([1.0]), 4)
+        self.assertEqual(len(to_keys([], 4)), 0)
+
+def create_good_test_case(address, expected):
+    def test_case(self, address = address, expected = expected):
+        self.assertEqual(parse_key(address), expected)
+    return test_case
+
+for counter, address, expected in good:
+    setattr(TestDualStack,
+            'test_good_{}'.format(counter),
+            create_good_test_case(address, expected))
+
+def create_bad_test_case(address):
+    def test_case(self, address = address):
+        self.assertRaises(ValueError, parse_key, address)
+    return test_case
+
+for counter, address in bad:
+    setattr(TestDualStack,
+            'test_bad_{}'.format(counter),
+            create_bad_test_case(address))
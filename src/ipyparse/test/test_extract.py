@@ -0,0 +1,78 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import tempfile
+import unittest
+from ipyparse.extract import scan
+from ipyparse.extract import scan_span
+
+log = (b'192.168.1.26 - - [10/Oct/2011:13:55:36] "GET /cafe HTTP/1.1" 200 2326\n'
+       b'client fe80::217:f2ff:254.7.237.98 port 80 from 10.0.0.1:8080\n'
+       b'deadbeefdeadbeef 1.2.3 addr=2001:db8::1, 127.0.0.1.\n')
+
+expected = [(0, 4, 3232235802),
+            (77, 6, 338288524927261089654169753135180410210),
+            (118, 4, 167772161),
+            (160, 6, 42540766411282592856903984951653826561),
+            (173, 4, 2130706433)]
+
+class TestScan(unittest.TestCase):
+    def test_span(self):
+        self.assertEqual(scan_span('::1'), [(0, 6, 1)])
+        self.assertEqual(scan_span('10.0.0.1:8080'), [(0, 4, 167772161)])
+        self.assertEqual(scan_span('::ffff:1.2.3.4'), [(0, 6, 281470698652420)])
+        self.assertEqual(scan_span('1:2:3'), [])
+
+    def test_span_boundaries(self):
+        # addresses inside longer tokens are not pulled out
+        self.assertEqual(scan_span('1234.5.6.7'), [])
+        self.assertEqual(scan_span('abcdef12::1'), [])
+        self.assertEqual(scan_span('12345::1'), [])
+        self.assertEqual(scan_span('1.2.3.4.5'), [])
+        self.assertEqual(scan_span('1.2.3.4:'), [(0, 4, 16909060)])
+
+    def test_long_runs(self):
+        data = b'a ' + b'1' * 10000 + b' 10.0.0.1 ' + b'f' * 10000 + b':: ::1\n'
+        expected = [(10003, 4, 167772161), (20015, 6, 1)]
+        self.assertEqual(list(scan(io.BytesIO(data))), expected)
+        for block_size in (1, 100, 1 << 20):
+            self.assertEqual(list(scan(io.BytesIO(data), block_size = block_size)), expected)
+
+    def test_path(self):
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as fileobj:
+                fileobj.write(log)
+            self.assertEqual(list(scan(path)), expected)
+        finally:
+            os.remove(path)
+
+    def test_stream(self):
+        self.assertEqual(list(scan(io.BytesIO(log))), expected)
+
+    def test_stream_blocks(self):
+        # small blocks split addresses across reads
+        for block_size in (1, 7, 64):
+            self.assertEqual(list(scan(io.BytesIO(log), block_size = block_size)), expected)
+
+    def test_empty(self):
+        with tempfile.TemporaryFile() as fileobj:
+            self.assertEqual(list(scan(fileobj)), [])
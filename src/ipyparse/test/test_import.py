@@ -0,0 +1,51 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import subprocess
+import sys
+import unittest
+import ipyparse
+
+def run(code):
+    """
+    Run some code in a fresh interpreter and return what it prints.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.dirname(os.path.dirname(ipyparse.__file__))
+    return subprocess.check_output([sys.executable, '-c', code], env = env).decode('ascii').split()
+
+class TestImport(unittest.TestCase):
+    def test_fast_path_without_pyparsing(self):
+        result = run('import sys, ipyparse\n'
+                     'print(int(ipyparse.parse_ipv4("1.2.3.4")), int(ipyparse.parse_ipv6("::1")))\n'
+                     'print("pyparsing" in sys.modules, "numpy" in sys.modules)')
+        self.assertEqual(result, ['16909060', '1', 'False', 'False'])
+
+    def test_grammar_on_first_use(self):
+        result = run('import sys, ipyparse.ipv6\n'
+                     'print("pyparsing" in sys.modules)\n'
+                     'print(int(ipyparse.ipv6.IPv6_WholeString.parseString("::1")[0]))\n'
+                     'print("pyparsing" in sys.modules)')
+        self.assertEqual(result, ['False', '1', 'True'])
+
+    def test_lazy_names(self):
+        for name in ipyparse.__all__:
+            self.assertTrue(callable(getattr(ipyparse, name)), name)
+        self.assertRaises(AttributeError, getattr, ipyparse, 'nothing')
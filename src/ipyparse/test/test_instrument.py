@@ -0,0 +1,84 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from ipyparse.instrument import Instrumentation
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.parser import Parser
+
+class TestInstrumentation(unittest.TestCase):
+    def test_wrap(self):
+        instrument = Instrumentation()
+        parse = instrument.wrap('parse_ipv4', parse_ipv4)
+        self.assertEqual(parse('1.2.3.4'), 16909060)
+        self.assertRaises(ValueError, parse, '1.2.3')
+        entry = instrument.snapshot()['entry_points']['parse_ipv4']
+        self.assertEqual((entry['calls'], entry['successes'], entry['failures']), (2, 1, 1))
+        self.assertEqual(sum(entry['histogram'].values()), 2)
+        self.assertTrue(entry['elapsed_ns'] > 0)
+
+    def test_alternatives(self):
+        instrument = Instrumentation()
+        parser = Parser(instrument = instrument)
+        parser.parse_ipv6('1:2:3:4:5:6:7:8')
+        parser.parse_ipv6('::1')
+        parser.parse_ipv4('0.01.255.99')
+        snapshot = instrument.snapshot()
+        self.assertEqual(snapshot['alternatives']['IPv6'], {0: 1, 15: 1})
+        self.assertEqual(snapshot['alternatives']['Octet'], {0: 1, 1: 1, 2: 1, 5: 1})
+        self.assertEqual(snapshot['actions']['convert_ipv6']['calls'], 2)
+        self.assertEqual(snapshot['actions']['convert_ipv4']['calls'], 1)
+        self.assertEqual(snapshot['entry_points']['Parser.parse_ipv6']['calls'], 2)
+
+    def test_alternatives_failed(self):
+        # octets that matched inside a rejected address are not counted
+        instrument = Instrumentation()
+        parser = Parser(instrument = instrument)
+        self.assertRaises(ValueError, parser.parse_ipv4, '1.2.3')
+        self.assertRaises(ValueError, parser.parse_ipv6, '1:2:3:4:5:6:7:8:9')
+        parser.parse_ipv4('1.2.3.4')
+        snapshot = instrument.snapshot()
+        self.assertEqual(snapshot['alternatives'], {'Octet': {1: 4}})
+        self.assertEqual(snapshot['entry_points']['Parser.parse_ipv4']['failures'], 1)
+
+    def test_alternatives_nested(self):
+        instrument = Instrumentation()
+        parser = Parser(instrument = instrument)
+        outer = instrument.wrap('outer', lambda s: (parser.parse_ipv4(s), parser.parse_ipv4('1.2.3')))
+        self.assertRaises(ValueError, outer, '1.2.3.4')
+        self.assertEqual(instrument.snapshot()['alternatives'], {})
+        instrument.wrap('outer', parser.parse_ipv4)('1.2.3.4')
+        self.assertEqual(instrument.snapshot()['alternatives'], {'Octet': {1: 4}})
+
+    def test_results_unchanged(self):
+        plain = Parser()
+        instrumented = Parser(instrument = Instrumentation())
+        for address in ['::ffff:1.2.3.4', '2001:db8::1', '1::']:
+            self.assertEqual(instrumented.parse_ipv6(address), plain.parse_ipv6(address))
+        self.assertRaises(ValueError, instrumented.parse_ipv6, '1::2::3')
+
+    def test_reset(self):
+        instrument = Instrumentation()
+        instrument.wrap('parse_ipv4', parse_ipv4)('1.2.3.4')
+        instrument.reset()
+        self.assertEqual(instrument.snapshot(), {'entry_points': {}, 'alternatives': {}, 'actions': {}})
+
+    def test_disabled(self):
+        # the default parser's methods are not wrapped
+        self.assertEqual(Parser().parse_ipv4.__func__, Parser.parse_ipv4)
@@ -0,0 +1,136 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import itertools
+import random
+import unittest
+from ipyparse.batch import numpy
+from ipyparse.batch import parse_many
+from ipyparse.ipset import IPSet
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv6 import parse_ipv6
+
+def expand(ipset):
+    return set(itertools.chain.from_iterable(range(first, last + 1) for first, last in ipset.intervals()))
+
+class TestIPSet(unittest.TestCase):
+    def test_merge(self):
+        ipset = IPSet(['10.0.0.0/31', '10.0.0.2', '10.0.0.3-10.0.0.9', '10.0.0.20-10.0.0.30', '10.0.0.25'])
+        base = parse_ipv4('10.0.0.0')
+        self.assertEqual(ipset.intervals(), [(base, base + 9), (base + 20, base + 30)])
+        self.assertEqual(ipset.size(), 21)
+
+    def test_contains(self):
+        ipset = IPSet(['10.0.0.0/8', '192.168.1.1-192.168.1.20', '172.16.0.1'])
+        for address, expected in [('10.255.255.255', True),
+                                  ('11.0.0.0', False),
+                                  ('192.168.1.1', True),
+                                  ('192.168.1.21', False),
+                                  ('172.16.0.1', True),
+                                  ('0.0.0.0', False)]:
+            self.assertEqual(parse_ipv4(address) in ipset, expected, address)
+
+    def test_spaced_range(self):
+        base = parse_ipv4('10.0.0.1')
+        self.assertEqual(IPSet(['10.0.0.1 - 10.0.0.5']).intervals(), [(base, base + 4)])
+        self.assertEqual(IPSet([' 10.0.0.1 ']).intervals(), [(base, base)])
+        self.assertEqual(IPSet(['::1 - ::5'], family = 6).intervals(), [(1, 5)])
+        self.assertRaises(ValueError, IPSet, ['10.0.0.1 - '])
+
+    def test_other_family(self):
+        ipset = IPSet(['0.0.0.0/24'])
+        self.assertIn(parse_ipv4('0.0.0.1'), ipset)
+        self.assertNotIn(parse_ipv6('::1'), ipset)
+        self.assertNotIn(parse_ipv4('0.0.0.1'), IPSet(['::/120'], family = 6))
+
+    def test_contains_many(self):
+        ipset = IPSet([1, 2, 5], family = 4)
+        self.assertEqual(ipset.contains_many(range(7)), [False, True, True, False, False, True, False])
+        self.assertEqual(IPSet().contains_many([1]), [False])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_contains_many_array(self):
+        ipset = IPSet(['10.0.0.0/8'])
+        values = numpy.array([parse_ipv4('10.1.1.1'), parse_ipv4('11.0.0.0')], dtype = numpy.uint32)
+        self.assertEqual(list(ipset.contains_many(values)), [True, False])
+        self.assertEqual(list(IPSet().contains_many(values)), [False, False])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_contains_many_ipv6_array(self):
+        ipset = IPSet(['2001:db8::/32', '::1', 'ffff::-ffff::5'], family = 6)
+        values, valid = parse_many(['2001:db8::5', '::1', '::2', 'ffff::5', 'ffff::6', 'fe80::1'], family = 6)
+        self.assertEqual(list(ipset.contains_many(values)), [True, True, False, True, False, False])
+        self.assertEqual(list(IPSet(['0.0.0.0/0']).contains_many(values)), [False] * 6)
+
+    def test_contains_many_other_family(self):
+        self.assertEqual(IPSet(['0.0.0.0/24']).contains_many([parse_ipv6('::1'), parse_ipv4('0.0.0.1'), 1]),
+                         [False, True, True])
+        self.assertEqual(IPSet(['::/120'], family = 6).contains_many([parse_ipv4('0.0.0.1'), parse_ipv6('::1')]),
+                         [False, True])
+
+    def test_pending_limit(self):
+        ipset = IPSet()
+        ipset.pending_limit = 8
+        for address in range(0, 200, 2):
+            ipset.add(address)
+            self.assertLessEqual(len(ipset._pending), max(8, len(ipset._starts)))
+        ipset = IPSet()
+        ipset.pending_limit = 8
+        ipset.update(range(1000))
+        self.assertLessEqual(len(ipset._pending), 8)
+        self.assertEqual(ipset.intervals(), [(0, 999)])
+
+    def test_ipv6(self):
+        ipset = IPSet(['2001:db8::/32', '::1', '::/128'], family = 6)
+        self.assertIn(parse_ipv6('2001:db8:ffff::1'), ipset)
+        self.assertIn(0, ipset)
+        self.assertNotIn(2, ipset)
+        self.assertEqual(IPSet(['::/0'], family = 6).size(), 1 << 128)
+
+    def test_algebra(self):
+        rng = random.Random(0)
+        for trial in range(200):
+            sets = []
+            for k in range(2):
+                ipset = IPSet()
+                for i in range(rng.randrange(6)):
+                    first = rng.randrange(100)
+                    ipset.add_range(first, first + rng.randrange(20))
+                sets.append(ipset)
+            a, b = sets
+            self.assertEqual(expand(a | b), expand(a) | expand(b))
+            self.assertEqual(expand(a & b), expand(a) & expand(b))
+            self.assertEqual(expand(a - b), expand(a) - expand(b))
+            self.assertEqual(expand(a ^ b), expand(a) ^ expand(b))
+            # results are merged as well
+            for ipset in (a | b, a & b, a - b, a ^ b):
+                intervals = ipset.intervals()
+                self.assertTrue(all(intervals[i][1] + 1 < intervals[i + 1][0] for i in range(len(intervals) - 1)))
+
+    def test_equality(self):
+        self.assertEqual(IPSet(['10.0.0.0-10.0.0.3']), IPSet(['10.0.0.0/31', '10.0.0.2/31']))
+        self.assertNotEqual(IPSet(['10.0.0.0']), IPSet(['10.0.0.1']))
+        self.assertFalse(IPSet())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, IPSet, ['10.0.0.9-10.0.0.1'])
+        self.assertRaises(ValueError, IPSet, ['10.0.0'])
+        self.assertRaises(ValueError, IPSet, [1 << 32])
+        self.assertRaises(ValueError, IPSet().add_prefix, 1, 24)
+        self.assertRaises(ValueError, IPSet().union, IPSet(family = 6))
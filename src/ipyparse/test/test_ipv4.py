@@ -17,9 +17,51 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
 
+import itertools
+import pickle
 import unittest
-from ipparse.ipv4 import IPv4
-from ipparse.ipv4 import Octet
+from pyparsing import ParseException
+from pyparsing import StringEnd
+from ipyparse.ipv4 import IPv4
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import IPv4_WholeString
+from ipyparse.ipv4 import Octet
+from ipyparse.ipv4 import format_ipv4
+from ipyparse.ipv4 import is_valid_ipv4
+from ipyparse.ipv4 import parse_ipv4
+
+good = [(0, '127.0.0.1', 2130706433),
+        (1, '0.0.0.0', 0),
+        (2, '255.255.255.255', 4294967295),
+        (3, '192.168.1.26', 3232235802),
+        (4, '10.0.0.1', 167772161),
+        (5, '01.02.03.04', 16909060),
+        (6, '010.020.030.040', 169090600),
+        (7, '0255.0.0.0', 4278190080),
+        (8, '000.00.0000.0', 0),
+        (9, '12.34.56.78', 203569230)]
+"""
+A list of "good" test cases - valid IPv4 addresses and the corresponding 32-bit integer.
+"""
+
+bad = [(0, ''),
+       (1, '1.2.3'),
+       (2, '1.2.3.4.5'),
+       (3, '256.1.2.3'),
+       (4, '1.2.3.300'),
+       (5, '001.2.3.4'),
+       (6, '00255.1.2.3'),
+       (7, '1..2.3'),
+       (8, '1.2.3.4 '),
+       (9, ' 1.2.3.4'),
+       (10, '1.2.3.a'),
+       (11, '1.2.3.-4'),
+       (12, '1.2.3.+4'),
+       (13, '1.2.3.\u0664'),
+       (14, '::1')]
+"""
+A list of "bad" test cases - invalid IPv4 addresses.
+"""
 
 class TestIPv4(unittest.TestCase):
     def test_octet_1(self):
@@ -30,4 +72,106 @@ class TestIPv4(unittest.TestCase):
         result = IPv4.parseString('127.0.0.1')
         self.assertEqual(result[0], 2130706433)
 
-        
+    def test_is_valid_not_a_string(self):
+        self.assertIs(is_valid_ipv4(None), False)
+        self.assertIs(is_valid_ipv4(2130706433), False)
+        self.assertRaises(TypeError, parse_ipv4, 2130706433)
+
+    def test_address(self):
+        address = parse_ipv4('010.0.0.1')
+        self.assertIsInstance(address, IPv4Address)
+        self.assertEqual(address, 167772161)
+        self.assertEqual(hash(address), hash(167772161))
+        self.assertIn(167772161, set([address]))
+        self.assertEqual(len(set([address, 167772161])), 1)
+        self.assertEqual(str(address), '10.0.0.1')
+        self.assertEqual(repr(address), "IPv4Address('10.0.0.1')")
+        self.assertEqual(address.packed, b'\x0a\x00\x00\x01')
+        self.assertEqual(IPv4Address('10.0.0.1'), address)
+        self.assertTrue(IPv4Address(1) < address)
+        self.assertEqual(pickle.loads(pickle.dumps(address)), address)
+        self.assertRaises(AttributeError, setattr, address, 'name', 'host')
+        self.assertRaises(ValueError, IPv4Address, 1 << 32)
+        self.assertRaises(ValueError, IPv4Address, '10.0.0')
+        self.assertIsInstance(IPv4_WholeString.parseString('10.0.0.1')[0], IPv4Address)
+
+    def test_intern(self):
+        try:
+            first = IPv4Address.intern('10.0.0.1')
+            self.assertIs(IPv4Address.intern(167772161), first)
+            self.assertIs(IPv4Address.intern(parse_ipv4('10.0.0.1')), first)
+        finally:
+            IPv4Address.clear_interned()
+
+    def test_intern_limit(self):
+        limit = IPv4Address.intern_limit
+        IPv4Address.intern_limit = 10
+        try:
+            first = IPv4Address.intern(0)
+            for value in range(1, 100):
+                IPv4Address.intern(value)
+            self.assertEqual(len(IPv4Address._interned), 10)
+            # the oldest addresses were forgotten
+            self.assertIsNot(IPv4Address.intern(0), first)
+        finally:
+            IPv4Address.intern_limit = limit
+            IPv4Address.clear_interned()
+
+    def test_offsets(self):
+        self.assertEqual(parse_ipv4('src=10.0.0.1 dst=10.0.0.2', 4, 12), 167772161)
+        self.assertEqual(parse_ipv4(b'src=10.0.0.1 dst=10.0.0.2', 17), 167772162)
+        self.assertRaises(ValueError, parse_ipv4, b'src=10.0.0.1 dst=10.0.0.2', 4)
+
+    def test_format(self):
+        self.assertEqual(format_ipv4(2130706433), '127.0.0.1')
+        self.assertEqual(format_ipv4(0), '0.0.0.0')
+        self.assertEqual(format_ipv4(4294967295), '255.255.255.255')
+        self.assertRaises(ValueError, format_ipv4, -1)
+        self.assertRaises(ValueError, format_ipv4, 1 << 32)
+
+    def test_octet_exhaustive(self):
+        octet = Octet + StringEnd()
+        for length in range(1, 5):
+            for digits in itertools.product('0123456789', repeat = length):
+                digits = ''.join(digits)
+                try:
+                    expected = octet.parseString(digits)[0]
+                except ParseException:
+                    self.assertRaises(ValueError, parse_ipv4, digits + '.0.0.0')
+                else:
+                    self.assertEqual(parse_ipv4(digits + '.0.0.0') >> 24, expected)
+
+def create_good_test_case(address, expected):
+    def test_case(self, address = address, expected = expected):
+        result = parse_ipv4(address)
+        self.assertEqual(result, IPv4_WholeString.parseString(address)[0])
+        self.assertIs(is_valid_ipv4(address), True)
+        buffer = bytearray(b'<' + address.encode('utf-8') + b'>')
+        self.assertEqual(parse_ipv4(memoryview(buffer), 1, -1), result)
+        self.assertEqual(parse_ipv4(bytes(buffer), 1, len(buffer) - 1), result)
+        self.assertEqual(parse_ipv4(format_ipv4(result)), result)
+        self.assertEqual(result,
+                         expected,
+                         '{} does not convert to {} but instead we get {}'.format(address,
+                                                                                  expected,
+                                                                                  result))
+    return test_case
+
+for counter, address, expected in good:
+    setattr(TestIPv4,
+            'test_good_{}'.format(counter),
+            create_good_test_case(address, expected))
+
+def create_bad_test_case(address):
+    def test_case(self, address = address):
+        self.assertRaises(ParseException, IPv4_WholeString.parseString, address)
+        self.assertRaises(ValueError, parse_ipv4, address)
+        self.assertIs(is_valid_ipv4(address), False)
+        self.assertRaises(ValueError, parse_ipv4, address.encode('utf-8'))
+        self.assertIs(is_valid_ipv4(b'<' + address.encode('utf-8') + b'>', 1, -1), False)
+    return test_case
+
+for counter, address in bad:
+    setattr(TestIPv4,
+            'test_bad_{}'.format(counter),
+            create_bad_test_case(address))
@@ -17,9 +17,16 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
 
+import mmap
+import tempfile
 import unittest
 from pyparsing import ParseException
-from ipparse.ipv6 import IPv6_WholeString
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv6 import IPv6Address
+from ipyparse.ipv6 import IPv6_WholeString
+from ipyparse.ipv6 import format_ipv6
+from ipyparse.ipv6 import is_valid_ipv6
+from ipyparse.ipv6 import parse_ipv6
 
 good = [(0, '::127.0.0.1', 2130706433),
         (1, '::1', 1),
@@ -122,7 +129,8 @@ good = [(0, '::127.0.0.1', 2130706433),
         (98, 'fe80::1', 338288524927261089654018896841347694593),
         (99, '0000:0000:0000:0000:0000:0000:0000:0001', 1),
         (100, '::ffff:192.0.2.128', 281473902969472),
-        (101, '::ffff:c000:280', 281473902969472)]
+        (101, '::ffff:c000:280', 281473902969472),
+        (102, '1::2:3:4:5:1.2.3.4', 5192296860952734609117897205875460)]
 """
 A list of "good" test cases - valid IPv6 addresses and the corresponding 128-bit integer.
 """
@@ -220,13 +228,109 @@ bad = [(0, '127.0.0.1'),
        (90, '1:2:3::4:5:6:7:8:9'),
        (91, '::ffff:2.3.4'),
        (92, '::ffff:257.1.2.3'),
-       (93, '1.2.3.4')]
+       (93, '1.2.3.4'),
+       (94, '::1:2:3:4:5:6:1.2.3.4'),
+       (95, '1:2:3:4:5:6:7:8:9'),
+       (96, '::1:2:3:4:5:6:7:8'),
+       (97, ':::::::::::')]
 """
 A list of "bad" test cases - invalid IPv6 addresses.
 """
 
+canonical = [(0, '2001:db8::1', 0x20010db8000000000000000000000001),
+             (1, '2001:db8:0:1:1:1:1:1', 0x20010db8000000010001000100010001),
+             (2, '2001:db8::1:0:0:1', 0x20010db8000000000001000000000001),
+             (3, '2001:0:0:1::1', 0x20010000000000010000000000000001),
+             (4, '::', 0),
+             (5, '::1', 1),
+             (6, '1::', 1 << 112),
+             (7, '2001:db8:aaaa:bbbb:cccc:dddd:eeee:aaaa', 0x20010db8aaaabbbbccccddddeeeeaaaa),
+             (8, '::ffff:192.0.2.1', 0xffffc0000201),
+             (9, '::c000:201', 0xc0000201),
+             (10, 'fe80::1:2:3:4', 0xfe800000000000000001000200030004),
+             (11, '1:0:1:0:1:0:1:0', 0x00010000000100000001000000010000)]
+"""
+A list of addresses in the canonical form of RFC 5952 and the
+corresponding 128-bit integer.
+"""
+
 class TestIPv6(unittest.TestCase):
-    pass
+    def test_is_valid_not_a_string(self):
+        self.assertIs(is_valid_ipv6(None), False)
+        self.assertIs(is_valid_ipv6(1), False)
+        self.assertRaises(TypeError, parse_ipv6, 1)
+
+    def test_address(self):
+        address = parse_ipv6('2001:DB8:0::1')
+        self.assertIsInstance(address, IPv6Address)
+        self.assertEqual(address, 0x20010db8000000000000000000000001)
+        self.assertEqual(str(address), '2001:db8::1')
+        self.assertEqual(repr(address), "IPv6Address('2001:db8::1')")
+        self.assertEqual(address.packed, b'\x20\x01\x0d\xb8' + b'\x00' * 11 + b'\x01')
+        self.assertFalse(address.is_ipv4_mapped)
+        self.assertIsNone(address.ipv4_mapped)
+        self.assertEqual(IPv6Address('2001:db8::1'), address)
+        self.assertRaises(ValueError, IPv6Address, -1)
+        self.assertIsInstance(IPv6_WholeString.parseString('::1')[0], IPv6Address)
+
+    def test_mapped(self):
+        address = parse_ipv6('::ffff:10.0.0.1')
+        self.assertTrue(address.is_ipv4_mapped)
+        self.assertEqual(address.ipv4_mapped, 167772161)
+        self.assertIsInstance(address.ipv4_mapped, IPv4Address)
+        self.assertFalse(parse_ipv6('::10.0.0.1').is_ipv4_mapped)
+
+    def test_intern(self):
+        try:
+            first = IPv6Address.intern('::1')
+            self.assertIs(IPv6Address.intern(1), first)
+            self.assertIsNot(IPv4Address.intern(1), first)
+        finally:
+            IPv4Address.clear_interned()
+            IPv6Address.clear_interned()
+
+    def test_mmap(self):
+        with tempfile.TemporaryFile() as fileobj:
+            fileobj.write(b'peer 2001:db8::1 up\n')
+            fileobj.flush()
+            buffer = mmap.mmap(fileobj.fileno(), 0, access = mmap.ACCESS_READ)
+            try:
+                self.assertEqual(parse_ipv6(buffer, 5, 16), 0x20010db8000000000000000000000001)
+                self.assertRaises(ValueError, parse_ipv6, buffer, 5, 17)
+            finally:
+                buffer.close()
+
+    def test_mixed_families(self):
+        ipv4 = IPv4Address(1)
+        ipv6 = IPv6Address(1)
+        self.assertNotEqual(ipv4, ipv6)
+        self.assertFalse(ipv4 == ipv6)
+        self.assertTrue(ipv4 != ipv6)
+        self.assertEqual(len(set([ipv4, ipv6, IPv4Address(1), IPv6Address(1)])), 2)
+        counts = {}
+        for address in [ipv4, ipv6, parse_ipv6('::1'), IPv4Address('0.0.0.1')]:
+            counts[address] = counts.get(address, 0) + 1
+        self.assertEqual(counts, {ipv4: 2, ipv6: 2})
+        self.assertEqual(counts[IPv6Address(1)], 2)
+        # each is still equal to the plain integer
+        self.assertEqual(ipv4, 1)
+        self.assertEqual(ipv6, 1)
+
+    def test_hash_consistent(self):
+        values = [1, IPv4Address(1), IPv6Address(1), 2, IPv4Address(2), IPv6Address(2), parse_ipv6('::ffff:1.2.3.4')]
+        for a in values:
+            for b in values:
+                if a == b:
+                    self.assertEqual(hash(a), hash(b), '{!r} == {!r}'.format(a, b))
+
+    def test_format_unspecified(self):
+        # canonical, but not accepted back by the parser
+        self.assertEqual(format_ipv6(0), '::')
+        self.assertRaises(ValueError, parse_ipv6, format_ipv6(0))
+
+    def test_format_range(self):
+        self.assertRaises(ValueError, format_ipv6, -1)
+        self.assertRaises(ValueError, format_ipv6, 1 << 128)
 
 def create_good_test_case(address, expected):
     def test_case(self, address = address, expected = expected):
@@ -252,3 +356,49 @@ for counter, address in bad:
     setattr(TestIPv6,
             'test_bad_{}'.format(counter),
             create_bad_test_case(address))
+
+def create_fast_good_test_case(address, expected):
+    def test_case(self, address = address, expected = expected):
+        result = parse_ipv6(address)
+        self.assertEqual(result, IPv6_WholeString.parseString(address)[0])
+        self.assertIs(is_valid_ipv6(address), True)
+        buffer = bytearray(b'<' + address.encode('utf-8') + b'>')
+        self.assertEqual(parse_ipv6(memoryview(buffer), 1, -1), result)
+        self.assertEqual(parse_ipv6(bytes(buffer), 1, len(buffer) - 1), result)
+        if result:
+            # the parser does not accept the unspecified address
+            self.assertEqual(parse_ipv6(format_ipv6(result)), result)
+        self.assertEqual(result,
+                         expected,
+                         '{} does not convert to {} but instead we get {}'.format(address,
+                                                                                  expected,
+                                                                                  result))
+    return test_case
+
+for counter, address, expected in good:
+    setattr(TestIPv6,
+            'test_fast_good_{}'.format(counter),
+            create_fast_good_test_case(address, expected))
+
+def create_fast_bad_test_case(address):
+    def test_case(self, address = address):
+        self.assertRaises(ValueError, parse_ipv6, address)
+        self.assertIs(is_valid_ipv6(address), False)
+        self.assertRaises(ValueError, parse_ipv6, address.encode('utf-8'))
+        self.assertIs(is_valid_ipv6(b'<' + address.encode('utf-8') + b'>', 1, -1), False)
+    return test_case
+
+for counter, address in bad:
+    setattr(TestIPv6,
+            'test_fast_bad_{}'.format(counter),
+            create_fast_bad_test_case(address))
+
+def create_canonical_test_case(address, value):
+    def test_case(self, address = address, value = value):
+        self.assertEqual(format_ipv6(value), address)
+    return test_case
+
+for counter, address, value in canonical:
+    setattr(TestIPv6,
+            'test_canonical_{}'.format(counter),
+            create_canonical_test_case(address, value))
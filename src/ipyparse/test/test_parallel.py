@@ -0,0 +1,60 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+from ipyparse.batch import numpy
+from ipyparse.batch import parse_many
+from ipyparse.parallel import chunk_bounds
+from ipyparse.parallel import parse_file_parallel
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestParseFileParallel(unittest.TestCase):
+    def setUp(self):
+        self.lines = ['10.{}.{}.1'.format(i // 256, i % 256) for i in range(2000)]
+        self.lines[7] = 'not an address'
+        self.lines[1500] = '01.02.03.04'
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as fileobj:
+            fileobj.write('\n'.join(self.lines))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_chunk_bounds(self):
+        bounds = chunk_bounds(self.path, 1000)
+        self.assertTrue(len(bounds) > 1)
+        self.assertEqual(bounds[0][0], 0)
+        self.assertEqual(bounds[-1][1], os.path.getsize(self.path))
+        with open(self.path, 'rb') as fileobj:
+            data = fileobj.read()
+        for start, end in bounds[:-1]:
+            self.assertEqual(data[end - 1:end], b'\n')
+
+    def test_parse(self):
+        chunks = list(parse_file_parallel(self.path, workers = 2, chunk_size = 1000))
+        self.assertTrue(len(chunks) > 1)
+        values = numpy.concatenate([values for values, valid in chunks])
+        valid = numpy.concatenate([valid for values, valid in chunks])
+        expected_values, expected_valid = parse_many(self.lines)
+        self.assertEqual(list(values), list(expected_values))
+        self.assertEqual(list(valid), list(expected_valid))
+        self.assertFalse(valid[7])
+        self.assertEqual(values[1500], 0x01020304)
@@ -0,0 +1,58 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from pyparsing import ParserElement
+from ipyparse.benchmark.threads import all_vectors
+from ipyparse.benchmark.threads import stress
+from ipyparse.parser import Parser
+
+class TestParser(unittest.TestCase):
+    def test_parse(self):
+        parser = Parser()
+        self.assertEqual(parser.parse_ipv4('127.0.0.1'), 2130706433)
+        self.assertEqual(parser.parse_ipv6('::ffff:1.2.3.4'), 281470698652420)
+        self.assertEqual(parser.Octet.parseString('01')[0], 1)
+        self.assertRaises(ValueError, parser.parse_ipv4, '1.2.3.4 ')
+        self.assertRaises(ValueError, parser.parse_ipv6, ' ::1')
+
+    def test_default_whitespace(self):
+        default = ParserElement.DEFAULT_WHITE_CHARS
+        Parser()
+        self.assertEqual(ParserElement.DEFAULT_WHITE_CHARS, default)
+
+    def test_other_default_whitespace(self):
+        # another pyparsing user changing the default does not matter
+        default = ParserElement.DEFAULT_WHITE_CHARS
+        ParserElement.setDefaultWhitespaceChars(' :.')
+        try:
+            parser = Parser()
+        finally:
+            ParserElement.setDefaultWhitespaceChars(default)
+        self.assertRaises(ValueError, parser.parse_ipv6, ' ::1')
+        self.assertEqual(parser.parse_ipv6('1::2'), 5192296858534827628530496329220098)
+
+    def test_independent(self):
+        self.assertFalse(Parser().IPv6 is Parser().IPv6)
+
+    def test_threads(self):
+        vectors = all_vectors()[::10]
+        parses, elapsed, mismatches = stress(16, rounds = 1, vectors = vectors)
+        self.assertEqual(parses, 16 * len(vectors))
+        self.assertEqual(mismatches, 0)
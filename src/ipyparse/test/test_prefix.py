@@ -0,0 +1,151 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from pyparsing import ParseException
+from ipyparse.ipv4 import IPv4_Prefix_WholeString
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv4 import parse_ipv4_prefix
+from ipyparse.ipv6 import IPv6_Prefix_WholeString
+from ipyparse.ipv6 import parse_ipv6
+from ipyparse.ipv6 import parse_ipv6_prefix
+from ipyparse.prefix import PrefixIndex
+
+good = [(0, '10.0.0.0/8', (167772160, 8)),
+        (1, '0.0.0.0/0', (0, 0)),
+        (2, '192.168.1.26/32', (3232235802, 32)),
+        (3, '192.168.1.26/24', (3232235776, 24)),
+        (4, '2001:db8::/32', (42540766411282592856903984951653826560, 32)),
+        (5, '::/0', (0, 0)),
+        (6, '::1/128', (1, 128)),
+        (7, 'fe80::1/10', (338288524927261089654018896841347694592, 10)),
+        (8, '::ffff:0.0.0.0/96', (281470681743360, 96))]
+"""
+A list of "good" test cases - valid prefixes and the corresponding network address and length.
+"""
+
+bad = [(0, '10.0.0.0'),
+       (1, '10.0.0.0/'),
+       (2, '10.0.0.0/33'),
+       (3, '10.0.0.0/08'),
+       (4, '10.0.0.0/8 '),
+       (5, '10.0.0/8'),
+       (6, '2001:db8::/129'),
+       (7, '2001:db8::/-1'),
+       (8, ':::/0'),
+       (9, '2001:db8::/32/32')]
+"""
+A list of "bad" test cases - invalid prefixes.
+"""
+
+def parse_prefix(s):
+    return parse_ipv6_prefix(s) if ':' in s else parse_ipv4_prefix(s)
+
+def grammar_prefix(s):
+    return (IPv6_Prefix_WholeString if ':' in s else IPv4_Prefix_WholeString).parseString(s)[0]
+
+class TestPrefix(unittest.TestCase):
+    def test_strict(self):
+        self.assertEqual(parse_ipv4_prefix('10.0.0.0/8', strict = True), (167772160, 8))
+        self.assertRaises(ValueError, parse_ipv4_prefix, '10.0.0.1/8', strict = True)
+        self.assertRaises(ValueError, parse_ipv6_prefix, '2001:db8::1/32', strict = True)
+
+def create_good_test_case(prefix, expected):
+    def test_case(self, prefix = prefix, expected = expected):
+        self.assertEqual(parse_prefix(prefix), expected)
+        self.assertEqual(grammar_prefix(prefix), expected)
+    return test_case
+
+for counter, prefix, expected in good:
+    setattr(TestPrefix,
+            'test_good_{}'.format(counter),
+            create_good_test_case(prefix, expected))
+
+def create_bad_test_case(prefix):
+    def test_case(self, prefix = prefix):
+        self.assertRaises(ValueError, parse_prefix, prefix)
+        self.assertRaises(ParseException, grammar_prefix, prefix)
+    return test_case
+
+for counter, prefix in bad:
+    setattr(TestPrefix,
+            'test_bad_{}'.format(counter),
+            create_bad_test_case(prefix))
+
+class TestPrefixIndex(unittest.TestCase):
+    def test_ipv4(self):
+        index = PrefixIndex(family = 4)
+        index.update([parse_ipv4_prefix('0.0.0.0/0') + ('default',),
+                      parse_ipv4_prefix('10.0.0.0/8') + ('ten',),
+                      parse_ipv4_prefix('10.1.0.0/16') + ('ten-one',),
+                      parse_ipv4_prefix('10.1.2.0/24') + ('ten-one-two',),
+                      parse_ipv4_prefix('10.2.0.0/16') + ('ten-two',)])
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.lookup(parse_ipv4('10.1.2.3')), 'ten-one-two')
+        self.assertEqual(index.lookup(parse_ipv4('10.1.3.3')), 'ten-one')
+        self.assertEqual(index.lookup(parse_ipv4('10.3.0.0')), 'ten')
+        self.assertEqual(index.lookup(parse_ipv4('10.2.255.255')), 'ten-two')
+        self.assertEqual(index.lookup(parse_ipv4('11.0.0.0')), 'default')
+        self.assertEqual(index.lookup_many([parse_ipv4('10.1.2.255'), parse_ipv4('9.255.255.255')]),
+                         ['ten-one-two', 'default'])
+
+    def test_ipv6(self):
+        index = PrefixIndex(family = 6)
+        index.update([parse_ipv6_prefix('2001:db8::/32'),
+                      parse_ipv6_prefix('2001:db8:1::/48'),
+                      parse_ipv6_prefix('2001:db8:1::1/128')])
+        self.assertEqual(index.lookup(parse_ipv6('2001:db8:1::1')), parse_ipv6_prefix('2001:db8:1::1/128'))
+        self.assertEqual(index.lookup(parse_ipv6('2001:db8:1::2')), parse_ipv6_prefix('2001:db8:1::/48'))
+        self.assertEqual(index.lookup(parse_ipv6('2001:db8:2::')), parse_ipv6_prefix('2001:db8::/32'))
+        self.assertEqual(index.lookup(parse_ipv6('2001:db9::'), 'none'), 'none')
+        self.assertEqual(index.lookup(0), None)
+
+    def test_adjacent(self):
+        index = PrefixIndex(family = 4)
+        index.update([parse_ipv4_prefix('10.0.0.0/25'), parse_ipv4_prefix('10.0.0.128/25')])
+        self.assertEqual(index.lookup(parse_ipv4('10.0.0.127')), parse_ipv4_prefix('10.0.0.0/25'))
+        self.assertEqual(index.lookup(parse_ipv4('10.0.0.128')), parse_ipv4_prefix('10.0.0.128/25'))
+        self.assertEqual(index.lookup(parse_ipv4('10.0.1.0')), None)
+
+    def test_add_after_lookup(self):
+        index = PrefixIndex(family = 4)
+        index.add(*parse_ipv4_prefix('10.0.0.0/8'))
+        self.assertEqual(index.lookup(parse_ipv4('10.1.0.0')), parse_ipv4_prefix('10.0.0.0/8'))
+        index.add(*parse_ipv4_prefix('10.1.0.0/16'))
+        self.assertEqual(index.lookup(parse_ipv4('10.1.0.0')), parse_ipv4_prefix('10.1.0.0/16'))
+        index.remove(*parse_ipv4_prefix('10.1.0.0/16'))
+        self.assertEqual(index.lookup(parse_ipv4('10.1.0.0')), parse_ipv4_prefix('10.0.0.0/8'))
+
+    def test_integer_keys(self):
+        # a parsed prefix and the same prefix as plain integers are one key
+        index = PrefixIndex(family = 4)
+        index.add(*parse_ipv4_prefix('10.0.0.0/8'))
+        index.add(0x0a000000, 8)
+        self.assertEqual(len(index), 1)
+        index.remove(0x0a000000, 8)
+        self.assertEqual(len(index), 0)
+
+    def test_empty(self):
+        self.assertEqual(PrefixIndex(family = 6).lookup(1), None)
+
+    def test_invalid(self):
+        index = PrefixIndex(family = 4)
+        self.assertRaises(ValueError, index.add, parse_ipv4('10.0.0.1'), 8)
+        self.assertRaises(ValueError, index.add, 0, 33)
+        self.assertRaises(ValueError, PrefixIndex, family = 5)
@@ -0,0 +1,135 @@
+# -*- mode: python; coding: utf-8 -*-
+
+# Copyright © 2011
+#
+# This file is part of IPyParse.
+#
+# IPyParse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IPyParse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IPyParse.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from pyparsing import ParseException
+from ipyparse.ipset import IPSet
+from ipyparse.ipv4 import IPv4Address
+from ipyparse.ipv4 import IPv4_Range_WholeString
+from ipyparse.ipv4 import parse_ipv4
+from ipyparse.ipv6 import IPv6_Range_WholeString
+from ipyparse.ipv6 import parse_ipv6
+from ipyparse.ranges import AddressRange
+from ipyparse.ranges import WildcardRange
+from ipyparse.ranges import parse_ipv4_range
+from ipyparse.ranges import parse_ipv6_range
+
+good = [(0, '10.0.0.1-10.0.3.255', AddressRange(167772161, 167773183, 4)),
+        (1, '192.168.*.*', AddressRange(3232235520, 3232301055, 4)),
+        (2, '*.*.*.*', AddressRange(0, 4294967295, 4)),
+        (3, '10.*.0.1', WildcardRange((10, None, 0, 1))),
+        (4, '*.0.0.1', WildcardRange((None, 0, 0, 1))),
+        (5, '1.2.3.4', AddressRange(16909060, 16909060, 4)),
+        (6, '01.2.3.*', AddressRange(16909056, 16909311, 4)),
+        (7, '1.2.3.4-1.2.3.4', AddressRange(16909060, 16909060, 4)),
+        (8, '2001:db8::1-2001:db8::ff', AddressRange(0x20010db8000000000000000000000001,
+                                                     0x20010db80000000000000000000000ff, 6)),
+        (9, '::1', AddressRange(1, 1, 6)),
+        (10, '::ffff:1.2.3.4-::ffff:1.2.3.9', AddressRange(0xffff01020304, 0xffff01020309, 6))]
+"""
+A list of "good" test cases - valid ranges and the corresponding range.
+"""
+
+bad = [(0, '1.2.3.4-1.2.3.3'),
+       (1, '1.2.3.*-1.2.3.4'),
+       (2, '1.2.*'),
+       (3, '1.2.3.256'),
+       (4, '1.2.3.4-'),
+       (5, '**.1.1.1'),
+       (6, ' 1.2.3.4'),
+       (7, '::2-::1'),
+       (8, '::-::1'),
+       (9, '2001:db8::*'),
+       (10, '::1-1.2.3.4')]
+"""
+A list of "bad" test cases - invalid ranges.
+"""
+
+def parse_range(s):
+    return parse_ipv6_range(s) if ':' in s else parse_ipv4_range(s)
+
+def grammar_range(s):
+    return (IPv6_Range_WholeString if ':' in s else IPv4_Range_WholeString).parseString(s)[0]
+
+class TestRanges(unittest.TestCase):
+    def test_len(self):
+        self.assertEqual(len(parse_ipv4_range('10.*.*.*')), 1 << 24)
+        self.assertEqual(len(parse_ipv4_range('10.*.0.*')), 1 << 16)
+        self.assertEqual(parse_ipv6_range('::1-ffff::').size, (0xffff << 112))
+
+    def test_contains(self):
+        network = parse_ipv4_range('10.*.*.*')
+        self.assertIn(parse_ipv4('10.255.0.1'), network)
+        self.assertIn('10.1.2.3', network)
+        self.assertNotIn('11.0.0.0', network)
+        self.assertNotIn('nonsense', network)
+        self.assertNotIn(parse_ipv6('::10.1.2.3'), network)
+        self.assertNotIn(parse_ipv6('::1'), parse_ipv4_range('0.0.0.0-0.0.0.255'))
+        self.assertNotIn(parse_ipv4('0.0.0.1'), parse_ipv6_range('::1-::ff'))
+        pattern = parse_ipv4_range('10.*.0.*')
+        self.assertIn('10.5.0.9', pattern)
+        self.assertNotIn('10.5.1.9', pattern)
+        self.assertIn(parse_ipv6('2001:db8::80'), parse_ipv6_range('2001:db8::1-2001:db8::ff'))
+
+    def test_iteration(self):
+        self.assertEqual([str(address) for address in parse_ipv4_range('10.0.0.254-10.0.1.1')],
+                         ['10.0.0.254', '10.0.0.255', '10.0.1.0', '10.0.1.1'])
+        pattern = iter(parse_ipv4_range('*.0.0.1'))
+        self.assertEqual([str(next(pattern)) for i in range(2)], ['0.0.0.1', '1.0.0.1'])
+        self.assertIsInstance(parse_ipv4_range('10.*.*.*')[-1], IPv4Address)
+        self.assertEqual(str(parse_ipv4_range('10.*.*.*')[-1]), '10.255.255.255')
+
+    def test_intervals(self):
+        self.assertEqual(list(parse_ipv4_range('10.*.0.*').intervals())[:2],
+                         [(parse_ipv4('10.0.0.0'), parse_ipv4('10.0.0.255')),
+                          (parse_ipv4('10.1.0.0'), parse_ipv4('10.1.0.255'))])
+
+    def test_ipset(self):
+        ipset = IPSet(['10.*.0.*', parse_ipv4_range('192.168.0.1-192.168.0.9')])
+        self.assertIn(parse_ipv4('10.9.0.1'), ipset)
+        self.assertNotIn(parse_ipv4('10.9.1.1'), ipset)
+        self.assertEqual(ipset.size(), (1 << 16) + 9)
+        self.assertRaises(ValueError, IPSet().add, parse_ipv6_range('::1'))
+
+def create_good_test_case(address, expected):
+    def test_case(self, address = address, expected = expected):
+        result = parse_range(address)
+        self.assertEqual(result, grammar_range(address))
+        self.assertEqual(result,
+                         expected,
+                         '{} does not convert to {} but instead we get {}'.format(address,
+                                                                                  expected,
+                                                                                  result))
+    return test_case
+
+for counter, address, expected in good:
+    setattr(TestRanges,
+            'test_good_{}'.format(counter),
+            create_good_test_case(address, expected))
+
+def create_bad_test_case(address):
+    def test_case(self, address = address):
+        self.assertRaises(ParseException, grammar_range, address)
+        self.assertRaises(ValueError, parse_range, address)
+    return test_case
+
+for counter, address in bad:
+    setattr(TestRanges,
+            'test_bad_{}'.format(counter),
+            create_bad_test_case(address))